@@ -0,0 +1,67 @@
+import random
+import timeit
+
+from benchmarks.eco_route import create_synthetic_graph
+from eco_traffic_app_engine.graph.costs import EdgeCosts, ROUTE_METRICS
+from eco_traffic_app_engine.graph.hierarchy import HierarchyTopology, ContractionHierarchy
+from eco_traffic_app_engine.graph.search import astar_search
+from eco_traffic_app_engine.graph.snapshot import GraphSnapshot
+from eco_traffic_app_engine.static.constants import CONGESTION_DICT
+
+if __name__ == "__main__":
+    # Grids are the worst case of the contraction hierarchies (no small separators), road graphs are sparser
+    graph = create_synthetic_graph(100, 100)
+    edge_costs = EdgeCosts(GraphSnapshot.from_graph(graph))
+    snapshot = edge_costs.snapshot
+    print(f'Synthetic graph: {snapshot.num_nodes} nodes, {snapshot.num_edges} edges')
+
+    start = timeit.default_timer()
+    topology = HierarchyTopology(snapshot)
+    print(f'Topology: {topology.num_edges} edges ({topology.num_shortcuts} shortcuts), {topology.num_triangles} '
+          f'triangles, built in {(timeit.default_timer() - start) * 1000:.2f} ms')
+
+    rng = random.Random(1)
+    pairs = [(rng.randrange(snapshot.num_nodes), rng.randrange(snapshot.num_nodes)) for _ in range(50)]
+
+    for metric in ROUTE_METRICS:
+        start = timeit.default_timer()
+        hierarchy = ContractionHierarchy(topology, edge_costs.costs[metric])
+        customization_time = timeit.default_timer() - start
+
+        weights = edge_costs.get_weights(metric)
+        start = timeit.default_timer()
+        astar_costs = [astar_search(edge_costs.indptr, edge_costs.indices, weights, source, target,
+                                    edge_costs.get_heuristic(metric, target))[0] for source, target in pairs]
+        astar_time = (timeit.default_timer() - start) / len(pairs)
+
+        start = timeit.default_timer()
+        hierarchy_costs = [hierarchy.query(source, target)[0] for source, target in pairs]
+        hierarchy_time = (timeit.default_timer() - start) / len(pairs)
+
+        assert all(abs(a - b) <= 1e-9 * max(a, 1) for a, b in zip(astar_costs, hierarchy_costs))
+        print(f'{metric}: customization {customization_time * 1000:.2f} ms ({hierarchy.num_edges} query edges), '
+              f'A* {astar_time * 1000:.2f} ms, CH {hierarchy_time * 1000:.2f} ms per query')
+
+    # New congestion on a quarter of the relations: customize the fuel weights again instead of a full rebuild
+    for u, v in graph.edges:
+        if rng.random() < 0.25:
+            graph[u][v]['congestion'] = rng.choice(list(CONGESTION_DICT.values()))
+
+    start = timeit.default_timer()
+    edge_costs = EdgeCosts(GraphSnapshot.from_graph(graph))
+    assert topology.matches(edge_costs.snapshot)
+    hierarchy.customize(edge_costs.costs['fuel'])
+    customization_time = timeit.default_timer() - start
+
+    start = timeit.default_timer()
+    rebuilt_costs = EdgeCosts(GraphSnapshot.from_graph(graph))
+    ContractionHierarchy(HierarchyTopology(rebuilt_costs.snapshot), rebuilt_costs.costs['fuel'])
+    rebuild_time = timeit.default_timer() - start
+
+    weights = edge_costs.get_weights('fuel')
+    for source, target in pairs:
+        cost = astar_search(edge_costs.indptr, edge_costs.indices, weights, source, target,
+                            edge_costs.get_heuristic('fuel', target))[0]
+        assert abs(hierarchy.query(source, target)[0] - cost) <= 1e-9 * max(cost, 1)
+    print(f'Congestion update: snapshot and customization {customization_time * 1000:.2f} ms, full rebuild '
+          f'{rebuild_time * 1000:.2f} ms')
@@ -0,0 +1,82 @@
+import random
+import timeit
+
+import networkx as nx
+
+from eco_traffic_app_engine.graph.costs import EdgeCosts
+from eco_traffic_app_engine.graph.search import astar_search
+from eco_traffic_app_engine.graph.snapshot import GraphSnapshot
+from eco_traffic_app_engine.static.constants import CONGESTION_DICT
+
+
+def create_synthetic_graph(rows: int, cols: int, seed: int = 0) -> nx.DiGraph:
+    """
+    Create a synthetic road grid with the same node and relation attributes as the engine memory graph. Nodes are
+    ~100 meters apart and connected in both directions, with random slopes, maximum speeds and congestion.
+
+    :param rows: number of rows of the grid
+    :type rows: int
+    :param cols: number of columns of the grid
+    :type cols: int
+    :param seed: random seed
+    :type seed: int
+    :return: synthetic graph
+    :rtype: nx.DiGraph
+    """
+    rng = random.Random(seed)
+    graph = nx.DiGraph()
+
+    for row in range(rows):
+        for col in range(cols):
+            graph.add_node(str(row * cols + col), lat=43.5 + row * 9e-4, lon=-5.6 + col * 1.24e-3,
+                           height=100.0 + rng.uniform(-20, 20))
+
+    for row in range(rows):
+        for col in range(cols):
+            for next_row, next_col in ((row + 1, col), (row, col + 1)):
+                if next_row < rows and next_col < cols:
+                    u, v = str(row * cols + col), str(next_row * cols + next_col)
+                    slope = rng.uniform(-6, 6)
+                    max_speed = rng.choice([30.0, 50.0, 50.0, 90.0, 120.0])
+                    distance = 100.0 * rng.uniform(1.0, 1.2)
+                    for source, target, sign in ((u, v, 1), (v, u, -1)):
+                        graph.add_edge(source, target, slope=sign * slope, distance=distance, max_speed=max_speed,
+                                       congestion=rng.choice([None] + list(CONGESTION_DICT.values())), lanes=1,
+                                       highway='', name='', surface='', way_id='')
+
+    return graph
+
+
+if __name__ == "__main__":
+    graph = create_synthetic_graph(200, 200)
+    print(f'Synthetic graph: {graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges')
+
+    start = timeit.default_timer()
+    edge_costs = EdgeCosts(GraphSnapshot.from_graph(graph))
+    print(f'Snapshot and edge costs precomputation: {(timeit.default_timer() - start) * 1000:.2f} ms')
+
+    # Costs as edge attributes for the networkx baseline
+    for position, (u, v) in enumerate(graph.edges):
+        graph[u][v]['fuel'] = edge_costs.costs['fuel'][position]
+
+    rng = random.Random(1)
+    pairs = [(rng.randrange(graph.number_of_nodes()), rng.randrange(graph.number_of_nodes())) for _ in range(20)]
+
+    for metric in ('distance', 'time', 'fuel'):
+        weights = edge_costs.get_weights(metric)
+        start = timeit.default_timer()
+        for source, target in pairs:
+            astar_search(edge_costs.indptr, edge_costs.indices, weights, source, target,
+                         edge_costs.get_heuristic(metric, target))
+        print(f'A* {metric}: {(timeit.default_timer() - start) / len(pairs) * 1000:.2f} ms per query')
+
+    # Same costs as the networkx Dijkstra
+    start = timeit.default_timer()
+    for source, target in pairs:
+        cost = nx.dijkstra_path_length(graph, edge_costs.snapshot.node_ids[source],
+                                       edge_costs.snapshot.node_ids[target], 'fuel')
+        result = astar_search(edge_costs.indptr, edge_costs.indices, edge_costs.get_weights('fuel'), source, target,
+                              edge_costs.get_heuristic('fuel', target))
+        assert abs(result[0] - cost) <= 1e-9 * max(cost, 1)
+    print(f'networkx Dijkstra fuel (and A* check): {(timeit.default_timer() - start) / len(pairs) * 1000:.2f} ms '
+          f'per query')
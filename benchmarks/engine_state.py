@@ -0,0 +1,63 @@
+import os
+import tempfile
+import timeit
+
+from benchmarks.eco_route import create_synthetic_graph
+from eco_traffic_app_engine.graph.costs import EdgeCosts
+from eco_traffic_app_engine.graph.search import astar_search
+from eco_traffic_app_engine.graph.snapshot import GraphSnapshot
+from eco_traffic_app_engine.graph.spatial_hash import SpatialHash
+from eco_traffic_app_engine.graph.storage import save_engine_state, load_engine_state
+
+if __name__ == "__main__":
+    graph = create_synthetic_graph(200, 200)
+    coordinates_ids = SpatialHash()
+    for node_id, data in graph.nodes(data=True):
+        coordinates_ids.add(data['lat'], data['lon'], node_id)
+    osm_node_ids = {str(int(node_id) * 10): node_id for node_id in list(graph.nodes)[::10]}
+    print(f'Synthetic graph: {graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges')
+
+    with tempfile.TemporaryDirectory() as folder:
+        directory = os.path.join(folder, 'engine_state')
+
+        start = timeit.default_timer()
+        save_engine_state(directory, graph, coordinates_ids, graph.number_of_nodes(), osm_node_ids)
+        save_time = timeit.default_timer() - start
+        size = sum(os.path.getsize(os.path.join(directory, file_name)) for file_name in os.listdir(directory))
+
+        # Warm start: memory-mapped arrays and the snapshot over them, enough to serve the queries
+        start = timeit.default_timer()
+        state = load_engine_state(directory)
+        snapshot = state.get_snapshot()
+        load_time = timeit.default_timer() - start
+
+        start = timeit.default_timer()
+        edge_costs = EdgeCosts(snapshot)
+        weights = edge_costs.get_weights('fuel')
+        costs_time = timeit.default_timer() - start
+        assert astar_search(edge_costs.indptr, edge_costs.indices, weights, 0, snapshot.num_nodes - 1,
+                            edge_costs.get_heuristic('fuel', snapshot.num_nodes - 1)) is not None
+
+        # Memory graph and spatial hash, only created when the graph is modified
+        start = timeit.default_timer()
+        restored = state.get_graph()
+        restored_coordinates_ids = state.get_coordinates_ids()
+        graph_time = timeit.default_timer() - start
+
+        print(f'State folder: {size / 1e6:.2f} MB, saved in {save_time * 1000:.2f} ms, loaded (snapshot) in '
+              f'{load_time * 1000:.2f} ms, edge costs in {costs_time * 1000:.2f} ms, memory graph and spatial hash '
+              f'created in {graph_time * 1000:.2f} ms')
+
+        # The restored state is the same as the saved one
+        assert list(restored.nodes(data=True)) == list(graph.nodes(data=True))
+        assert list(restored.edges(data=True)) == list(graph.edges(data=True))
+        assert state.last_id == graph.number_of_nodes() and state.osm_node_ids == osm_node_ids
+        assert len(restored_coordinates_ids) == len(coordinates_ids)
+        assert all(restored_coordinates_ids.get(lat, lon) == value for lat, lon, value in coordinates_ids.items())
+
+        # The mapped snapshot is the same as the one of the memory graph
+        expected = GraphSnapshot.from_graph(graph)
+        assert snapshot.node_ids == expected.node_ids and snapshot.strings == expected.strings
+        assert (snapshot.indptr == expected.indptr).all() and (snapshot.indices == expected.indices).all()
+        assert all((snapshot.columns[key] == expected.columns[key]).all() for key in ('lanes', 'congestion', 'name'))
+        assert all(state.get_relation(edge) == graph[u][v] for edge, (u, v) in enumerate(graph.edges))
@@ -0,0 +1,59 @@
+import random
+import timeit
+
+from eco_traffic_app_engine.graph.models import Coords
+from eco_traffic_app_engine.routing.utils import calculate_extended_coords_and_distances, \
+    calculate_extended_coords_and_distances_vectorized
+
+# Tolerances of the vectorized implementation against the geopy one
+DISTANCE_TOLERANCE = 1e-3  # meters
+COORDINATES_TOLERANCE = 1e-9  # degrees
+
+
+def generate_route(source: Coords, destination: Coords, num_nodes: int) -> list:
+    """
+    Generate a synthetic route between source and destination with randomly spaced nodes
+
+    :param source: source coordinates
+    :type source: Coords
+    :param destination: destination coordinates
+    :type destination: Coords
+    :param num_nodes: number of nodes of the route
+    :type num_nodes: int
+    :return: list of Coords
+    :rtype: list
+    """
+    # Random proportions along the straight line, sorted to keep the route order
+    proportions = sorted([0.0, 1.0] + [random.random() for _ in range(num_nodes - 2)])
+
+    return [Coords(lat=source.lat + (destination.lat - source.lat) * t + random.uniform(-1e-4, 1e-4),
+                   lon=source.lon + (destination.lon - source.lon) * t + random.uniform(-1e-4, 1e-4))
+            for t in proportions]
+
+
+if __name__ == "__main__":
+    random.seed(0)
+
+    # Gijon - Caceres
+    route = generate_route(Coords(lat=43.52311256, lon=-5.62778751),
+                           Coords(lat=39.47012875669537, lon=-6.385007480006402), num_nodes=5000)
+
+    # Check both implementations return the same values
+    geopy_coords, geopy_distances = calculate_extended_coords_and_distances(route)
+    numpy_coords, numpy_distances = calculate_extended_coords_and_distances_vectorized(route)
+
+    assert len(geopy_coords) == len(numpy_coords) and len(geopy_distances) == len(numpy_distances)
+    max_distance_error = max(abs(a - b) for a, b in zip(geopy_distances, numpy_distances))
+    max_coords_error = max(max(abs(a.lat - b.lat), abs(a.lon - b.lon)) for a, b in zip(geopy_coords, numpy_coords))
+    assert max_distance_error < DISTANCE_TOLERANCE and max_coords_error < COORDINATES_TOLERANCE
+
+    # Time both implementations
+    number = 5
+    geopy_time = timeit.timeit(lambda: calculate_extended_coords_and_distances(route), number=number) / number
+    numpy_time = timeit.timeit(lambda: calculate_extended_coords_and_distances_vectorized(route),
+                               number=number) / number
+
+    print(f'Route nodes: {len(route)}, extended nodes: {len(numpy_coords)}')
+    print(f'Max distance error: {max_distance_error:.3e} m, max coordinates error: {max_coords_error:.3e} deg')
+    print(f'geopy: {geopy_time * 1000:.2f} ms, numpy: {numpy_time * 1000:.2f} ms, '
+          f'speedup: {geopy_time / numpy_time:.1f}x')
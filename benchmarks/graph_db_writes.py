@@ -0,0 +1,68 @@
+import time
+from dataclasses import asdict
+
+from eco_traffic_app_engine.graph.db.neo4j import GraphDB
+from eco_traffic_app_engine.graph.models import Segment
+from eco_traffic_app_engine.static.constants import GRAPH_DB_URL, GRAPH_DB_USER, GRAPH_DB_PASSWORD, \
+    GRAPH_DB_BATCH_SIZE, GRAPH_DB_PAGE_SIZE
+
+# Requires a local Neo4j database (GRAPH_DB_URL), which is cleared by the benchmark
+
+
+def create_synthetic_route(num_nodes: int, first_id: int) -> tuple:
+    """
+    Create the nodes and relations of a synthetic route
+
+    :param num_nodes: number of nodes of the route
+    :type num_nodes: int
+    :param first_id: identifier of the first node
+    :type first_id: int
+    :return: list of nodes and list of relations
+    :rtype: tuple
+    """
+    nodes = [{'node_id': str(first_id + i), 'lat': 43.5 - i * 1e-4, 'lon': -5.6 - i * 1e-4, 'height': 100.0 + i % 10}
+             for i in range(num_nodes)]
+    relations = [{'from': source['node_id'], 'to': target['node_id'],
+                  'segment_info': asdict(Segment(slope=1.0, distance=50.0, max_speed=50, congestion=None, lanes=2,
+                                                 highway='primary', name='', surface='asphalt', way_id='1'))}
+                 for source, target in zip(nodes, nodes[1:])]
+
+    return nodes, relations
+
+
+if __name__ == "__main__":
+    graph_db = GraphDB(ip_address=GRAPH_DB_URL, user=GRAPH_DB_USER, password=GRAPH_DB_PASSWORD)
+    num_nodes = 2000
+
+    # Per-item writes, as the previous ingestion
+    graph_db.clear_database()
+    nodes, relations = create_synthetic_route(num_nodes, 0)
+    start = time.perf_counter()
+    for node in nodes:
+        graph_db.create_node(node)
+    for relation in relations:
+        graph_db.create_update_relation({'from': relation['from'], 'to': relation['to']}, relation['segment_info'])
+    item_time = time.perf_counter() - start
+
+    # Bulk writes with UNWIND/MERGE statements
+    graph_db.clear_database()
+    start = time.perf_counter()
+    graph_db.create_nodes(nodes, GRAPH_DB_BATCH_SIZE)
+    graph_db.create_update_relations(relations, GRAPH_DB_BATCH_SIZE)
+    bulk_time = time.perf_counter() - start
+
+    num_items = len(nodes) + len(relations)
+    print(f'{len(nodes)} nodes and {len(relations)} relations')
+    print(f'Per-item writes: {item_time:.2f} s ({num_items / item_time:.0f} items/s)')
+    print(f'Bulk writes (batch size {GRAPH_DB_BATCH_SIZE}): {bulk_time:.2f} s ({num_items / bulk_time:.0f} items/s)')
+
+    # Paged reads of the stored network, as the memory graph loading
+    start = time.perf_counter()
+    num_read = sum(1 for _ in graph_db.read_nodes(GRAPH_DB_PAGE_SIZE)) + \
+        sum(1 for _ in graph_db.read_relations(GRAPH_DB_PAGE_SIZE))
+    read_time = time.perf_counter() - start
+    assert num_read == num_items
+    print(f'Paged reads (page size {GRAPH_DB_PAGE_SIZE}): {read_time:.2f} s ({num_read / read_time:.0f} items/s)')
+
+    graph_db.clear_database()
+    graph_db.close()
@@ -0,0 +1,80 @@
+import random
+import timeit
+import tracemalloc
+
+import networkx as nx
+import numpy as np
+
+from benchmarks.eco_route import create_synthetic_graph
+from eco_traffic_app_engine.graph.clustering import calculate_great_circle_distance
+from eco_traffic_app_engine.graph.costs import EdgeCosts
+from eco_traffic_app_engine.graph.search import astar_search
+from eco_traffic_app_engine.graph.snapshot import GraphSnapshot
+from eco_traffic_app_engine.static.constants import CONGESTION_DICT
+
+if __name__ == "__main__":
+    # Memory of the memory graph and its snapshot
+    tracemalloc.start()
+    graph = create_synthetic_graph(200, 200)
+    graph_memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = timeit.default_timer()
+    snapshot = GraphSnapshot.from_graph(graph)
+    snapshot_time = timeit.default_timer() - start
+
+    print(f'Graph of {snapshot.num_nodes} nodes and {snapshot.num_edges} edges')
+    print(f'nx.DiGraph: {graph_memory / 1e6:.2f} MB ({graph_memory / snapshot.num_edges:.0f} bytes per edge)')
+    print(f'CSR snapshot arrays: {snapshot.nbytes / 1e6:.2f} MB ({snapshot.nbytes / snapshot.num_edges:.0f} bytes '
+          f'per edge), built in {snapshot_time * 1000:.2f} ms')
+
+    # Shortest distance queries on both graphs, with the same heuristic
+    edge_costs = EdgeCosts(snapshot)
+    weights = edge_costs.get_weights('distance')
+    rng = random.Random(1)
+    pairs = [(rng.randrange(snapshot.num_nodes), rng.randrange(snapshot.num_nodes)) for _ in range(20)]
+
+    start = timeit.default_timer()
+    snapshot_costs = [astar_search(edge_costs.indptr, edge_costs.indices, weights, source, target,
+                                   edge_costs.get_heuristic('distance', target))[0] for source, target in pairs]
+    snapshot_time = (timeit.default_timer() - start) / len(pairs)
+
+    def heuristic(u, v):
+        return 0.99 * calculate_great_circle_distance(graph.nodes[u]['lat'], graph.nodes[u]['lon'],
+                                                      graph.nodes[v]['lat'], graph.nodes[v]['lon'])
+
+    start = timeit.default_timer()
+    graph_costs = [nx.astar_path_length(graph, snapshot.node_ids[source], snapshot.node_ids[target], heuristic,
+                                        'distance') for source, target in pairs]
+    graph_time = (timeit.default_timer() - start) / len(pairs)
+
+    # Distances are stored as float32 on the snapshot
+    assert all(abs(a - b) <= 1e-5 * max(b, 1) for a, b in zip(snapshot_costs, graph_costs))
+    print(f'A* distance query -> nx.DiGraph: {graph_time * 1000:.2f} ms, CSR snapshot: {snapshot_time * 1000:.2f} ms')
+
+    # New congestion (and a new way name) on 1% of the relations: update the snapshot instead of creating it again
+    relations = rng.sample(list(graph.edges), snapshot.num_edges // 100)
+    for u, v in relations:
+        graph[u][v]['congestion'] = rng.choice(list(CONGESTION_DICT.values()))
+        graph[u][v]['name'] = f'Street {u}'
+
+    start = timeit.default_timer()
+    edges = np.array([snapshot.get_edge(snapshot.node_index[u], snapshot.node_index[v]) for u, v in relations])
+    updated_snapshot = snapshot.update_relations(edges, [graph[u][v] for u, v in relations])
+    updated_costs = edge_costs.update(updated_snapshot, edges)
+    update_time = timeit.default_timer() - start
+
+    start = timeit.default_timer()
+    rebuilt_costs = EdgeCosts(GraphSnapshot.from_graph(graph))
+    rebuild_time = timeit.default_timer() - start
+
+    rebuilt_snapshot = rebuilt_costs.snapshot
+    assert all((updated_snapshot.columns[key] == rebuilt_snapshot.columns[key]).all()
+               for key in ('distance', 'slope', 'max_speed', 'lanes', 'congestion'))
+    assert all(updated_snapshot.strings[code] == rebuilt_snapshot.strings[other]
+               for code, other in zip(updated_snapshot.columns['name'], rebuilt_snapshot.columns['name']))
+    assert all(np.array_equal(updated_costs.costs[metric], rebuilt_costs.costs[metric])
+               for metric in rebuilt_costs.costs)
+    assert updated_costs.rates == rebuilt_costs.rates
+    print(f'Congestion update of {len(relations)} relations -> snapshot and edge costs updated in '
+          f'{update_time * 1000:.2f} ms, created again in {rebuild_time * 1000:.2f} ms')
@@ -0,0 +1,90 @@
+import random
+import timeit
+
+import networkx as nx
+
+from benchmarks.eco_route import create_synthetic_graph
+from eco_traffic_app_engine.graph.costs import EdgeCosts, ROUTE_METRICS
+from eco_traffic_app_engine.graph.search import astar_search, pareto_search, is_dominated
+from eco_traffic_app_engine.graph.snapshot import GraphSnapshot
+
+
+def get_brute_force_front(edge_costs: EdgeCosts, weights: list, source: int, target: int) -> list:
+    """
+    Get the exact Pareto front of the paths between two nodes by enumerating all the simple paths (small graphs only)
+
+    :param edge_costs: edge costs of the graph snapshot
+    :type edge_costs: EdgeCosts
+    :param weights: cost vector of each edge
+    :type weights: list
+    :param source: source node position
+    :type source: int
+    :param target: target node position
+    :type target: int
+    :return: cost vectors of the front, sorted lexicographically
+    :rtype: list
+    """
+    snapshot = edge_costs.snapshot
+    edges = {(int(u), int(v)): edge for edge, (u, v) in enumerate(zip(snapshot.get_sources(), snapshot.indices))}
+
+    costs = set()
+    for path in nx.all_simple_paths(nx.DiGraph(list(edges)), source, target):
+        path_edges = [edges[(u, v)] for u, v in zip(path, path[1:])]
+        costs.add(tuple(sum(weights[edge][position] for edge in path_edges) for position in range(len(ROUTE_METRICS))))
+
+    return sorted(item for item in costs if not is_dominated(item, [other for other in costs if other != item]))
+
+
+if __name__ == "__main__":
+    # The exact fronts (epsilon 0) are the same as the brute-force ones, with and without lower bounds
+    checked = 0
+    for seed in range(8):
+        edge_costs = EdgeCosts(GraphSnapshot.from_graph(create_synthetic_graph(3, 4, seed)))
+        weights = edge_costs.get_cost_vectors(ROUTE_METRICS)
+        rng = random.Random(seed)
+        for source, target in ((rng.randrange(12), rng.randrange(12)) for _ in range(6)):
+            if source == target:
+                continue
+            expected = get_brute_force_front(edge_costs, weights, source, target)
+            for heuristics in (None, [edge_costs.get_heuristic(metric, target) for metric in ROUTE_METRICS]):
+                front = [costs for costs, _ in pareto_search(edge_costs.indptr, edge_costs.indices, weights, source,
+                                                             target, 0.0, heuristics)]
+                assert len(front) == len(expected) and all(abs(a - b) <= 1e-9 * max(b, 1)
+                                                           for costs, other in zip(front, expected)
+                                                           for a, b in zip(costs, other))
+                checked += 1
+    print(f'Exact fronts equal to the brute-force ones on {checked} searches')
+
+    # Random slopes, speeds and congestion make the criteria uncorrelated, so the exact fronts are large
+    edge_costs = EdgeCosts(GraphSnapshot.from_graph(create_synthetic_graph(15, 15)))
+    snapshot = edge_costs.snapshot
+    weights = edge_costs.get_cost_vectors(ROUTE_METRICS)
+    print(f'Synthetic graph: {snapshot.num_nodes} nodes, {snapshot.num_edges} edges')
+
+    rng = random.Random(1)
+    pairs = [(rng.randrange(snapshot.num_nodes), rng.randrange(snapshot.num_nodes)) for _ in range(10)]
+
+    for epsilon in (0.0, 0.01, 0.05, 0.1):
+        fronts = []
+        start = timeit.default_timer()
+        for source, target in pairs:
+            heuristics = [edge_costs.get_heuristic(metric, target) for metric in ROUTE_METRICS]
+            fronts.append(pareto_search(edge_costs.indptr, edge_costs.indices, weights, source, target, epsilon,
+                                        heuristics))
+        search_time = (timeit.default_timer() - start) / len(pairs)
+
+        # Relative gap between the best route of each metric on the front and the optimal one
+        gap = 0.0
+        for (source, target), front in zip(pairs, fronts):
+            costs = [path_costs for path_costs, _ in front]
+            # The routes of the front do not dominate each other
+            assert not any(is_dominated(item, [other for other in costs if other != item]) for item in costs)
+            for position, metric in enumerate(ROUTE_METRICS):
+                best = astar_search(edge_costs.indptr, edge_costs.indices, edge_costs.get_weights(metric), source,
+                                    target, edge_costs.get_heuristic(metric, target))[0]
+                gap = max(gap, min(item[position] for item in costs) / best - 1 if best > 0 else 0.0)
+
+        # The exact front holds the best route of each metric
+        assert epsilon > 0 or gap <= 1e-9
+        print(f'epsilon {epsilon}: {sum(map(len, fronts)) / len(fronts):.1f} routes per front, '
+              f'{search_time * 1000:.2f} ms per search, best metric costs up to {gap * 100:.2f}% above the optimum')
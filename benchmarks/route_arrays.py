@@ -0,0 +1,62 @@
+import random
+import timeit
+import tracemalloc
+
+from eco_traffic_app_engine.graph.models import Coords, RouteArrays
+from eco_traffic_app_engine.routing.utils import calculate_extended_coords_and_distances_vectorized, \
+    calculate_extended_route
+
+
+def measure_memory(function, *args):
+    """
+    Execute a function measuring the memory of its result
+
+    :param function: function to execute
+    :return: function result and its memory in bytes
+    :rtype: tuple
+    """
+    tracemalloc.start()
+    result = function(*args)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, current
+
+
+if __name__ == "__main__":
+    random.seed(0)
+
+    # Routing service geometry ([lon, lat] items) going from Gijon to Caceres
+    num_nodes = 200000
+    geometry = [[-5.6 - i * 4e-6 + random.uniform(-1e-5, 1e-5), 43.5 - i * 2e-5 + random.uniform(-1e-5, 1e-5)]
+                for i in range(num_nodes)]
+
+    def parse_coords(items):
+        return [Coords(lat=item[1], lon=item[0]) for item in items]
+
+    coords, coords_memory = measure_memory(parse_coords, geometry)
+    route, route_memory = measure_memory(RouteArrays.from_lon_lat, geometry)
+    print(f'Geometry of {num_nodes} nodes -> Coords: {coords_memory / 1e6:.2f} MB, '
+          f'RouteArrays: {route_memory / 1e6:.2f} MB')
+
+    number = 3
+    coords_time = timeit.timeit(lambda: parse_coords(geometry), number=number) / number
+    route_time = timeit.timeit(lambda: RouteArrays.from_lon_lat(geometry), number=number) / number
+    print(f'Parsing -> Coords: {coords_time * 1000:.2f} ms, RouteArrays: {route_time * 1000:.2f} ms')
+
+    # Extended route used on the routes processing
+    (extended_coords, _), extended_coords_memory = measure_memory(calculate_extended_coords_and_distances_vectorized,
+                                                                  coords)
+    (extended_route, _), extended_route_memory = measure_memory(calculate_extended_route, route)
+    assert len(extended_coords) == len(extended_route)
+
+    coords_time = timeit.timeit(lambda: calculate_extended_coords_and_distances_vectorized(coords),
+                                number=number) / number
+    route_time = timeit.timeit(lambda: calculate_extended_route(route), number=number) / number
+    print(f'Extended route of {len(extended_route)} nodes -> Coords: {extended_coords_memory / 1e6:.2f} MB '
+          f'({coords_time * 1000:.2f} ms), RouteArrays: {extended_route_memory / 1e6:.2f} MB '
+          f'({route_time * 1000:.2f} ms)')
+
+    # Per-point access with views
+    view_time = timeit.timeit(lambda: sum(item.lat for item in route), number=number) / number
+    print(f'Per-point iteration of {len(route)} views: {view_time * 1000:.2f} ms')
@@ -0,0 +1,96 @@
+import math
+import random
+import timeit
+
+from eco_traffic_app_engine.elevation.provider import ElevationProvider
+from eco_traffic_app_engine.graph.models import RouteArrays
+from eco_traffic_app_engine.routing.utils import process_shared_routes, process_max_speeds, \
+    segment_processed_route, calculate_extended_route, calculate_slopes_batch
+
+
+class SyntheticElevationProvider(ElevationProvider):
+    """
+    Elevation provider with synthetic heights, counting the requested coordinates
+    """
+
+    def __init__(self):
+        self.requested = 0
+
+    def get_heights(self, route_coordinates: list) -> list:
+        self.requested += len(route_coordinates)
+        return [100 + 50 * math.sin(item.lat * 1000) for item in route_coordinates]
+
+
+class SyntheticNominatimRetriever:
+    """
+    Nominatim retriever with synthetic maximum speeds, counting the requested coordinates
+    """
+
+    def __init__(self):
+        self.requested = 0
+
+    def reverse_many(self, coords: list) -> list:
+        self.requested += len(coords)
+        return [{'extratags': {'maxspeed': str(50 + 10 * (int(item.lat * 500) % 3))}} for item in coords]
+
+
+def process_independent_routes(routes_coordinates: list, nominatim_retriever, height_provider) -> list:
+    """
+    Process each route on its own, without sharing the work of their common parts
+
+    :param routes_coordinates: list with the coordinates of each input route
+    :type routes_coordinates: list
+    :return: list of processed routes
+    :rtype: list
+    """
+    extended_routes = [calculate_extended_route(route_coordinates) for route_coordinates in routes_coordinates]
+    routes_heights = [height_provider.get_heights(coordinates) for coordinates, _ in extended_routes]
+    routes_slopes = calculate_slopes_batch([distances for _, distances in extended_routes], routes_heights)
+
+    return [segment_processed_route(coordinates, distances.tolist(), heights, slopes.tolist(),
+                                    process_max_speeds(nominatim_retriever.reverse_many(coordinates))[0])
+            for (coordinates, distances), heights, slopes in zip(extended_routes, routes_heights, routes_slopes)]
+
+
+if __name__ == "__main__":
+    random.seed(0)
+
+    # Three alternatives of a routing service ([lon, lat] items), sharing their first and last kilometers
+    num_nodes = 3000
+    geometry = [[-5.6 - i * 4e-4 + random.uniform(-1e-4, 1e-4), 43.5 - i * 2e-3] for i in range(num_nodes)]
+    alternatives = [geometry,
+                    geometry[:1000] + [[lon + 0.01, lat] for lon, lat in geometry[1000:2000]] + geometry[2000:],
+                    geometry[:500] + [[lon - 0.02, lat] for lon, lat in geometry[500:2800]] + geometry[2800:]]
+    routes = [RouteArrays.from_lon_lat(alternative) for alternative in alternatives]
+
+    height_provider, nominatim_retriever = SyntheticElevationProvider(), SyntheticNominatimRetriever()
+    independent_routes = process_independent_routes(routes, nominatim_retriever, height_provider)
+    independent_lookups = height_provider.requested, nominatim_retriever.requested
+
+    height_provider, nominatim_retriever = SyntheticElevationProvider(), SyntheticNominatimRetriever()
+    shared_routes, report = process_shared_routes(routes, nominatim_retriever=nominatim_retriever,
+                                                  height_provider=height_provider)
+    shared_lookups = height_provider.requested, nominatim_retriever.requested
+
+    # Both ways have the same output
+    for independent_route, shared_route in zip(independent_routes, shared_routes):
+        assert [(item.lat, item.lon) for item in independent_route['segments']] == \
+               [(item.lat, item.lon) for item in shared_route['segments']]
+        assert all(independent_route[key] == shared_route[key]
+                   for key in ('heights', 'max_speed', 'distances', 'slopes'))
+
+    # The heights and ways of the coordinates shared by several routes are requested once
+    assert shared_lookups == (report['unique_points'], report['unique_points'])
+
+    print(f'Report: {report}')
+    print(f'Extended pairs -> independent: {report["pairs"]}, shared: {report["unique_pairs"]}')
+    print(f'Height lookups -> independent: {independent_lookups[0]}, shared: {shared_lookups[0]}')
+    print(f'Nominatim lookups -> independent: {independent_lookups[1]}, shared: {shared_lookups[1]}')
+
+    number = 3
+    independent_time = timeit.timeit(lambda: process_independent_routes(routes, SyntheticNominatimRetriever(),
+                                                                        SyntheticElevationProvider()),
+                                     number=number) / number
+    shared_time = timeit.timeit(lambda: process_shared_routes(routes, SyntheticNominatimRetriever(),
+                                                              SyntheticElevationProvider()), number=number) / number
+    print(f'Processing time -> independent: {independent_time * 1000:.2f} ms, shared: {shared_time * 1000:.2f} ms')
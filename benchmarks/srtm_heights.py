@@ -0,0 +1,52 @@
+import os
+import tempfile
+import timeit
+
+import numpy as np
+
+from eco_traffic_app_engine.elevation.srtm import SRTMElevationProvider
+from eco_traffic_app_engine.graph.models import Coords
+
+# SRTM3 tile size
+TILE_SIZE = 1201
+
+
+def write_synthetic_tile(directory: str, lat: int, lon: int) -> None:
+    """
+    Write a synthetic SRTM tile whose heights are a plane, so the bilinear interpolation is exact
+
+    :param directory: directory where the tile is stored
+    :type directory: str
+    :param lat: latitude of the south-west corner
+    :type lat: int
+    :param lon: longitude of the south-west corner
+    :type lon: int
+    :return: None
+    """
+    rows, cols = np.mgrid[0:TILE_SIZE, 0:TILE_SIZE]
+    heights = (rows * 2 + cols).astype('>i2')
+    heights.tofile(os.path.join(directory, SRTMElevationProvider.get_tile_name(lat, lon)))
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        write_synthetic_tile(directory, 43, -6)
+        provider = SRTMElevationProvider(directory)
+
+        # Random coordinates inside the tile
+        rng = np.random.default_rng(0)
+        num_points = 100000
+        lats, lons = rng.uniform(43, 44, num_points), rng.uniform(-6, -5, num_points)
+        coords = [Coords(lat=lat, lon=lon) for lat, lon in zip(lats.tolist(), lons.tolist())]
+
+        # Check the interpolated heights with the plane values
+        expected = (44 - lats) * (TILE_SIZE - 1) * 2 + (lons + 6) * (TILE_SIZE - 1)
+        assert np.allclose(provider.get_heights_array(lats, lons), expected)
+
+        number = 5
+        array_time = timeit.timeit(lambda: provider.get_heights_array(lats, lons), number=number) / number
+        coords_time = timeit.timeit(lambda: provider.get_heights(coords), number=number) / number
+
+        print(f'Points: {num_points}')
+        print(f'Arrays: {array_time * 1e6 / num_points:.3f} us/point, '
+              f'Coords: {coords_time * 1e6 / num_points:.3f} us/point')
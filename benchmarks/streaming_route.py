@@ -0,0 +1,52 @@
+import math
+import tracemalloc
+
+from eco_traffic_app_engine.elevation.provider import ElevationProvider
+from eco_traffic_app_engine.graph.models import Coords
+from eco_traffic_app_engine.osm.ways import OSMWayIndex
+from eco_traffic_app_engine.routing.streaming import process_route_streaming
+from eco_traffic_app_engine.routing.utils import process_route
+
+
+class SyntheticElevationProvider(ElevationProvider):
+    """
+    Elevation provider with synthetic heights based on the coordinates
+    """
+
+    def get_heights(self, route_coordinates: list) -> list:
+        return [500 + 300 * math.sin(item.lat * 50) + 20 * math.cos(item.lon * 700) for item in route_coordinates]
+
+
+def measure_peak_memory(function, *args, **kwargs):
+    """
+    Execute a function measuring its peak memory
+
+    :param function: function to execute
+    :return: function result and peak memory in bytes
+    :rtype: tuple
+    """
+    tracemalloc.start()
+    result = function(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, peak
+
+
+if __name__ == "__main__":
+    # Long route going south with nodes every ~400 meters, along a single way
+    num_nodes = 2000
+    route = [Coords(lat=43.5 - i * 0.0036, lon=-5.6 - i * 0.0004) for i in range(num_nodes)]
+    way_index = OSMWayIndex.from_ways([(1, [(item.lon, item.lat) for item in route],
+                                       {'highway': 'primary', 'maxspeed': '90'})])
+    params = {'height_provider': SyntheticElevationProvider(), 'way_index': way_index}
+
+    batch_route, batch_peak = measure_peak_memory(process_route, route, **params)
+    print(f'Batch: {batch_peak / 1e6:.2f} MB')
+
+    for window_size in (50, 500):
+        # The route is given as a generator to avoid accounting the input coordinates
+        streaming_route, streaming_peak = measure_peak_memory(process_route_streaming, iter(route), window_size,
+                                                              **params)
+        assert streaming_route == batch_route
+        print(f'Streaming (window {window_size}): {streaming_peak / 1e6:.2f} MB')
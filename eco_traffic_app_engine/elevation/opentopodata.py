@@ -0,0 +1,171 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from eco_traffic_app_engine.elevation.provider import ElevationProvider
+from eco_traffic_app_engine.graph.models import get_coordinates_arrays
+from eco_traffic_app_engine.others.utils import split_list
+from eco_traffic_app_engine.static.constants import HEIGHT_API_DATASET_URL, HEIGHT_API_MAX_LOCATIONS, \
+    HEIGHT_API_MAX_WORKERS, HEIGHT_API_TIMEOUT, HEIGHT_CACHE_MAX_ENTRIES
+
+
+class OpenTopoDataElevationProvider(ElevationProvider):
+    """
+    Open Topo Data service layer: heights are cached by coordinates (LRU eviction), the coordinates shared by
+    several routes are requested once and the chunks of locations are requested concurrently over a pooled session
+
+    :param url: dataset URL of the service
+    :type url: str
+    :param max_locations: maximum number of locations per request
+    :type max_locations: int
+    :param max_workers: maximum number of concurrent requests
+    :type max_workers: int
+    :param max_entries: maximum number of cached heights
+    :type max_entries: int
+    :param use_post: flag for sending the locations on a POST body instead of the GET query. Default True.
+    :type use_post: bool
+    :param timeout: timeout of each request in seconds
+    :type timeout: float
+    """
+
+    def __init__(self, url: str = HEIGHT_API_DATASET_URL, max_locations: int = HEIGHT_API_MAX_LOCATIONS,
+                 max_workers: int = HEIGHT_API_MAX_WORKERS, max_entries: int = HEIGHT_CACHE_MAX_ENTRIES,
+                 use_post: bool = True, timeout: float = HEIGHT_API_TIMEOUT):
+        self._url = url
+        self._max_locations = max_locations
+        self._max_workers = max_workers
+        self._max_entries = max_entries
+        self._use_post = use_post
+        self._timeout = timeout
+
+        # Create a session with a connection pool sized to the number of workers
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+        # Heights cached by (lat, lon), ordered from least to most recently used
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Hit and miss counters
+        self._hits = 0
+        self._misses = 0
+
+    def request_heights(self, locations: list) -> list:
+        """
+        Request the heights of a chunk of locations to the service
+
+        :param locations: list of (lat, lon) tuples
+        :type locations: list
+        :return: list with associated heights
+        :rtype: list
+        """
+        locations_str = '|'.join(f'{lat},{lon}' for lat, lon in locations)
+
+        # Perform request and parse to json
+        if self._use_post:
+            results = self._session.post(url=self._url, json={'locations': locations_str},
+                                         timeout=self._timeout).json()
+        else:
+            results = self._session.get(url=self._url, params={'locations': locations_str},
+                                        timeout=self._timeout).json()
+
+        return [result['elevation'] for result in results['results']]
+
+    def get_routes_heights(self, routes_coordinates: list) -> list:
+        """
+        Get the heights of several routes at once, requesting only once the coordinates not cached
+
+        :param routes_coordinates: list with the coordinates of each route (RouteArrays or list of Coords)
+        :type routes_coordinates: list
+        :return: list with the heights of each route, in the same order as the input coordinates
+        :rtype: list
+        """
+        # Heights of the current call by location, so they are available even if evicted from the cache
+        heights = {}
+        missing = []
+
+        routes_locations = [list(zip(*(values.tolist() for values in get_coordinates_arrays(route_coordinates))))
+                            for route_coordinates in routes_coordinates]
+
+        with self._lock:
+            for route_locations in routes_locations:
+                for location in route_locations:
+                    if location in heights:
+                        continue
+                    if location in self._cache:
+                        # Mark as most recently used
+                        self._cache.move_to_end(location)
+                        heights[location] = self._cache[location]
+                        self._hits += 1
+                    else:
+                        # Placeholder to request each location only once
+                        heights[location] = None
+                        missing.append(location)
+                        self._misses += 1
+
+        if missing:
+            # Request the chunks concurrently
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                chunks_heights = list(executor.map(self.request_heights, split_list(missing, self._max_locations)))
+
+            with self._lock:
+                for location, height in zip(missing, (height for chunk in chunks_heights for height in chunk)):
+                    heights[location] = self._cache[location] = height
+
+                # Evict the least recently used heights
+                while len(self._cache) > self._max_entries:
+                    self._cache.popitem(last=False)
+
+        # Map the heights back to each route
+        return [[heights[location] for location in route_locations] for route_locations in routes_locations]
+
+    def get_heights(self, route_coordinates: list) -> list:
+        """
+        Get the heights of the route coordinates, None for those without information
+
+        :param route_coordinates: input route coordinates
+        :type route_coordinates: list
+        :return: list with associated heights
+        :rtype: list
+        """
+        return self.get_routes_heights([route_coordinates])[0]
+
+    def close(self) -> None:
+        """
+        Close the pooled session
+
+        :return: None
+        """
+        self._session.close()
+
+    @property
+    def signature(self) -> str:
+        """
+        Getter of the provider signature: its name and the dataset URL
+
+        :return: provider signature
+        """
+        return f'{type(self).__name__}:{self._url}'
+
+    @property
+    def hits(self):
+        """
+        Getter of hits counter
+
+        :return: number of hits
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        Getter of misses counter
+
+        :return: number of misses
+        """
+        return self._misses
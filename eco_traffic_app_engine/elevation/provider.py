@@ -0,0 +1,55 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from eco_traffic_app_engine.graph.models import RouteArrays, get_coordinates_arrays
+
+
+class ElevationProvider(ABC):
+    """
+    Base class of the elevation providers used on the routes processing
+    """
+
+    @abstractmethod
+    def get_heights(self, route_coordinates: list) -> list:
+        """
+        Get the heights of the route coordinates, None for those without information
+
+        :param route_coordinates: input route coordinates
+        :type route_coordinates: list
+        :return: list with associated heights
+        :rtype: list
+        """
+
+    def get_routes_heights(self, routes_coordinates: list) -> list:
+        """
+        Get the heights of several routes at once, requesting the coordinates shared by several routes only once (in
+        the order they are first found)
+
+        :param routes_coordinates: list with the coordinates of each route (RouteArrays or list of Coords)
+        :type routes_coordinates: list
+        :return: list with the heights of each route, in the same order as the input coordinates
+        :rtype: list
+        """
+        # Position of each unique location and the positions of each route
+        locations, routes_locations = {}, []
+        for route_coordinates in routes_coordinates:
+            lats, lons = get_coordinates_arrays(route_coordinates)
+            routes_locations.append([locations.setdefault(location, len(locations))
+                                     for location in zip(lats.tolist(), lons.tolist())])
+
+        unique_locations = np.array(list(locations), dtype=np.float64).reshape(-1, 2)
+        heights = self.get_heights(RouteArrays(unique_locations[:, 0], unique_locations[:, 1]))
+
+        # Map the heights back to each route
+        return [[heights[location] for location in route_locations] for route_locations in routes_locations]
+
+    @property
+    def signature(self) -> str:
+        """
+        Getter of the provider signature, which identifies the provider and its data source (e.g. on the routes cache
+        keys)
+
+        :return: provider signature
+        """
+        return type(self).__name__
@@ -0,0 +1,131 @@
+import math
+import os
+
+import numpy as np
+
+from eco_traffic_app_engine.elevation.provider import ElevationProvider
+from eco_traffic_app_engine.graph.models import get_coordinates_arrays
+from eco_traffic_app_engine.static.constants import SRTM_DIRECTORY, SRTM_VOID_VALUE
+
+
+class SRTMElevationProvider(ElevationProvider):
+    """
+    Elevation provider reading local SRTM tiles (.hgt files) through memory maps. Each tile covers 1x1 degrees,
+    is named after its south-west corner (e.g. N43W006.hgt) and stores a square grid of big-endian int16 heights
+    (1201x1201 for SRTM3 or 3601x3601 for SRTM1), from north to south and west to east.
+
+    :param directory: directory where the tiles are stored
+    :type directory: str
+    """
+
+    def __init__(self, directory: str = SRTM_DIRECTORY):
+        self._directory = directory
+        # Memory mapped tiles by its south-west corner, None if the tile does not exist
+        self._tiles = {}
+
+    @staticmethod
+    def get_tile_name(lat: int, lon: int) -> str:
+        """
+        Get the tile file name based on its south-west corner
+
+        :param lat: latitude of the south-west corner
+        :type lat: int
+        :param lon: longitude of the south-west corner
+        :type lon: int
+        :return: tile file name
+        :rtype: str
+        """
+        return f'{"N" if lat >= 0 else "S"}{abs(lat):02d}{"E" if lon >= 0 else "W"}{abs(lon):03d}.hgt'
+
+    def get_tile(self, lat: int, lon: int):
+        """
+        Get the memory mapped tile based on its south-west corner
+
+        :param lat: latitude of the south-west corner
+        :type lat: int
+        :param lon: longitude of the south-west corner
+        :type lon: int
+        :return: tile heights array or None if the tile does not exist
+        """
+        if (lat, lon) not in self._tiles:
+            file_path = os.path.join(self._directory, self.get_tile_name(lat, lon))
+            tile = None
+            if os.path.isfile(file_path):
+                # Tiles are square grids of 2 bytes values
+                size = math.isqrt(os.path.getsize(file_path) // 2)
+                tile = np.memmap(file_path, dtype='>i2', mode='r', shape=(size, size))
+            self._tiles[(lat, lon)] = tile
+
+        return self._tiles[(lat, lon)]
+
+    def get_heights_array(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """
+        Get the heights of the coordinates with a bilinear interpolation of the surrounding tile samples. Coordinates
+        without tile or next to void samples are set to NaN.
+
+        :param lats: latitudes
+        :type lats: np.ndarray
+        :param lons: longitudes
+        :type lons: np.ndarray
+        :return: heights array
+        :rtype: np.ndarray
+        """
+        lats, lons = np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)
+        heights = np.full(len(lats), np.nan)
+
+        # Group the coordinates by tile
+        tile_lats, tile_lons = np.floor(lats).astype(np.int64), np.floor(lons).astype(np.int64)
+        tiles, tile_indices = np.unique(np.stack((tile_lats, tile_lons), axis=1), axis=0, return_inverse=True)
+        tile_indices = tile_indices.reshape(-1)
+
+        for idx, (tile_lat, tile_lon) in enumerate(tiles.tolist()):
+            tile = self.get_tile(tile_lat, tile_lon)
+            if tile is None:
+                continue
+
+            mask = tile_indices == idx
+            size = tile.shape[0]
+
+            # Position of the coordinates on the grid (rows from north to south)
+            rows = (tile_lat + 1 - lats[mask]) * (size - 1)
+            cols = (lons[mask] - tile_lon) * (size - 1)
+            # Upper left sample, limited to keep the lower right sample inside the tile
+            row_0 = np.clip(np.floor(rows).astype(np.int64), 0, size - 2)
+            col_0 = np.clip(np.floor(cols).astype(np.int64), 0, size - 2)
+            row_fraction, col_fraction = rows - row_0, cols - col_0
+
+            # Retrieve the four surrounding samples
+            samples = [tile[row_0 + i, col_0 + j].astype(np.float64) for i in (0, 1) for j in (0, 1)]
+            samples = [np.where(sample == SRTM_VOID_VALUE, np.nan, sample) for sample in samples]
+
+            # Bilinear interpolation
+            top = samples[0] * (1 - col_fraction) + samples[1] * col_fraction
+            bottom = samples[2] * (1 - col_fraction) + samples[3] * col_fraction
+            heights[mask] = top * (1 - row_fraction) + bottom * row_fraction
+
+        return heights
+
+    def get_heights(self, route_coordinates: list) -> list:
+        """
+        Get the heights of the route coordinates, None for those without information
+
+        :param route_coordinates: input route coordinates
+        :type route_coordinates: list
+        :return: list with associated heights
+        :rtype: list
+        """
+        lats, lons = get_coordinates_arrays(route_coordinates)
+
+        heights = self.get_heights_array(lats, lons)
+
+        # Unknown heights are represented as None (as the Open Topo Data service)
+        return [None if math.isnan(height) else height for height in heights.tolist()]
+
+    @property
+    def signature(self) -> str:
+        """
+        Getter of the provider signature: its name and the tiles directory
+
+        :return: provider signature
+        """
+        return f'{type(self).__name__}:{os.path.abspath(self._directory)}'
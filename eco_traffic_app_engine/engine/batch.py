@@ -0,0 +1,104 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from eco_traffic_app_engine.static.constants import BATCH_MAX_WORKERS, BATCH_MAX_IN_FLIGHT
+
+# Router of each worker process, created once by the pool initializer
+_worker_router = None
+
+
+def _init_worker(router_factory) -> None:
+    """
+    Create the router of the worker process
+
+    :param router_factory: picklable callable that creates the router (e.g. functools.partial(OSRM, params=...))
+    :return: None
+    """
+    global _worker_router
+    _worker_router = router_factory()
+
+
+def _get_routes(coords: list) -> list:
+    """
+    Get and process the routes of an origin-destination pair with the worker router
+
+    :param coords: list of Coords of the pair (origin, destination and optional waypoints)
+    :type coords: list
+    :return: processed routes
+    :rtype: list
+    """
+    return _worker_router.get_routes(coords)
+
+
+def process_od_batch(router_factory, od_coordinates: list, max_workers: int = BATCH_MAX_WORKERS,
+                     max_in_flight: int = BATCH_MAX_IN_FLIGHT):
+    """
+    Get and process the routes of several origin-destination pairs on a process pool, with a bounded number of pairs
+    in flight. A failure on a pair does not abort the batch.
+
+    :param router_factory: picklable callable that creates the router used on each worker (OSRM, OpenRouteService or
+        GraphHopper, along with their process params)
+    :param od_coordinates: list with the coordinates (list of Coords) of each pair
+    :type od_coordinates: list
+    :param max_workers: number of worker processes
+    :type max_workers: int
+    :param max_in_flight: maximum number of pairs submitted and not completed
+    :type max_in_flight: int
+    :return: generator of (pair index, processed routes, error message) in completion order. Routes are None if the
+        pair failed, and error message is None otherwise.
+    """
+    pairs = iter(enumerate(od_coordinates))
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(router_factory,)) as executor:
+        in_flight = {}
+        while True:
+            # Submit new pairs until the in-flight limit is reached
+            for index, coords in pairs:
+                in_flight[executor.submit(_get_routes, coords)] = index
+                if len(in_flight) >= max_in_flight:
+                    break
+
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = in_flight.pop(future)
+                try:
+                    yield index, future.result(), None
+                except Exception as e:
+                    yield index, None, f'{type(e).__name__}: {e}'
+
+
+def load_od_batch(engine, router_factory, od_coordinates: list, max_workers: int = BATCH_MAX_WORKERS,
+                  max_in_flight: int = BATCH_MAX_IN_FLIGHT) -> dict:
+    """
+    Get and process the routes of several origin-destination pairs on a process pool, merging all of them into the
+    engine graph
+
+    :param engine: engine where the routes are stored
+    :type engine: EcoTrafficEngine
+    :param router_factory: picklable callable that creates the router used on each worker
+    :param od_coordinates: list with the coordinates (list of Coords) of each pair
+    :type od_coordinates: list
+    :param max_workers: number of worker processes
+    :type max_workers: int
+    :param max_in_flight: maximum number of pairs submitted and not completed
+    :type max_in_flight: int
+    :return: dictionary with the error message of each failed pair (by pair index)
+    :rtype: dict
+    """
+    failures = {}
+
+    for index, routes, error in process_od_batch(router_factory, od_coordinates, max_workers, max_in_flight):
+        if error is None:
+            try:
+                # Routes are merged on the main process, so there is a single graph
+                engine.add_routes(routes)
+            except Exception as e:
+                error = f'{type(e).__name__}: {e}'
+
+        if error is not None:
+            failures[index] = error
+
+    return failures
@@ -1,11 +1,22 @@
-from dataclasses import asdict
+import math
+import os
+from dataclasses import asdict, replace, fields
 
 import networkx as nx
+import numpy as np
 import pandas as pd
 from geopy.distance import geodesic as gd
 
 from eco_traffic_app_engine.graph.db.neo4j import GraphDB
-from eco_traffic_app_engine.graph.models import Node, Segment, Coords
+from eco_traffic_app_engine.graph.clustering import get_covering_center_nodes
+from eco_traffic_app_engine.graph.db.writer import GraphDBWriter
+from eco_traffic_app_engine.graph.costs import EdgeCosts, ROUTE_METRICS
+from eco_traffic_app_engine.graph.hierarchy import HierarchyTopology, ContractionHierarchy
+from eco_traffic_app_engine.graph.models import Node, Segment, Coords, Route
+from eco_traffic_app_engine.graph.search import astar_search, pareto_search
+from eco_traffic_app_engine.graph.snapshot import GraphSnapshot
+from eco_traffic_app_engine.graph.spatial_hash import SpatialHash
+from eco_traffic_app_engine.graph.storage import save_engine_state, load_engine_state
 from eco_traffic_app_engine.osm.info import OSMRetriever
 from eco_traffic_app_engine.static.constants import *
 from eco_traffic_app_engine.static.constants import CONGESTION_DICT
@@ -17,9 +28,13 @@ class EcoTrafficEngine:
     Engine of the EcoTraffic APP
     """
 
-    def __init__(self, routes: list):
+    def __init__(self, routes: list, snapping_tolerance: float = NODE_SNAPPING_TOLERANCE, write_behind: bool = False,
+                 state_dir: str = None, clear_database: bool = None, load_graph_db: bool = False):
         # Initialize graph db and memory graph as directed graph
         self._graph_db = GraphDB(ip_address=GRAPH_DB_URL, user=GRAPH_DB_USER, password=GRAPH_DB_PASSWORD)
+        if write_behind:
+            # The memory graph is updated synchronously and the graph db mutations on background
+            self._graph_db = GraphDBWriter(self._graph_db)
         self._graph = nx.DiGraph()
 
         # Initialize OSMRetriever
@@ -31,31 +46,63 @@ class EcoTrafficEngine:
         # Initialize routes
         self._routes = routes
 
-        # Create a dict with the coordinates and a related identifier
-        self._coordinates_ids = {}
+        # Create a spatial hash with the coordinates and a related identifier, merging those closer than the
+        # snapping tolerance (meters) into the same node
+        self._snapping_tolerance = snapping_tolerance
+        self._coordinates_ids = SpatialHash(snapping_tolerance)
 
         # Last identifier used
         self._last_id = 0
 
-        # Clean up the network database
-        self._graph_db.clear_database()
+        # Index of the OSM node identifiers and their related graph node identifier
+        self._osm_node_ids = {}
+
+        # Relations (source, target) created or updated since the last graph info extension, in order
+        self._dirty_edges = {}
+
+        # CSR snapshot of the memory graph and its edge costs used on the eco-routes queries, calculated when
+        # required after the graph is modified
+        self._snapshot = None
+        self._edge_costs = None
+        # Relations whose attributes were modified since the snapshot was created, updated on it when it is required
+        self._snapshot_edges = {}
+
+        # Contraction hierarchies topology and its customization by metric, customized again when the edge costs
+        # change and created again when the graph nodes or relations change
+        self._hierarchy_topology = None
+        self._hierarchies = {}
+
+        # State restored from a previous run, whose memory graph and coordinates identifiers are created from it when
+        # they are first required
+        self._state = None
+
+        # Restore the state of a previous run if it exists (warm start), or the graph stored on the graph db
+        restored = state_dir is not None and os.path.exists(state_dir)
+        if restored:
+            self.load_state(state_dir)
+        elif load_graph_db:
+            self.load_graph_db()
+            restored = True
+
+        # Clean up the network database if it is required, by default only when starting with an empty graph
+        if clear_database or (clear_database is None and not restored):
+            self._graph_db.clear_database()
 
     def get_coordinates_id(self, coords: Coords) -> str:
         """
-        Get coordinates id for the graph based on its latitude and longitude
+        Get coordinates id for the graph based on its latitude and longitude, the same for those coordinates within
+        the snapping tolerance
         :param coords:
         :return:
         """
-        coords_str = f'{coords.lat};{coords.lon}'  # ID = lat;lon
-
         # Retrieve the node id if exists, otherwise calculate it and store it
-        if coords_str in self._coordinates_ids:
-            coords_id = self._coordinates_ids[coords_str]
-        else:
-            self._coordinates_ids[coords_str] = coords_id = self._last_id
+        coords_id = self.coordinates_ids.get(coords.lat, coords.lon)
+        if coords_id is None:
+            coords_id = str(self._last_id)
+            self.coordinates_ids.add(coords.lat, coords.lon, coords_id)
             self._last_id += 1
 
-        return str(coords_id)
+        return coords_id
 
     def create_node(self, node_info: Node, graph_db: bool = True) -> None:
         """
@@ -68,9 +115,10 @@ class EcoTrafficEngine:
         :return: None
         """
         # Check if node exists
-        if node_info.node_id not in self._graph.nodes:
+        if node_info.node_id not in self.graph.nodes:
             # Add node
-            self._graph.add_node(node_info.node_id, lat=node_info.lat, lon=node_info.lon, height=node_info.height)
+            self.graph.add_node(node_info.node_id, lat=node_info.lat, lon=node_info.lon, height=node_info.height)
+            self._snapshot = None
 
             # Check if it is required to store in the graph database
             if graph_db:
@@ -90,98 +138,192 @@ class EcoTrafficEngine:
         :type graph_db: bool
         :return: None
         """
+        # Existing relations are only updated on the snapshot, new ones require creating it again
+        if self.graph.has_edge(source_id, destination_id):
+            self.update_snapshot_relations([(source_id, destination_id)])
+        else:
+            self._snapshot = None
+
         # Store relation
-        self._graph.add_edge(source_id, destination_id, slope=segment_info.slope, distance=segment_info.distance,
+        self.graph.add_edge(source_id, destination_id, slope=segment_info.slope, distance=segment_info.distance,
                              congestion=segment_info.congestion, max_speed=segment_info.max_speed, lanes=segment_info.lanes,
                              highway=segment_info.highway, name=segment_info.name, surface=segment_info.surface,
                              way_id=segment_info.way_id)
+        self._dirty_edges[(source_id, destination_id)] = None
         # Check if it is required to store in the graph database
         if graph_db:
             self._graph_db.create_update_relation({'from': source_id, 'to': destination_id},
                                                   segment_info=asdict(segment_info))
 
-    def process_routes(self):
+    def process_routes(self, batch_size: int = GRAPH_DB_BATCH_SIZE):
         """
         Process all the routes and store them into the graphs
 
+        :param batch_size: number of nodes and relations written per transaction in the graph database
+        :type batch_size: int
         :return:
         """
-        for route in self._routes:
+        self.store_routes(self._routes, batch_size)
 
-            # Retrieve segments
-            segments = route['segments']
+    def add_routes(self, routes: list, batch_size: int = GRAPH_DB_BATCH_SIZE):
+        """
+        Add new routes to the engine, processing and storing them into the graphs
 
-            # Iterate over pairs of coordinates creating only destination nodes
-            for idx, (source, destination) in enumerate(zip(segments, segments[1:])):
-                # Get only destination id
-                source_id = self.get_coordinates_id(source)
-                destination_id = self.get_coordinates_id(destination)
+        :param routes: processed routes
+        :type routes: list
+        :param batch_size: number of nodes and relations written per transaction in the graph database
+        :type batch_size: int
+        :return:
+        """
+        self._routes += routes
+        self.store_routes(routes, batch_size)
 
-                # Create the destination node info
-                source_node = Node(node_id=source_id, lat=source.lat, lon=source.lon, height=route['heights'][idx])
-                destination_node = Node(node_id=destination_id, lat=destination.lat, lon=destination.lon,
-                                        height=route['heights'][idx+1])
+    def store_routes(self, routes: list, batch_size: int = GRAPH_DB_BATCH_SIZE):
+        """
+        Store the routes into the memory graph and then write the new nodes and the stored relations into the graph
+        database in batches (bulk ingestion)
 
-                # Store the source and destination nodes
-                self.create_node(node_info=source_node)
-                self.create_node(node_info=destination_node)
+        :param routes: processed routes
+        :type routes: list
+        :param batch_size: number of nodes and relations written per transaction in the graph database
+        :type batch_size: int
+        :return:
+        """
+        num_nodes = len(self.graph)
 
-                # Create the segment info
+        # Store the routes in the memory graph, keeping the stored relations (once each one)
+        relations = {}
+        for route in routes:
+            relations.update(dict.fromkeys(self.process_route(route, graph_db=False)))
+
+        # New nodes are the last ones added to the memory graph
+        nodes = [{'node_id': node_id, **self.graph.nodes[node_id]} for node_id in list(self.graph)[num_nodes:]]
+        self._graph_db.create_nodes(nodes, batch_size)
+        # The relations are written with their last values
+        self._graph_db.create_update_relations([{'from': u, 'to': v, 'segment_info': dict(self.graph[u][v])}
+                                                for u, v in relations], batch_size)
+
+    def process_route(self, route: dict, graph_db: bool = True) -> list:
+        """
+        Process a route and store it into the graphs
+
+        :param route: processed route
+        :type route: dict
+        :param graph_db: flag for storing the nodes and relations into the graph database. Default True.
+        :type graph_db: bool
+        :return: list with the (source, destination) identifiers of the stored relations, without self-loops
+        :rtype: list
+        """
+        # Retrieve segments
+        segments = route['segments']
+
+        relations = []
+        # Iterate over pairs of coordinates creating only destination nodes
+        for idx, (source, destination) in enumerate(zip(segments, segments[1:])):
+            # Get only destination id
+            source_id = self.get_coordinates_id(source)
+            destination_id = self.get_coordinates_id(destination)
+
+            # Create the destination node info
+            source_node = Node(node_id=source_id, lat=source.lat, lon=source.lon, height=route['heights'][idx])
+            destination_node = Node(node_id=destination_id, lat=destination.lat, lon=destination.lon,
+                                    height=route['heights'][idx+1])
+
+            # Store the source and destination nodes
+            self.create_node(node_info=source_node, graph_db=graph_db)
+            self.create_node(node_info=destination_node, graph_db=graph_db)
+
+            # Skip the segments whose coordinates are snapped to the same node, as they are not relations
+            if source_id == destination_id:
+                continue
+
+            # Create the segment info, with the ways information if the route has it
+            if 'ways' in route:
+                segment_info = replace(route['ways'][idx], slope=route['slopes'][idx],
+                                       distance=route['distances'][idx], max_speed=route['max_speed'][idx],
+                                       congestion=None)
+            else:
                 segment_info = Segment(slope=route['slopes'][idx], distance=route['distances'][idx],
                                        max_speed=route['max_speed'][idx], congestion=None, lanes=0, highway="",
                                        name="", surface="", way_id="")
-                # Store the relation between them
-                self.create_relation(source_id, destination_id, segment_info)
+            # Store the relation between them
+            self.create_relation(source_id, destination_id, segment_info, graph_db=graph_db)
+            relations.append((source_id, destination_id))
+
+        return relations
+
+    def index_osm_nodes(self, osm_nodes: dict) -> None:
+        """
+        Index OSM nodes by their related graph node, the one with the same coordinates (within the snapping
+        tolerance)
+
+        :param osm_nodes: coordinates (Coords) of each OSM node identifier
+        :type osm_nodes: dict
+        :return: None
+        """
+        for osm_node_id, coords in osm_nodes.items():
+            node_id = self.coordinates_ids.get(coords.lat, coords.lon)
+            if node_id is not None:
+                # OSM identifiers are int on Overpass, stored as str as the graph node identifiers
+                self._osm_node_ids[str(osm_node_id)] = node_id
+
+    def get_osm_node_ids(self) -> dict:
+        """
+        Get the graph node identifier of each indexed OSM node identifier
+
+        :return: graph node identifier by OSM node identifier
+        :rtype: dict
+        """
+        return self._osm_node_ids
 
     def insert_congestion_graph(self, congestion_df: pd.DataFrame):
         """
-        Insert congestion info into the graph
+        Insert congestion info into the graph, joining the nodes congestion information with the graph relations
+        and storing all of them at once
 
         :param congestion_df: nodes congestion information
         :type congestion_df: pd.DataFrame
         :return: None
         """
-        # Iterate over the nodes congestion info
-        for index, row in congestion_df.iterrows():
-            # Get node id and congestion value
-            node_id = row['osm_nodes']
-            congestion = CONGESTION_DICT[row['congestion']]
-
-            # Get neighbors of the node
-            neighbors = list(self._graph.neighbors(node_id))
-            # Iterate over the neighbors
-            for neighbor in neighbors:
-                # Add congestion to segment relation between source and destination
-                self._graph[node_id][neighbor]['congestion'] = congestion
-                # In the graph db, update only the info related to the congestion
-                self._graph_db.create_update_relation({'from': node_id, 'to': neighbor}, {'congestion': congestion})
+        osm_node_ids = self.get_osm_node_ids()
+
+        # Congestion value of each OSM node
+        congestion = pd.DataFrame({'osm_nodes': congestion_df['osm_nodes'].astype(str).to_numpy(),
+                                   'congestion': congestion_df['congestion'].map(CONGESTION_DICT).to_numpy()})
+        # Graph node of each OSM node and relations (source and target) of the graph
+        nodes = pd.DataFrame({'osm_nodes': list(osm_node_ids), 'source': list(osm_node_ids.values())})
+        relations = pd.DataFrame(list(self.graph.edges), columns=['source', 'target'])
+
+        # Join the congestion values with the relations starting on each node. The last value of a relation is kept.
+        congestion = congestion.merge(nodes, on='osm_nodes').merge(relations, on='source')
+        congestion = congestion.drop_duplicates(subset=['source', 'target'], keep='last')
+
+        updates = [{'from': source, 'to': target, 'segment_info': {'congestion': value}}
+                   for source, target, value in zip(congestion['source'], congestion['target'],
+                                                    congestion['congestion'].astype(int).tolist())]
+
+        # Add congestion to segment relations between source and destination
+        for update in updates:
+            self.graph[update['from']][update['to']]['congestion'] = update['segment_info']['congestion']
+            self._dirty_edges[(update['from'], update['to'])] = None
+        self.update_snapshot_relations([(update['from'], update['to']) for update in updates])
+
+        # In the graph db, update only the info related to the congestion
+        self._graph_db.create_update_relations(updates)
 
     def get_congestion_area_center_nodes(self) -> list:
         """
-        Obtain those nodes that are at a given distance between them, to retrieve congestion info from "center" nodes
+        Obtain those nodes that are at a given distance between them, to retrieve congestion info from "center" nodes.
+        Every node of the graph is within the congestion distance of a center node.
 
         :return: list with the nodes' information
         :rtype: list
         """
-        all_nodes = prev_nodes = list(self._graph.nodes)
-
-        # Center nodes
-        congestion_nodes = []
-
-        # Filter those nodes that are relevant (based on area)
-        for node in all_nodes:
-
-            # Get those nodes that are not in the area
-            all_nodes = [item for item in all_nodes if item not in
-                         self._osm_retriever.filter_around(node, all_nodes, CONGESTION_DISTANCE)]
-            # Store the center node
-            if prev_nodes != all_nodes:
-                congestion_nodes.append(node)
+        node_ids = list(self.graph.nodes)
 
-            # Update the prev_nodes values
-            prev_nodes = all_nodes
-
-        return congestion_nodes
+        # Select the centers locally, based on the nodes' coordinates
+        return get_covering_center_nodes(node_ids, [self.graph.nodes[node]['lat'] for node in node_ids],
+                                         [self.graph.nodes[node]['lon'] for node in node_ids], CONGESTION_DISTANCE)
 
     def process_congestion_data(self) -> None:
         """
@@ -193,7 +335,7 @@ class EcoTrafficEngine:
         congestion_center_nodes = self.get_congestion_area_center_nodes()
 
         # Get from nodes the latitude and longitude of each node represented as str split by comma
-        congestion_center_nodes_str = ';'.join(f'{self._graph.nodes[i]["lat"]},{self._graph.nodes[i]["lon"]}'
+        congestion_center_nodes_str = ';'.join(f'{self.graph.nodes[i]["lat"]},{self.graph.nodes[i]["lon"]}'
                                                for i in congestion_center_nodes)
 
         # Request congestion data
@@ -202,8 +344,11 @@ class EcoTrafficEngine:
         # Process congestion data
         self._traffic_congestion_retriever.process_congestion_data()
 
+        # Index the OSM nodes retrieved by the graph node with the same coordinates
+        self.index_osm_nodes(self._traffic_congestion_retriever.osm_nodes)
+
         # Check those node that are in the routes
-        self._traffic_congestion_retriever.process_route_nodes_with_congestion(self._graph.nodes)
+        self._traffic_congestion_retriever.process_route_nodes_with_congestion(list(self.get_osm_node_ids()))
 
         # Insert data into graph
         self.insert_congestion_graph(self._traffic_congestion_retriever.congestion_data)
@@ -211,169 +356,441 @@ class EcoTrafficEngine:
     def extend_graph_info(self, graph_db: bool = True):
         """
         Extend graph information related to ways such as congestion, maxspeed, lanes, type of highway, name or surface
-        if not set previously.
+        if not set previously. The relations are processed by chains (paths without branches), and only the chains of
+        the relations created or updated since the last call. Only the modified relations are stored.
 
         :param graph_db: flag for storing the relation into the graph database. Default True.
         :type graph_db: bool
         :return:
         """
-        # Define previous node info
-        previous_relation = {}
+        # Get the chains of the dirty relations, once each one and in the order they were modified
+        chains, chained_edges = [], set()
+        for edge in self._dirty_edges:
+            if edge not in chained_edges and self.graph.has_edge(*edge):
+                chain = self.get_relation_chain(*edge)
+                chained_edges.update(chain)
+                chains.append(chain)
+        self._dirty_edges = {}
+
+        updates = []
+        for chain in chains:
+            relations = [self.graph[u][v] for u, v in chain]
+            # Keep the previous values to find the modified ones
+            previous_values = [dict(relation) for relation in relations]
+
+            self.extend_chain_info(chain, relations)
+            self.extend_chain_congestion(chain, relations)
+
+            for (u, v), relation, values in zip(chain, relations, previous_values):
+                modified = {key: value for key, value in relation.items() if values[key] != value}
+                if modified:
+                    updates.append({'from': u, 'to': v, 'segment_info': modified})
+
+        self.update_snapshot_relations([(update['from'], update['to']) for update in updates])
 
-        # First check if first node have information, otherwise search for it on its successors
-        self.extend_initial_empty_nodes(graph_db)
+        if graph_db:
+            # Update database information of the modified relations
+            self._graph_db.create_update_relations(updates)
 
-        # Iterate over the graph by source-destination pair
-        for u, v in self._graph.edges:
-            # Extend relation info
-            relation = self.extend_relation_info(u, v, previous_relation)
+    def get_relation_chain(self, source, target) -> list:
+        """
+        Get the chain of relations (path whose inner nodes have a single predecessor and successor) of a relation
 
-            # Extend the congestion and store the relation
-            previous_relation = self.extend_congestion_data(u, v, relation)
+        :param source: source node
+        :param target: target node
+        :return: list with the (source, target) relations of the chain, in order
+        :rtype: list
+        """
+        def is_inner(node):
+            return self.graph.in_degree(node) == 1 and self.graph.out_degree(node) == 1
+
+        # Search the first relation of the chain backwards, stopping on cycles
+        head, head_target = source, target
+        while is_inner(head):
+            predecessor = next(iter(self.graph.predecessors(head)))
+            if predecessor == source:
+                break
+            head, head_target = predecessor, head
+
+        # Follow the chain from its first relation
+        chain = [(head, head_target)]
+        while is_inner(chain[-1][1]) and chain[-1][1] != head:
+            node = chain[-1][1]
+            chain.append((node, next(iter(self.graph.successors(node)))))
+
+        return chain
+
+    def extend_chain_info(self, chain: list, relations: list):
+        """
+        Extend the ways information (maximum speed, lanes, highway, name and surface) with default values of a chain
+        of relations from the previous relation (forward), starting from the first predecessor relation of the chain.
+        The first relations of a chain without predecessors are extended from the first relation with values
+        (backward).
+
+        :param chain: list with the (source, target) relations of the chain
+        :type chain: list
+        :param relations: information of each relation of the chain
+        :type relations: list
+        :return:
+        """
+        predecessors = list(self.graph.predecessors(chain[0][0]))
+        previous_relation = self.graph[predecessors[0]][chain[0][0]] if predecessors else None
 
-            # Update relation data
-            self._graph.add_edge(u, v, **relation)
+        for key, default_value in DEFAULT_WAYS_VALUES.items():
+            # Distance and slope are measured on each relation, congestion is extended afterwards
+            if key in ('distance', 'slope', 'congestion'):
+                continue
 
-            if graph_db:
-                # Update database information
-                self._graph_db.create_update_relation(relation={'from': u, 'to': v}, segment_info=relation)
+            values = [relation[key] for relation in relations]
+            if previous_relation is not None:
+                last_value = previous_relation[key]
+            else:
+                # First value different from default, if any
+                last_value = next((value for value in values if value != default_value), default_value)
 
-    def extend_initial_empty_nodes(self, graph_db: bool = True):
-        """
-        Iterate over the first node to check if it has information, if do not, search for it on its successors
+            for relation, value in zip(relations, values):
+                if value == default_value:
+                    relation[key] = last_value
+                last_value = relation[key]
 
-        :param graph_db: flag for storing the relation into the graph database. Default True.
-        :type graph_db: bool
+    def extend_chain_congestion(self, chain: list, relations: list):
+        """
+        Extend traffic congestion info of a chain of relations based on the adjacent congestion info. Relations without
+        congestion get the mean of the predecessor and successor congestion, or the one available (forward), and the
+        first relations without predecessor congestion get the next one (backward).
+
+        :param chain: list with the (source, target) relations of the chain
+        :type chain: list
+        :param relations: information of each relation of the chain
+        :type relations: list
         :return:
         """
-        last_relation = {}
-        passed_nodes = []
-        # Iterate over the graph by source-destination pair
-        for u, v in self._graph.edges:
-            # Append the source node
-            passed_nodes.append(u)
-            # Retrieve relation information
-            relation = self._graph.get_edge_data(u, v)
-            # Check non-default values of the relation
-            default_keys = [k for k, v in relation.items() if k in DEFAULT_WAYS_VALUES and
-                            v == DEFAULT_WAYS_VALUES[k]]
-            # Check default keys -> If there are the ones specified it means it is unchanged
-            while default_keys == ['slope', 'maxspeed', 'lanes', 'highway', 'name', 'surface']:
-                # Retrieve new successor
-                successors = list(self._graph.successors(v))
-                # There are successors
-                if successors:
-                    # Get new relation value
-                    relation = self._graph.get_edge_data(v, successors[0])
-                    # Check non-default values of the relation
-                    default_keys = [k for k, v in relation.items() if k in DEFAULT_WAYS_VALUES and
-                                    v == DEFAULT_WAYS_VALUES[k]]
-                # Append target to passed nodes
-                passed_nodes.append(v)
-                # Update last_relation variable
-                last_relation = relation
-                # Update target to its successor
-                v = successors[0]
-            # Once a node with non-default values is achieved, stop searching
-            break
-
-        # Iterate over the passed nodes
-        for u, v in zip(passed_nodes[:-1], passed_nodes[1:]):
-            relation = self._graph.get_edge_data(u, v)
-            # Get those attributes that are empty or with default values and update from previous
-            for key, value in relation.items():
-                # Way ID, distance, congestion and slope are not copied
-                if key != 'way_id' and key != 'congestion' and key != 'distance' and key != 'slope':
-                    relation[key] = last_relation[key]
-                else:
-                    # Remain the same value as previous
-                    relation[key] = value
-
-            # Update relation data
-            self._graph.add_edge(u, v, **relation)
+        predecessors = list(self.graph.predecessors(chain[0][0]))
+        successors = list(self.graph.successors(chain[-1][1]))
+
+        # Congestion before and after the chain
+        previous_congestion = self.graph[predecessors[0]][chain[0][0]].get('congestion') if predecessors else None
+        next_congestions = [relation['congestion'] for relation in relations[1:]] + \
+            [self.graph[chain[-1][1]][successors[0]].get('congestion') if successors else None]
+
+        # Forward pass with the predecessor (already extended) and successor congestion
+        for relation, next_congestion in zip(relations, next_congestions):
+            if relation['congestion'] is None:
+                if previous_congestion is not None and next_congestion is not None:
+                    # Calculate the mean by now
+                    relation['congestion'] = (previous_congestion + next_congestion) // 2  # Floor
+                elif previous_congestion is not None:
+                    relation['congestion'] = previous_congestion
+                elif next_congestion is not None:
+                    relation['congestion'] = next_congestion
+            previous_congestion = relation['congestion']
+
+        # Backward pass for the first relations
+        next_congestion = None
+        for relation in reversed(relations):
+            if relation['congestion'] is None:
+                relation['congestion'] = next_congestion
+            next_congestion = relation['congestion']
+
+    def update_snapshot_relations(self, relations: list) -> None:
+        """
+        Mark relations whose attributes were modified, so they are updated on the snapshot instead of creating it
+        again
 
-            if graph_db:
-                # Update database information
-                self._graph_db.create_update_relation(relation={'from': u, 'to': v}, segment_info=relation)
+        :param relations: list with the (source, target) modified relations
+        :type relations: list
+        :return: None
+        """
+        if self._snapshot is not None:
+            self._snapshot_edges.update(dict.fromkeys(relations))
 
-    def extend_relation_info(self, source, target, previous_relation: dict) -> dict:
+    def get_snapshot(self) -> GraphSnapshot:
         """
-        Extend relation information based on the previous relation
+        Get the immutable CSR snapshot of the memory graph. It is created again if the graph nodes or relations have
+        been added, while the modified relations attributes (and their edge costs) are updated on a copy of the
+        previous one.
 
-        :param source: source node
-        :param target: target node
-        :param previous_relation: previous relation information
-        :type previous_relation: dict
-        :return: updated relation information
-        :rtype: dict
+        :return: graph snapshot
+        :rtype: GraphSnapshot
+        """
+        if self._snapshot is None:
+            self._snapshot = GraphSnapshot.from_graph(self.graph)
+        elif self._snapshot_edges:
+            previous_snapshot, node_index = self._snapshot, self._snapshot.node_index
+            edges = np.array([previous_snapshot.get_edge(node_index[u], node_index[v])
+                              for u, v in self._snapshot_edges], dtype=np.int64)
+            self._snapshot = previous_snapshot.update_relations(edges, [self.graph[u][v]
+                                                                        for u, v in self._snapshot_edges])
+            if self._edge_costs is not None and self._edge_costs.snapshot is previous_snapshot:
+                self._edge_costs = self._edge_costs.update(self._snapshot, edges)
+        self._snapshot_edges = {}
+
+        return self._snapshot
+
+    def get_edge_costs(self) -> EdgeCosts:
         """
-        # Retrieve relation information
-        relation = self._graph.get_edge_data(source, target)
+        Get the costs of the graph edges for each metric, calculating them if the graph has been modified
 
-        # Get those attributes that are empty or with default values and update from previous
-        for key, value in relation.items():
-            # Way ID not processed and congestion will be processed afterwards
-            if key != 'way_id' and key != 'congestion':
-                if value == DEFAULT_WAYS_VALUES[key]:
-                    if key in previous_relation:
-                        relation[key] = previous_relation[key]
-            else:
-                # Remain the same the way id
-                relation[key] = value
+        :return: edge costs
+        :rtype: EdgeCosts
+        """
+        snapshot = self.get_snapshot()
+        if self._edge_costs is None or self._edge_costs.snapshot is not snapshot:
+            self._edge_costs = EdgeCosts(snapshot)
 
-        return relation
+        return self._edge_costs
 
-    def extend_congestion_data(self, source, target, relation: dict) -> dict:
+    def get_hierarchy(self, metric: str = 'fuel') -> ContractionHierarchy:
         """
-        Extend traffic congestion info based on the adjacent congestion info
+        Get the contraction hierarchies of the graph for a metric. The hierarchies topology is only created again if
+        the graph nodes or relations have changed, otherwise its weights are customized with the current edge costs
+        (e.g. after inserting new congestion data).
+
+        :param metric: edge metric: "distance", "time" or "fuel". Default "fuel".
+        :type metric: str
+        :return: contraction hierarchies customized for the metric
+        :rtype: ContractionHierarchy
+        """
+        if metric not in ROUTE_METRICS:
+            raise ValueError(f'Unknown route metric "{metric}", expected one of {ROUTE_METRICS}')
 
-        :param source: source node
-        :param target: destination node
-        :param relation: information related to the connection
-        :type relation: dict
-        :return: updated relation dict with new congestion info
-        :rtype: dict
+        edge_costs = self.get_edge_costs()
+        if self._hierarchy_topology is None or not self._hierarchy_topology.matches(edge_costs.snapshot):
+            self._hierarchy_topology = HierarchyTopology(edge_costs.snapshot)
+            self._hierarchies = {}
+
+        hierarchy = self._hierarchies.get(metric)
+        if hierarchy is None:
+            hierarchy = self._hierarchies[metric] = ContractionHierarchy(self._hierarchy_topology,
+                                                                         edge_costs.costs[metric])
+        elif hierarchy.weights is not edge_costs.costs[metric]:
+            hierarchy.customize(edge_costs.costs[metric])
+
+        return hierarchy
+
+    def get_node_id(self, node) -> str:
+        """
+        Get the graph node identifier of a node given by its identifier or its coordinates
+
+        :param node: node identifier or coordinates (Coords)
+        :return: node identifier, None if there is no node with the coordinates
+        :rtype: str
+        """
+        if isinstance(node, Coords):
+            return self.coordinates_ids.get(node.lat, node.lon)
+
+        return node
+
+    def get_eco_route(self, source, target, metric: str = 'fuel', hierarchy: bool = False) -> Route:
+        """
+        Get the best route between two nodes for a metric, with an A* search whose heuristic is the great-circle
+        distance to the target by the lowest cost per meter of the graph, or with the contraction hierarchies of the
+        metric
+
+        :param source: source node identifier or coordinates (Coords)
+        :param target: target node identifier or coordinates (Coords)
+        :param metric: metric to minimize: "distance", "time" or "fuel". Default "fuel".
+        :type metric: str
+        :param hierarchy: True to search on the contraction hierarchies, which are created on the first query and
+            faster for the following ones. Default False.
+        :type hierarchy: bool
+        :return: route with its total distance, estimated travel time and estimated fuel consumption, None if there
+            is no route between the nodes
+        :rtype: Route
+        """
+        if metric not in ROUTE_METRICS:
+            raise ValueError(f'Unknown route metric "{metric}", expected one of {ROUTE_METRICS}')
+
+        edge_costs = self.get_edge_costs()
+        node_index = edge_costs.snapshot.node_index
+        source, target = self.get_node_id(source), self.get_node_id(target)
+        if source not in node_index or target not in node_index:
+            return None
+        source, target = node_index[source], node_index[target]
+
+        if hierarchy:
+            result = self.get_hierarchy(metric).query(source, target)
+        else:
+            result = astar_search(edge_costs.indptr, edge_costs.indices, edge_costs.get_weights(metric), source,
+                                  target, edge_costs.get_heuristic(metric, target))
+
+        return self.get_route(edge_costs, source, result[1]) if result is not None else None
+
+    def get_pareto_routes(self, source, target, epsilon: float = 0.0) -> list:
+        """
+        Get the Pareto front of the routes between two nodes on distance, travel time and fuel consumption: the routes
+        not improved on all of them by another route. The A* lower bounds of each metric prune the search.
+
+        :param source: source node identifier or coordinates (Coords)
+        :param target: target node identifier or coordinates (Coords)
+        :param epsilon: relative relaxation of the dominance, which bounds the number of routes and the search time
+            in exchange for an approximated front. Default 0 (exact front).
+        :type epsilon: float
+        :return: routes of the front sorted by distance, empty if there is no route between the nodes
+        :rtype: list
+        """
+        edge_costs = self.get_edge_costs()
+        node_index = edge_costs.snapshot.node_index
+        source, target = self.get_node_id(source), self.get_node_id(target)
+        if source not in node_index or target not in node_index:
+            return []
+        source, target = node_index[source], node_index[target]
+
+        front = pareto_search(edge_costs.indptr, edge_costs.indices, edge_costs.get_cost_vectors(ROUTE_METRICS),
+                              source, target, epsilon,
+                              [edge_costs.get_heuristic(metric, target) for metric in ROUTE_METRICS])
+
+        return [self.get_route(edge_costs, source, path) for _, path in front]
+
+    def get_route(self, edge_costs: EdgeCosts, source: int, path: list) -> Route:
+        """
+        Get the route of a path of edges
+
+        :param edge_costs: edge costs of the graph
+        :type edge_costs: EdgeCosts
+        :param source: source node position
+        :type source: int
+        :param path: positions of the path edges
+        :type path: list
+        :return: route with its total distance, estimated travel time and estimated fuel consumption
+        :rtype: Route
         """
-        # Retrieve the predecessor and successor information
-        predecessors, successors = list(self._graph.predecessors(source)), list(self._graph.successors(target))
-
-        predecessor_congestion = successor_congestion = None
-        # It exists a predecessor
-        if predecessors:
-            # Retrieve congestion info
-            predecessor_congestion = self._graph.get_edge_data(predecessors[0], source).get('congestion', None)
-
-        # It exists a successor
-        if successors:
-            # Retrieve relation information
-            successor_congestion = self._graph.get_edge_data(target, successors[0]).get('congestion', None)
-
-        # Both predecessor and successor
-        if predecessor_congestion is not None and relation['congestion'] is None \
-                and successor_congestion is not None:
-            # print("Both predecessor and successor")
-            # Calculate the mean by now
-            relation['congestion'] = (predecessor_congestion + successor_congestion) // 2  # Floor
-        # Only predecessor congestion information
-        elif predecessor_congestion is not None and relation['congestion'] is None \
-                and successor_congestion is None:
-            # print("Only predecessor congestion information")
-            relation['congestion'] = predecessor_congestion
-        # Only successor congestion information
-        elif predecessor_congestion is None and relation['congestion'] is None \
-                and successor_congestion:
-            # print("Only successor congestion information")
-            relation['congestion'] = successor_congestion
-        return relation
+        # Nodes of the path, from the source to the target of the last edge
+        node_ids = edge_costs.snapshot.node_ids
+        positions = [source] + [edge_costs.indices[edge] for edge in path]
+        nodes = [node_ids[position] for position in positions]
+
+        if self._graph is None:
+            # The memory graph is not created yet, the information is read from the restored state
+            route_nodes = [Node(node_id=node_ids[position], **self._state.get_node(position))
+                           for position in positions]
+            route_segments = [Segment(**self._state.get_relation(edge)) for edge in path]
+        else:
+            route_nodes = [Node(node_id=node_id, **self._graph.nodes[node_id]) for node_id in nodes]
+            route_segments = [Segment(**self._graph[u][v]) for u, v in zip(nodes, nodes[1:])]
+
+        return Route(total_distance=float(edge_costs.costs['distance'][path].sum()),
+                     ett=float(edge_costs.costs['time'][path].sum()),
+                     efc=float(edge_costs.costs['fuel'][path].sum()),
+                     nodes=route_nodes, segments=route_segments)
+
+    def save_state(self, directory: str = ENGINE_STATE_DIR) -> None:
+        """
+        Save the memory graph, the coordinates identifiers, the last identifier used and the OSM node identifiers index,
+        so a later run can start from them instead of processing the routes again
+
+        :param directory: state folder. Default ENGINE_STATE_DIR.
+        :type directory: str
+        :return: None
+        """
+        save_engine_state(directory, self.graph, self.coordinates_ids, self._last_id, self._osm_node_ids,
+                          self._dirty_edges)
+
+    def load_state(self, directory: str = ENGINE_STATE_DIR) -> None:
+        """
+        Load the memory graph, the coordinates identifiers, the last identifier used and the OSM node identifiers
+        index saved by a previous run. The state arrays are memory-mapped and the queries are served from them, while
+        the memory graph and the coordinates identifiers are only created when they are first required (e.g. when
+        new routes are added). The graph database is not modified. The state must have been saved with the same
+        snapping tolerance as the engine one, as its nodes were merged with that tolerance.
+
+        :param directory: state folder. Default ENGINE_STATE_DIR.
+        :type directory: str
+        :return: None
+        """
+        state = load_engine_state(directory)
+
+        if not math.isclose(state.tolerance, self._snapping_tolerance):
+            raise ValueError(f'Engine state snapping tolerance {state.tolerance} differs from the engine snapping '
+                             f'tolerance {self._snapping_tolerance}')
+
+        self._state = state
+        self._graph = None
+        self._coordinates_ids = None
+        self._last_id = state.last_id
+        self._osm_node_ids = state.osm_node_ids
+        self._dirty_edges = state.dirty_edges
+
+        # The snapshot is served from the state arrays, the rest of derived structures are calculated again
+        self._snapshot = state.get_snapshot()
+        self._snapshot_edges = {}
+        self._edge_costs = None
+        self._hierarchy_topology = None
+        self._hierarchies = {}
+
+    def load_graph_db(self, page_size: int = GRAPH_DB_PAGE_SIZE) -> None:
+        """
+        Load the nodes and relations stored on the graph db into the memory graph and the coordinates identifiers,
+        reading them by pages so only a page is held in memory along with the graph. The graph db is not modified.
+
+        :param page_size: number of nodes per query
+        :type page_size: int
+        :return: None
+        """
+        for node in self._graph_db.read_nodes(page_size):
+            node_id = str(node['node_id'])
+            self.graph.add_node(node_id, lat=node['lat'], lon=node['lon'], height=node['height'])
+            if self.coordinates_ids.get(node['lat'], node['lon']) is None:
+                self.coordinates_ids.add(node['lat'], node['lon'], node_id)
+            # New nodes get identifiers after the stored ones
+            self._last_id = max(self._last_id, node['node_id'] + 1)
+
+        segment_keys = {field.name for field in fields(Segment)}
+        for relation in self._graph_db.read_relations(page_size):
+            segment_info = {key: value for key, value in relation['segment_info'].items() if key in segment_keys}
+            # Congestion is stored as string on the graph db
+            if segment_info.get('congestion') is not None:
+                segment_info['congestion'] = int(segment_info['congestion'])
+            self.graph.add_edge(str(relation['from']), str(relation['to']), **asdict(Segment(**segment_info)))
+
+        # Derived structures are calculated again from the loaded graph
+        self._snapshot = None
+        self._snapshot_edges = {}
+        self._edge_costs = None
+        self._hierarchy_topology = None
+        self._hierarchies = {}
+
+    def flush(self):
+        """
+        Wait until all the graph db mutations are stored
+
+        :return: None
+        """
+        self._graph_db.flush()
 
     def stop_engine(self):
         """
-        Stop engine connections
+        Stop engine connections, once all the graph db mutations are stored
 
         :return: None
         """
         self._graph_db.close()
 
+    @property
+    def graph(self):
+        """
+        Getter of the memory graph, created from the restored state when it is first required
+
+        :return: memory graph
+        """
+        if self._graph is None:
+            self._graph = self._state.get_graph()
+
+        return self._graph
+
+    @property
+    def coordinates_ids(self):
+        """
+        Getter of the spatial hash of the coordinates identifiers, created from the restored state when it is first
+        required
+
+        :return: spatial hash with the identifier of the coordinates
+        """
+        if self._coordinates_ids is None:
+            self._coordinates_ids = self._state.get_coordinates_ids()
+
+        return self._coordinates_ids
+
     @property
     def routes(self):
         """
@@ -0,0 +1,87 @@
+import math
+
+from eco_traffic_app_engine.static.constants import METERS_PER_DEGREE
+
+# Mean Earth radius in meters, consistent with the approximated meters per degree
+EARTH_RADIUS = METERS_PER_DEGREE * 180 / math.pi
+
+
+def calculate_great_circle_distance(lat_1: float, lon_1: float, lat_2: float, lon_2: float) -> float:
+    """
+    Calculate the great-circle (haversine) distance in meters between two points
+
+    :param lat_1: latitude of the first point
+    :type lat_1: float
+    :param lon_1: longitude of the first point
+    :type lon_1: float
+    :param lat_2: latitude of the second point
+    :type lat_2: float
+    :param lon_2: longitude of the second point
+    :type lon_2: float
+    :return: distance in meters
+    :rtype: float
+    """
+    phi_1, phi_2 = math.radians(lat_1), math.radians(lat_2)
+    a = math.sin((phi_2 - phi_1) / 2) ** 2 + \
+        math.cos(phi_1) * math.cos(phi_2) * math.sin(math.radians(lon_2 - lon_1) / 2) ** 2
+
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def get_covering_center_nodes(node_ids: list, lats: list, lons: list, distance: float) -> list:
+    """
+    Select the center nodes covering all the nodes at a given distance, with a greedy pass over a grid of cells of the
+    distance size. The nodes are processed in order and a node is selected as center when there are nodes not covered
+    yet within the distance, covering all of them (the same selection as querying the nodes around each node).
+
+    Guarantees: every node is within the distance (great-circle) of at least one center, and each center covers at
+    least one node not covered by the previous ones. Each node is removed from the grid once, and the lookups only
+    check the nodes of the 3x3 neighbouring cells, so it takes linear expected time for graph densities where the
+    cells hold a bounded number of uncovered nodes.
+
+    :param node_ids: identifiers of the nodes
+    :type node_ids: list
+    :param lats: latitudes of the nodes
+    :type lats: list
+    :param lons: longitudes of the nodes
+    :type lons: list
+    :param distance: covering distance in meters
+    :type distance: float
+    :return: list with the identifiers of the center nodes
+    :rtype: list
+    """
+    if not node_ids:
+        return []
+
+    # Cell size in degrees. Longitude cells are sized at the highest latitude, so the nodes within the distance are
+    # always on the neighbouring cells
+    lat_cell_size = distance / METERS_PER_DEGREE
+    max_lat = min(max(abs(lat) for lat in lats) + lat_cell_size, 89.9)
+    lon_cell_size = lat_cell_size / math.cos(math.radians(max_lat))
+
+    # Uncovered nodes (positions) of each cell
+    cells = {}
+    nodes_cells = []
+    for position, (lat, lon) in enumerate(zip(lats, lons)):
+        cell = (math.floor(lat / lat_cell_size), math.floor(lon / lon_cell_size))
+        cells.setdefault(cell, set()).add(position)
+        nodes_cells.append(cell)
+
+    center_nodes = []
+    for position, (lat_cell, lon_cell) in enumerate(nodes_cells):
+        covered = []
+        for cell in ((lat_cell + i, lon_cell + j) for i in (-1, 0, 1) for j in (-1, 0, 1)):
+            for other in cells.get(cell, ()):
+                if calculate_great_circle_distance(lats[position], lons[position], lats[other],
+                                                   lons[other]) <= distance:
+                    covered.append((cell, other))
+
+        # The node is a center if it covers new nodes
+        if covered:
+            center_nodes.append(node_ids[position])
+            for cell, other in covered:
+                cells[cell].discard(other)
+                if not cells[cell]:
+                    del cells[cell]
+
+    return center_nodes
@@ -0,0 +1,161 @@
+import copy
+
+import numpy as np
+
+from eco_traffic_app_engine.graph.clustering import calculate_great_circle_distance
+from eco_traffic_app_engine.graph.snapshot import GraphSnapshot
+from eco_traffic_app_engine.static.constants import DEFAULT_WAYS_VALUES, CONGESTION_SPEED_FACTORS, \
+    CONGESTION_FUEL_FACTORS, FUEL_BASE_CONSUMPTION, FUEL_SLOPE_FACTOR, FUEL_MIN_FACTOR, ROUTE_HEURISTIC_FACTOR
+
+# Metrics of the eco-routes
+ROUTE_METRICS = ('distance', 'time', 'fuel')
+
+
+def calculate_edge_costs(distances: np.ndarray, slopes: np.ndarray, max_speeds: np.ndarray,
+                         congestions: np.ndarray) -> dict:
+    """
+    Calculate the costs of the edges for each metric: distance (meters), travel time (seconds) at the maximum speed
+    reduced by the congestion, and fuel consumption (liters) based on the slope and the congestion
+
+    :param distances: distances of the edges (meters)
+    :type distances: np.ndarray
+    :param slopes: slopes of the edges (percentage)
+    :type slopes: np.ndarray
+    :param max_speeds: maximum speeds of the edges (km/h), not positive or NaN if unknown
+    :type max_speeds: np.ndarray
+    :param congestions: congestion levels of the edges, negative if unknown
+    :type congestions: np.ndarray
+    :return: array of costs by metric
+    :rtype: dict
+    """
+    distances = np.nan_to_num(np.asarray(distances, dtype=np.float64))
+    slopes = np.nan_to_num(np.asarray(slopes, dtype=np.float64))
+    max_speeds = np.nan_to_num(np.asarray(max_speeds, dtype=np.float64))
+    # Unknown congestion as the lowest level
+    congestions = np.clip(np.asarray(congestions, dtype=np.int64), 0, len(CONGESTION_SPEED_FACTORS) - 1)
+
+    # Speeds (m/s) with the default maximum speed if it is unknown
+    speeds = np.where(max_speeds > 0, max_speeds, DEFAULT_WAYS_VALUES['max_speed']) / 3.6 * \
+        np.asarray(CONGESTION_SPEED_FACTORS)[congestions]
+
+    # Fuel consumption factor, greater on ascents and lower on descents
+    fuel_factors = np.maximum(1 + FUEL_SLOPE_FACTOR * slopes, FUEL_MIN_FACTOR) * \
+        np.asarray(CONGESTION_FUEL_FACTORS)[congestions]
+
+    return {'distance': distances,
+            'time': distances / speeds,
+            'fuel': distances / 1e5 * FUEL_BASE_CONSUMPTION * fuel_factors}
+
+
+def calculate_cost_rates(costs: dict) -> dict:
+    """
+    Calculate the minimum cost per meter of each metric, used as lower bound of the remaining cost
+
+    :param costs: array of costs by metric
+    :type costs: dict
+    :return: minimum cost per meter by metric
+    :rtype: dict
+    """
+    positive = costs['distance'] > 0
+
+    return {metric: float(np.min(values[positive] / costs['distance'][positive])) if positive.any() else 0.0
+            for metric, values in costs.items()}
+
+
+class EdgeCosts:
+    """
+    Precomputed cost arrays of the graph edges for each metric, over a CSR snapshot of the graph
+
+    :param snapshot: graph snapshot
+    :type snapshot: GraphSnapshot
+    """
+
+    def __init__(self, snapshot: GraphSnapshot):
+        self.snapshot = snapshot
+        self.costs = calculate_edge_costs(snapshot.columns['distance'], snapshot.columns['slope'],
+                                          snapshot.columns['max_speed'], snapshot.columns['congestion'])
+
+        # Minimum cost per meter of each metric, used as lower bound of the remaining cost
+        self.rates = calculate_cost_rates(self.costs)
+
+        # CSR arrays as lists, used on the searches
+        self.indptr, self.indices = snapshot.indptr.tolist(), snapshot.indices.tolist()
+
+        # Costs and coordinates as lists, used on the searches
+        self._weights = {}
+        self._coordinates = (snapshot.lats.tolist(), snapshot.lons.tolist())
+
+    def update(self, snapshot: GraphSnapshot, edges: np.ndarray):
+        """
+        Create the edge costs of a snapshot with the same nodes and relations, calculating only the costs of the
+        modified relations
+
+        :param snapshot: graph snapshot with modified relations attributes
+        :type snapshot: GraphSnapshot
+        :param edges: positions of the modified relations
+        :type edges: np.ndarray
+        :return: edge costs of the snapshot
+        :rtype: EdgeCosts
+        """
+        edge_costs = copy.copy(self)
+        edge_costs.snapshot = snapshot
+
+        costs = calculate_edge_costs(snapshot.columns['distance'][edges], snapshot.columns['slope'][edges],
+                                     snapshot.columns['max_speed'][edges], snapshot.columns['congestion'][edges])
+        edge_costs.costs = {metric: values.copy() for metric, values in self.costs.items()}
+        for metric, values in costs.items():
+            edge_costs.costs[metric][edges] = values
+        edge_costs.rates = calculate_cost_rates(edge_costs.costs)
+
+        # The CSR and coordinates lists are shared, the costs lists are created again when required
+        edge_costs._weights = {}
+
+        return edge_costs
+
+    def get_weights(self, metric: str) -> list:
+        """
+        Get the costs of the edges for a metric as a list
+
+        :param metric: route metric
+        :type metric: str
+        :return: cost of each edge
+        :rtype: list
+        """
+        if metric not in self._weights:
+            self._weights[metric] = self.costs[metric].tolist()
+
+        return self._weights[metric]
+
+    def get_cost_vectors(self, metrics: tuple = ROUTE_METRICS) -> list:
+        """
+        Get the costs of the edges for several metrics as a list of tuples
+
+        :param metrics: route metrics. Default all of them.
+        :type metrics: tuple
+        :return: cost vector of each edge
+        :rtype: list
+        """
+        if metrics not in self._weights:
+            self._weights[metrics] = list(zip(*(self.get_weights(metric) for metric in metrics)))
+
+        return self._weights[metrics]
+
+    def get_heuristic(self, metric: str, target: int):
+        """
+        Get the A* heuristic of a metric: the great-circle distance to the target by the lowest cost per meter, which
+        is a lower bound of the remaining cost
+
+        :param metric: route metric
+        :type metric: str
+        :param target: target node position
+        :type target: int
+        :return: function returning the lower bound of the cost from a node position to the target
+        """
+        rate = self.rates[metric] * ROUTE_HEURISTIC_FACTOR
+        lats, lons = self._coordinates
+        target_lat, target_lon = lats[target], lons[target]
+
+        def heuristic(node: int) -> float:
+            return rate * calculate_great_circle_distance(lats[node], lons[node], target_lat, target_lon)
+
+        return heuristic
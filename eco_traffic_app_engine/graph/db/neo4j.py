@@ -2,6 +2,42 @@ from neomodel import db, clear_neo4j_database, config
 from neomodel.contrib.spatial_properties import NeomodelPoint
 
 from eco_traffic_app_engine.graph.db.models import Node, Segment
+from eco_traffic_app_engine.others.utils import split_list
+from eco_traffic_app_engine.static.constants import GRAPH_DB_BATCH_SIZE, GRAPH_DB_PAGE_SIZE
+
+# Bulk ingestion statements, parameterised by a batch of nodes or relations
+CREATE_NODES_QUERY = '''
+UNWIND $nodes AS node
+MERGE (n:Node {node_id: node.node_id})
+ON CREATE SET n.geospatial_point = point({latitude: node.lat, longitude: node.lon, height: node.height,
+                                          crs: 'wgs-84-3d'})
+'''
+CREATE_UPDATE_RELATIONS_QUERY = '''
+UNWIND $relations AS relation
+MATCH (source:Node {node_id: relation.from}), (target:Node {node_id: relation.to})
+MERGE (source)-[segment:SEGMENT_TO]->(target)
+ON CREATE SET segment = relation.created
+ON MATCH SET segment += relation.updated
+'''
+
+# Paged reading statements, starting after the last node identifier of the previous page (uses the node_id index)
+READ_NODES_QUERY = '''
+MATCH (n:Node)
+WHERE n.node_id > $last_node_id
+RETURN n.node_id, n.geospatial_point.latitude, n.geospatial_point.longitude, n.geospatial_point.height
+ORDER BY n.node_id
+LIMIT $page_size
+'''
+READ_RELATIONS_QUERY = '''
+MATCH (source:Node)
+WHERE source.node_id > $last_node_id
+WITH source
+ORDER BY source.node_id
+LIMIT $page_size
+OPTIONAL MATCH (source)-[segment:SEGMENT_TO]->(target:Node)
+RETURN source.node_id, collect([target.node_id, properties(segment)])
+ORDER BY source.node_id
+'''
 
 
 class GraphDB:
@@ -32,6 +68,13 @@ class GraphDB:
         """
         self._db.driver.close()
 
+    def flush(self) -> None:
+        """
+        Wait until all the mutations are stored. Writes are synchronous, so there is nothing to wait for.
+
+        :return: None
+        """
+
     def clear_database(self) -> None:
         """
         Clear database information
@@ -106,3 +149,88 @@ class GraphDB:
 
         # Save the relation in the database
         relation.save()
+
+    # BULK METHODS
+    def create_nodes(self, nodes: list, batch_size: int = GRAPH_DB_BATCH_SIZE) -> None:
+        """
+        Create several nodes in the network, with a single statement and transaction per batch. Existing nodes are
+        not modified.
+
+        :param nodes: list with the nodes information
+        :type nodes: list
+        :param batch_size: number of nodes per batch
+        :type batch_size: int
+        :return: None
+        """
+        for batch in split_list(nodes, batch_size):
+            with self._db.transaction:
+                self._db.cypher_query(CREATE_NODES_QUERY, {'nodes': [{'node_id': int(node['node_id']),
+                                                                      'lat': node['lat'], 'lon': node['lon'],
+                                                                      'height': node['height']}
+                                                                     for node in batch]})
+
+    def create_update_relations(self, relations: list, batch_size: int = GRAPH_DB_BATCH_SIZE) -> None:
+        """
+        Create/Update several relationships in the network, with a single statement and transaction per batch. Same
+        values as "create_update_relation": new relations get the default values of the missing attributes and
+        existing ones only the given attributes.
+
+        :param relations: list with the relations information ("from", "to" and "segment_info")
+        :type relations: list
+        :param batch_size: number of relations per batch
+        :type batch_size: int
+        :return: None
+        """
+        for batch in split_list(relations, batch_size):
+            items = []
+            for relation in batch:
+                # Convert the values as the relation model does
+                created = Segment.deflate(relation['segment_info'])
+                items.append({'from': int(relation['from']), 'to': int(relation['to']), 'created': created,
+                              'updated': {k: v for k, v in created.items() if k in relation['segment_info']}})
+
+            with self._db.transaction:
+                self._db.cypher_query(CREATE_UPDATE_RELATIONS_QUERY, {'relations': items})
+
+    # READ METHODS
+    def read_nodes(self, page_size: int = GRAPH_DB_PAGE_SIZE):
+        """
+        Read all the nodes of the network by pages of nodes ordered by identifier, so only a page is held in memory
+
+        :param page_size: number of nodes per query
+        :type page_size: int
+        :return: generator of nodes information (node_id, lat, lon and height)
+        """
+        last_node_id = -1
+        while True:
+            results, _ = self._db.cypher_query(READ_NODES_QUERY, {'last_node_id': last_node_id,
+                                                                  'page_size': page_size})
+            for node_id, lat, lon, height in results:
+                yield {'node_id': node_id, 'lat': lat, 'lon': lon, 'height': height}
+
+            if len(results) < page_size:
+                break
+            last_node_id = results[-1][0]
+
+    def read_relations(self, page_size: int = GRAPH_DB_PAGE_SIZE):
+        """
+        Read all the relationships of the network by pages of source nodes ordered by identifier, so only the
+        relations of a page of nodes are held in memory
+
+        :param page_size: number of source nodes per query
+        :type page_size: int
+        :return: generator of relations information ("from", "to" and "segment_info" with the stored attributes)
+        """
+        last_node_id = -1
+        while True:
+            results, _ = self._db.cypher_query(READ_RELATIONS_QUERY, {'last_node_id': last_node_id,
+                                                                      'page_size': page_size})
+            for source, targets in results:
+                # Nodes without relations have a single empty target
+                for target, segment_info in targets:
+                    if target is not None:
+                        yield {'from': source, 'to': target, 'segment_info': segment_info}
+
+            if len(results) < page_size:
+                break
+            last_node_id = results[-1][0]
@@ -0,0 +1,246 @@
+import queue
+import threading
+
+from eco_traffic_app_engine.graph.db.neo4j import GraphDB
+from eco_traffic_app_engine.static.constants import GRAPH_DB_QUEUE_SIZE, GRAPH_DB_BATCH_SIZE, GRAPH_DB_FLUSH_INTERVAL, \
+    GRAPH_DB_PAGE_SIZE
+
+
+class GraphDBWriter:
+    """
+    Write-behind layer of the graph database, with the same write methods as GraphDB. The mutations are stored on a
+    bounded queue (blocking when it is full) and a background worker coalesces the repeated mutations of the same
+    node or relation, writing them in batches. The mutations of a failed write are kept and written again with the
+    next ones.
+
+    :param graph_db: graph database
+    :type graph_db: GraphDB
+    :param max_queue_size: maximum number of queued mutations
+    :type max_queue_size: int
+    :param batch_size: number of coalesced nodes and relations written per batch
+    :type batch_size: int
+    :param flush_interval: seconds without mutations before writing the pending ones
+    :type flush_interval: float
+    """
+
+    def __init__(self, graph_db: GraphDB, max_queue_size: int = GRAPH_DB_QUEUE_SIZE,
+                 batch_size: int = GRAPH_DB_BATCH_SIZE, flush_interval: float = GRAPH_DB_FLUSH_INTERVAL):
+        self._graph_db = graph_db
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+
+        # Queue of (operation, item) mutations and the error of the last failed write
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._error = None
+        self._closed = False
+
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def _run(self) -> None:
+        """
+        Worker loop, coalescing the queued mutations and writing them
+
+        :return: None
+        """
+        # Pending nodes by identifier and relations info by (source, target), kept after a failed write to retry them
+        nodes, relations = {}, {}
+        # Whether the last write failed, then the pending mutations are only written again when there are no new ones
+        # or on flush and close requests
+        failed = False
+
+        while True:
+            try:
+                operation, item = self._queue.get(timeout=self._flush_interval)
+            except queue.Empty:
+                # Write the pending mutations when there are no new ones
+                operation, item = 'flush', None
+
+            if operation == 'node':
+                # Existing nodes are not modified, so only the first one is kept
+                nodes.setdefault(item['node_id'], item)
+            elif operation == 'relation':
+                # Later values of the same relation replace the previous ones
+                relations.setdefault((item['from'], item['to']), {}).update(item['segment_info'])
+
+            if operation != 'node' and operation != 'relation' and (nodes or relations) or \
+                    not failed and len(nodes) + len(relations) >= self._batch_size:
+                try:
+                    self.write(nodes, relations)
+                except Exception as e:
+                    # The error is raised on the next flush or close, and the mutations are kept to write them again
+                    self._error = e
+                    failed = True
+                else:
+                    nodes, relations = {}, {}
+                    self._error = None
+                    failed = False
+
+            # Notify the flush or close requests
+            if item is not None and operation in ('flush', 'stop'):
+                item.set()
+            if operation == 'stop':
+                break
+
+    def write(self, nodes: dict, relations: dict) -> None:
+        """
+        Write the coalesced nodes and relations, nodes first as the relations require them
+
+        :param nodes: nodes information by identifier
+        :type nodes: dict
+        :param relations: relations information by (source, target)
+        :type relations: dict
+        :return: None
+        """
+        if nodes:
+            self._graph_db.create_nodes(list(nodes.values()), self._batch_size)
+        if relations:
+            self._graph_db.create_update_relations([{'from': source, 'to': target, 'segment_info': segment_info}
+                                                    for (source, target), segment_info in relations.items()],
+                                                   self._batch_size)
+
+    def _put(self, operation: str, item) -> None:
+        """
+        Queue a mutation, blocking while the queue is full
+
+        :param operation: mutation type
+        :type operation: str
+        :param item: mutation information
+        :return: None
+        """
+        if self._closed:
+            raise RuntimeError('Graph database writer is closed')
+        self._queue.put((operation, item))
+
+    def _wait(self, operation: str) -> None:
+        """
+        Queue a flush or close request and wait until it is processed, raising the error of a failed write
+
+        :param operation: request type
+        :type operation: str
+        :return: None
+        """
+        done = threading.Event()
+        self._queue.put((operation, done))
+        done.wait()
+
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def create_node(self, node: dict) -> None:
+        """
+        Queue the creation of a node
+
+        :param node: node information
+        :type node: dict
+        :return: None
+        """
+        self._put('node', node)
+
+    def create_update_relation(self, relation: dict, segment_info: dict) -> None:
+        """
+        Queue the creation/update of a relationship
+
+        :param relation: relation information
+        :type relation: dict
+        :param segment_info: road additional information
+        :type segment_info: dict
+        :return: None
+        """
+        # The information is copied as it can be modified before it is written
+        self._put('relation', {'from': relation['from'], 'to': relation['to'], 'segment_info': dict(segment_info)})
+
+    def update_road_congestion(self, source: str, target: str, congestion: int) -> None:
+        """
+        Queue the update of the congestion value for the road connecting source and target
+
+        :param source: source node identifier
+        :type source: str
+        :param target: target node identifier
+        :type target: str
+        :param congestion: congestion value
+        :type congestion: int
+        :return: None
+        """
+        self.create_update_relation({'from': source, 'to': target}, {'congestion': congestion})
+
+    def create_nodes(self, nodes: list, batch_size: int = None) -> None:
+        """
+        Queue the creation of several nodes
+
+        :param nodes: list with the nodes information
+        :type nodes: list
+        :param batch_size: not used, the writer batch size is used instead
+        :return: None
+        """
+        for node in nodes:
+            self.create_node(node)
+
+    def create_update_relations(self, relations: list, batch_size: int = None) -> None:
+        """
+        Queue the creation/update of several relationships
+
+        :param relations: list with the relations information ("from", "to" and "segment_info")
+        :type relations: list
+        :param batch_size: not used, the writer batch size is used instead
+        :return: None
+        """
+        for relation in relations:
+            self.create_update_relation(relation, relation['segment_info'])
+
+    def flush(self) -> None:
+        """
+        Wait until all the queued mutations are stored
+
+        :return: None
+        """
+        self._wait('flush')
+
+    def read_nodes(self, page_size: int = GRAPH_DB_PAGE_SIZE):
+        """
+        Read all the nodes of the network by pages, after the queued mutations
+
+        :param page_size: number of nodes per query
+        :type page_size: int
+        :return: generator of nodes information (node_id, lat, lon and height)
+        """
+        self.flush()
+        return self._graph_db.read_nodes(page_size)
+
+    def read_relations(self, page_size: int = GRAPH_DB_PAGE_SIZE):
+        """
+        Read all the relationships of the network by pages of source nodes, after the queued mutations
+
+        :param page_size: number of source nodes per query
+        :type page_size: int
+        :return: generator of relations information ("from", "to" and "segment_info" with the stored attributes)
+        """
+        self.flush()
+        return self._graph_db.read_relations(page_size)
+
+    def clear_database(self) -> None:
+        """
+        Clear database information, after the queued mutations
+
+        :return: None
+        """
+        self.flush()
+        self._graph_db.clear_database()
+
+    def close(self) -> None:
+        """
+        Store all the queued mutations, stop the worker and close connection to database. If the last write fails,
+        its error is raised and the mutations are not stored.
+
+        :return: None
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        try:
+            self._wait('stop')
+        finally:
+            self._worker.join()
+            self._graph_db.close()
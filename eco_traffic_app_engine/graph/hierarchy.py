@@ -0,0 +1,354 @@
+import heapq
+import math
+from bisect import bisect_left
+
+import numpy as np
+
+from eco_traffic_app_engine.graph.snapshot import GraphSnapshot
+from eco_traffic_app_engine.static.constants import HIERARCHY_LEAF_SIZE
+
+
+def get_nested_dissection_order(lats: np.ndarray, lons: np.ndarray, sources: np.ndarray, targets: np.ndarray,
+                                 leaf_size: int = HIERARCHY_LEAF_SIZE) -> np.ndarray:
+    """
+    Get the contraction order of the nodes with a geometric nested dissection: the nodes are split by the median of
+    their widest coordinate, the nodes of the smaller boundary between both halves are the separator, and the halves
+    are ordered recursively before the separator
+
+    :param lats: latitudes of the nodes
+    :type lats: np.ndarray
+    :param lons: longitudes of the nodes
+    :type lons: np.ndarray
+    :param sources: first node of each undirected edge
+    :type sources: np.ndarray
+    :param targets: second node of each undirected edge
+    :type targets: np.ndarray
+    :param leaf_size: maximum number of nodes of the cells that are not split
+    :type leaf_size: int
+    :return: node positions in contraction order
+    :rtype: np.ndarray
+    """
+    # Longitudes scaled to the same length as the latitudes
+    xs = lons * math.cos(math.radians(float(np.mean(lats)))) if len(lats) else lons
+    # Side of each node on the current split, only read for the nodes of the cell being split
+    sides = np.zeros(len(lats), dtype=np.int8)
+
+    def dissect(nodes: np.ndarray, edge_sources: np.ndarray, edge_targets: np.ndarray) -> list:
+        if len(nodes) <= leaf_size:
+            return [nodes]
+
+        coordinates = lats[nodes] if np.ptp(lats[nodes]) >= np.ptp(xs[nodes]) else xs[nodes]
+        half = len(nodes) // 2
+        partition = np.argpartition(coordinates, half)
+        sides[nodes[partition[:half]]] = 0
+        sides[nodes[partition[half:]]] = 1
+
+        # Nodes of each half with edges to the other half
+        cut = sides[edge_sources] != sides[edge_targets]
+        cut_nodes = np.unique(np.concatenate([edge_sources[cut], edge_targets[cut]]))
+        boundaries = [cut_nodes[sides[cut_nodes] == side] for side in (0, 1)]
+        separator = min(boundaries, key=len)
+        sides[separator] = 2
+
+        # Both halves are selected before splitting them, as the sides are overwritten
+        halves = [(nodes[sides[nodes] == side], (sides[edge_sources] == side) & (sides[edge_targets] == side))
+                  for side in (0, 1)]
+
+        return [part for half_nodes, inner in halves
+                for part in dissect(half_nodes, edge_sources[inner], edge_targets[inner])] + [separator]
+
+    return np.concatenate(dissect(np.arange(len(lats)), sources, targets)).astype(np.int64)
+
+
+class HierarchyTopology:
+    """
+    Metric-independent topology of the contraction hierarchies of a graph snapshot (customizable contraction
+    hierarchies). The nodes are contracted in nested dissection order, adding a shortcut between every pair of upper
+    neighbours of the contracted node, so the shortcuts are valid for any edge metric and the weights can be
+    customized (e.g. when the congestion changes) without contracting the graph again.
+
+    Nodes are handled by their rank (contraction order). Each edge joins a lower and a higher node and stores both
+    directions: "up" (lower to higher) and "down" (higher to lower). The lower triangles of each edge are the nodes
+    contracted before its nodes and adjacent to both of them.
+
+    :param snapshot: graph snapshot
+    :type snapshot: GraphSnapshot
+    :param leaf_size: maximum number of nodes of the cells that are not split on the nested dissection
+    :type leaf_size: int
+    """
+
+    def __init__(self, snapshot: GraphSnapshot, leaf_size: int = HIERARCHY_LEAF_SIZE):
+        self.snapshot = snapshot
+        num_nodes = snapshot.num_nodes
+
+        # Undirected edges of the snapshot, without loops
+        sources, targets = snapshot.get_sources().astype(np.int64), snapshot.indices.astype(np.int64)
+        keys = np.unique(np.minimum(sources, targets)[sources != targets] * num_nodes +
+                         np.maximum(sources, targets)[sources != targets])
+
+        order = get_nested_dissection_order(snapshot.lats, snapshot.lons, keys // num_nodes, keys % num_nodes,
+                                            leaf_size)
+        self.ranks = np.empty(num_nodes, dtype=np.int64)
+        self.ranks[order] = np.arange(num_nodes)
+
+        # Contract the nodes in order, where the upper neighbours of a node become upper neighbours of the lowest one
+        upper_neighbors = [set() for _ in range(num_nodes)]
+        for lower, higher in zip(*np.sort(self.ranks[np.stack([keys // num_nodes, keys % num_nodes])], axis=0)
+                                 .tolist()):
+            upper_neighbors[lower].add(higher)
+        for node in range(num_nodes):
+            if len(upper_neighbors[node]) > 1:
+                lowest = min(upper_neighbors[node])
+                upper_neighbors[lowest] |= upper_neighbors[node]
+                upper_neighbors[lowest].discard(lowest)
+
+        # Edges sorted by lower and higher rank, as CSR of the upward edges of each rank
+        degrees = np.fromiter((len(neighbors) for neighbors in upper_neighbors), dtype=np.int64, count=num_nodes)
+        self.indptr = np.concatenate([[0], np.cumsum(degrees)]).astype(np.int64)
+        self.lows = np.repeat(np.arange(num_nodes, dtype=np.int64), degrees)
+        self.highs = np.fromiter((higher for neighbors in upper_neighbors for higher in sorted(neighbors)),
+                                 dtype=np.int64, count=int(self.indptr[-1]))
+        self.keys = self.lows * num_nodes + self.highs
+
+        # Snapshot edge of each direction of the edges, -1 if it is a shortcut
+        self.up_edges = np.full(self.num_edges, -1, dtype=np.int64)
+        self.down_edges = np.full(self.num_edges, -1, dtype=np.int64)
+        rank_sources, rank_targets = self.ranks[sources], self.ranks[targets]
+        positions = np.searchsorted(self.keys, np.minimum(rank_sources, rank_targets) * num_nodes +
+                                    np.maximum(rank_sources, rank_targets))
+        upward, downward = rank_sources < rank_targets, rank_sources > rank_targets
+        self.up_edges[positions[upward]] = np.flatnonzero(upward)
+        self.down_edges[positions[downward]] = np.flatnonzero(downward)
+
+        # Lower triangles: pairs of upward edges (lower, middle) and (lower, higher) of the same node, and the edge
+        # (middle, higher) whose weights are given by them
+        counts = self.indptr[self.lows + 1] - np.arange(self.num_edges) - 1
+        first_edges = np.repeat(np.arange(self.num_edges), counts)
+        offsets = np.arange(len(first_edges)) - np.repeat(np.cumsum(counts) - counts, counts)
+        second_edges = first_edges + 1 + offsets
+        third_edges = np.searchsorted(self.keys, self.highs[first_edges] * num_nodes + self.highs[second_edges])
+
+        # The triangles are customized by levels of their lower node, where a level only depends on the lower ones
+        levels = np.zeros(num_nodes, dtype=np.int64).tolist()
+        for lower, higher in zip(self.lows.tolist(), self.highs.tolist()):
+            levels[higher] = max(levels[higher], levels[lower] + 1)
+        triangle_levels = np.asarray(levels, dtype=np.int64)[self.lows[first_edges]]
+        triangles_order = np.argsort(triangle_levels, kind='stable')
+        self.triangles = tuple(edges[triangles_order].astype(np.int32)
+                               for edges in (first_edges, second_edges, third_edges))
+        self.level_bounds = np.searchsorted(triangle_levels[triangles_order], np.arange(max(levels, default=0) + 2))
+
+        # Lists used on the queries and the unpacking of the paths
+        self._keys, self._highs, self._indptr = self.keys.tolist(), self.highs.tolist(), self.indptr.tolist()
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.highs)
+
+    @property
+    def num_shortcuts(self) -> int:
+        return int(np.count_nonzero((self.up_edges < 0) & (self.down_edges < 0)))
+
+    @property
+    def num_triangles(self) -> int:
+        return len(self.triangles[0])
+
+    def get_edge(self, lower: int, higher: int) -> int:
+        """
+        Get the position of the edge between two ranks
+
+        :param lower: lower rank
+        :type lower: int
+        :param higher: higher rank
+        :type higher: int
+        :return: edge position
+        :rtype: int
+        """
+        return bisect_left(self._keys, lower * len(self.ranks) + higher)
+
+    def matches(self, snapshot: GraphSnapshot) -> bool:
+        """
+        Check if the topology is valid for a graph snapshot, which has the same nodes and relations as the one used
+        to create it (e.g. after updating the congestion)
+
+        :param snapshot: graph snapshot
+        :type snapshot: GraphSnapshot
+        :return: True if the topology is valid for the snapshot, False otherwise
+        :rtype: bool
+        """
+        return snapshot is self.snapshot or (snapshot.node_ids == self.snapshot.node_ids and
+                                             np.array_equal(snapshot.indptr, self.snapshot.indptr) and
+                                             np.array_equal(snapshot.indices, self.snapshot.indices))
+
+
+class ContractionHierarchy:
+    """
+    Contraction hierarchies of a graph snapshot customized with the weights of an edge metric, answering shortest
+    path queries with a bidirectional upward search
+
+    :param topology: contraction hierarchies topology
+    :type topology: HierarchyTopology
+    :param weights: cost of each snapshot edge (non-negative)
+    :type weights: np.ndarray
+    """
+
+    def __init__(self, topology: HierarchyTopology, weights: np.ndarray):
+        self.topology = topology
+        self.weights = None
+        self.customize(weights)
+
+    def customize(self, weights: np.ndarray) -> None:
+        """
+        Calculate the weights of the hierarchy edges and shortcuts for new snapshot edge weights. The lower triangles
+        are processed by levels from the bottom, so each edge gets the lowest cost through lower nodes (basic
+        customization), and then from the top, so each edge gets the lowest cost of the graph (perfect
+        customization). Only the edges whose cost is not improved by the second pass are used on the queries.
+
+        :param weights: cost of each snapshot edge (non-negative)
+        :type weights: np.ndarray
+        :return: None
+        """
+        topology = self.topology
+        if len(weights) != topology.snapshot.num_edges:
+            raise ValueError(f'Expected {topology.snapshot.num_edges} edge weights, not {len(weights)}')
+
+        weights = np.asarray(weights, dtype=np.float64)
+        up, down = np.full(topology.num_edges, np.inf), np.full(topology.num_edges, np.inf)
+        up[topology.up_edges >= 0] = weights[topology.up_edges[topology.up_edges >= 0]]
+        down[topology.down_edges >= 0] = weights[topology.down_edges[topology.down_edges >= 0]]
+
+        # Middle rank of the edges that are shorter through a lower node, -1 otherwise
+        up_middles = np.full(topology.num_edges, -1, dtype=np.int64)
+        down_middles = np.full(topology.num_edges, -1, dtype=np.int64)
+
+        # Triangles of each level as edges (lower, middle), (lower, higher) and (middle, higher)
+        levels = [tuple(edges[start:end] for edges in topology.triangles)
+                  for start, end in zip(topology.level_bounds[:-1], topology.level_bounds[1:]) if start < end]
+
+        for first, second, third in levels:
+            middles = topology.lows[first]
+
+            # Middle to higher through the lower node, then higher to middle
+            for costs, path_middles, candidates in ((up, up_middles, down[first] + up[second]),
+                                                    (down, down_middles, down[second] + up[first])):
+                previous = costs[third]
+                np.minimum.at(costs, third, candidates)
+                improved = (candidates < previous) & (candidates == costs[third])
+                path_middles[third[improved]] = middles[improved]
+
+        perfect_up, perfect_down = up.copy(), down.copy()
+        for first, second, third in reversed(levels):
+            # Edges of the lower node through the upper nodes
+            for costs, edges, candidates in ((perfect_up, first, perfect_up[second] + perfect_down[third]),
+                                             (perfect_down, first, perfect_up[third] + perfect_down[second]),
+                                             (perfect_up, second, perfect_up[first] + perfect_up[third]),
+                                             (perfect_down, second, perfect_down[third] + perfect_down[first])):
+                np.minimum.at(costs, edges, candidates)
+
+        # Upward edges of each rank on each direction, as (higher rank, cost, edge), without the unnecessary ones
+        self._adjacencies = []
+        for costs, perfect_costs in ((up, perfect_up), (down, perfect_down)):
+            edges = np.flatnonzero((costs == perfect_costs) & np.isfinite(costs))
+            items = list(zip(topology.highs[edges].tolist(), costs[edges].tolist(), edges.tolist()))
+            indptr = np.searchsorted(edges, topology.indptr).tolist()
+            self._adjacencies.append([items[start:end] for start, end in zip(indptr[:-1], indptr[1:])])
+
+        self.weights = weights
+        self._up_middles, self._down_middles = up_middles.tolist(), down_middles.tolist()
+
+    @property
+    def num_edges(self) -> int:
+        return sum(len(items) for adjacency in self._adjacencies for items in adjacency)
+
+    def query(self, source: int, target: int):
+        """
+        Search the lowest cost path between two nodes with a bidirectional search on the upward edges, with stall on
+        demand
+
+        :param source: source node position
+        :type source: int
+        :param target: target node position
+        :type target: int
+        :return: cost and snapshot edges positions of the path, or None if the target is not reachable
+        :rtype: tuple
+        """
+        source, target = int(self.topology.ranks[source]), int(self.topology.ranks[target])
+
+        # Forward search on the up edges and backward search on the down edges
+        up_adjacency, down_adjacency = self._adjacencies
+        searches = (({source: 0.0}, {}, set(), [(0.0, source)], up_adjacency, down_adjacency),
+                    ({target: 0.0}, {}, set(), [(0.0, target)], down_adjacency, up_adjacency))
+        best, meeting = math.inf, None
+
+        while True:
+            forward_min = searches[0][3][0][0] if searches[0][3] else math.inf
+            backward_min = searches[1][3][0][0] if searches[1][3] else math.inf
+            if min(forward_min, backward_min) >= best:
+                break
+
+            direction = 0 if forward_min <= backward_min else 1
+            costs, previous_edges, settled, queue, adjacency, reverse_adjacency = searches[direction]
+            cost, node = heapq.heappop(queue)
+            if node in settled:
+                continue
+            settled.add(node)
+
+            other_costs = searches[1 - direction][0]
+            if node in other_costs and cost + other_costs[node] < best:
+                best, meeting = cost + other_costs[node], node
+
+            # Stall the node if it is reached with a lower cost from a higher node
+            if any(neighbor in costs and costs[neighbor] + edge_cost < cost
+                   for neighbor, edge_cost, _ in reverse_adjacency[node]):
+                continue
+
+            for neighbor, edge_cost, edge in adjacency[node]:
+                new_cost = cost + edge_cost
+                if new_cost < costs.get(neighbor, math.inf):
+                    costs[neighbor] = new_cost
+                    previous_edges[neighbor] = (edge, node)
+                    heapq.heappush(queue, (new_cost, neighbor))
+
+        if meeting is None:
+            return None
+
+        # Hierarchy edges from the source up to the meeting node, and from the meeting node down to the target
+        path = []
+        for direction, start in ((0, source), (1, target)):
+            previous_edges, node, edges = searches[direction][1], meeting, []
+            while node != start:
+                edge, node = previous_edges[node]
+                edges.append((edge, direction == 0))
+            path += edges[::-1] if direction == 0 else edges
+
+        return best, [snapshot_edge for edge, upward in path for snapshot_edge in self.unpack(edge, upward)]
+
+    def unpack(self, edge: int, upward: bool) -> list:
+        """
+        Get the snapshot edges of a hierarchy edge, replacing the shortcuts by their lower triangles
+
+        :param edge: hierarchy edge position
+        :type edge: int
+        :param upward: True for the up direction (lower to higher node), False for the down direction
+        :type upward: bool
+        :return: snapshot edges positions
+        :rtype: list
+        """
+        topology = self.topology
+        snapshot_edges = []
+        stack = [(edge, upward)]
+
+        while stack:
+            edge, upward = stack.pop()
+            middle = self._up_middles[edge] if upward else self._down_middles[edge]
+            if middle < 0:
+                snapshot_edges.append(int(topology.up_edges[edge] if upward else topology.down_edges[edge]))
+                continue
+
+            lower, higher = int(topology.lows[edge]), topology._highs[edge]
+            first, second = (lower, higher) if upward else (higher, lower)
+            # Down from the first node to the middle one, then up to the second node (pushed in reverse order)
+            stack.append((topology.get_edge(middle, second), True))
+            stack.append((topology.get_edge(middle, first), False))
+
+        return snapshot_edges
@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 
+import numpy as np
+
 from eco_traffic_app_engine.static.constants import DEFAULT_WAYS_VALUES
 
 
@@ -33,6 +35,115 @@ class Coords:
     lon: float
 
 
+class CoordsView:
+    """ Read-only view of a point of a RouteArrays, with the same attributes as Coords """
+    __slots__ = ('_route', '_index')
+
+    def __init__(self, route, index: int):
+        self._route = route
+        self._index = index
+
+    @property
+    def lat(self) -> float:
+        return float(self._route.lats[self._index])
+
+    @property
+    def lon(self) -> float:
+        return float(self._route.lons[self._index])
+
+    @property
+    def height(self) -> float:
+        return float(self._route.heights[self._index])
+
+    def __repr__(self):
+        return f'CoordsView(lat={self.lat}, lon={self.lon})'
+
+
+class RouteArrays:
+    """
+    Compact route representation as float64 arrays of latitudes, longitudes and heights (NaN if unknown)
+
+    :param lats: latitudes
+    :type lats: np.ndarray
+    :param lons: longitudes
+    :type lons: np.ndarray
+    :param heights: heights. Default None (unknown).
+    :type heights: np.ndarray
+    """
+    __slots__ = ('lats', 'lons', 'heights')
+
+    def __init__(self, lats, lons, heights=None):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.heights = np.full(len(self.lats), np.nan) if heights is None else np.asarray(heights, dtype=np.float64)
+
+    @classmethod
+    def from_coords(cls, route_coordinates: list):
+        """
+        Create the route from a list of coordinates (Coords or any object with lat and lon)
+
+        :param route_coordinates: route coordinates
+        :type route_coordinates: list
+        :return: route arrays
+        :rtype: RouteArrays
+        """
+        return cls(*get_coordinates_arrays(route_coordinates))
+
+    @classmethod
+    def from_lon_lat(cls, coordinates: list):
+        """
+        Create the route from a list of [lon, lat] or [lon, lat, height] items (GeoJSON order, as the routing services
+        geometries)
+
+        :param coordinates: list of [lon, lat] or [lon, lat, height] items
+        :type coordinates: list
+        :return: route arrays
+        :rtype: RouteArrays
+        """
+        coordinates = np.asarray(coordinates, dtype=np.float64)
+        if not len(coordinates):
+            return cls([], [])
+        return cls(coordinates[:, 1], coordinates[:, 0], coordinates[:, 2] if coordinates.shape[1] > 2 else None)
+
+    def to_coords(self) -> list:
+        """
+        Get the route as a list of Coords
+
+        :return: list of Coords
+        :rtype: list
+        """
+        return [Coords(lat=lat, lon=lon) for lat, lon in zip(self.lats.tolist(), self.lons.tolist())]
+
+    def __len__(self):
+        return len(self.lats)
+
+    def __getitem__(self, index):
+        # Slices and index arrays return a new route, integers a view of the point
+        if isinstance(index, (slice, np.ndarray, list)):
+            return RouteArrays(self.lats[index], self.lons[index], self.heights[index])
+        return CoordsView(self, range(len(self.lats))[index])
+
+    def __iter__(self):
+        return (CoordsView(self, index) for index in range(len(self.lats)))
+
+
+def get_coordinates_arrays(route_coordinates) -> tuple:
+    """
+    Get the latitudes and longitudes arrays of a route, without copies if it is a RouteArrays
+
+    :param route_coordinates: route coordinates (RouteArrays or list of Coords)
+    :return: latitudes and longitudes arrays
+    :rtype: tuple
+    """
+    if isinstance(route_coordinates, RouteArrays):
+        return route_coordinates.lats, route_coordinates.lons
+
+    lats = np.fromiter((item.lat for item in route_coordinates), dtype=np.float64, count=len(route_coordinates))
+    lons = np.fromiter((item.lon for item in route_coordinates), dtype=np.float64, count=len(route_coordinates))
+
+    return lats, lons
+
+
 @dataclass
 class SegmentNodes:
     source: Coords
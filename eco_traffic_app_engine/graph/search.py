@@ -0,0 +1,161 @@
+import heapq
+import operator
+
+
+def astar_search(indptr: list, indices: list, weights: list, source: int, target: int, heuristic):
+    """
+    Search the lowest cost path between two nodes of a CSR graph with A*
+
+    :param indptr: position of the first edge of each node, and the number of edges at the end
+    :type indptr: list
+    :param indices: target node of each edge
+    :type indices: list
+    :param weights: cost of each edge (non-negative)
+    :type weights: list
+    :param source: source node position
+    :type source: int
+    :param target: target node position
+    :type target: int
+    :param heuristic: function returning a lower bound of the cost from a node to the target (admissible)
+    :return: cost and edges positions of the path, or None if the target is not reachable
+    :rtype: tuple
+    """
+    costs = {source: 0.0}
+    previous_edges = {}
+    visited = set()
+    queue = [(heuristic(source), 0.0, source)]
+
+    while queue:
+        _, cost, node = heapq.heappop(queue)
+        if node in visited:
+            continue
+        if node == target:
+            # Rebuild the path from the target
+            path = []
+            while node != source:
+                edge, node = previous_edges[node]
+                path.append(edge)
+            return cost, path[::-1]
+        visited.add(node)
+
+        for edge in range(indptr[node], indptr[node + 1]):
+            neighbor = indices[edge]
+            new_cost = cost + weights[edge]
+            if neighbor not in visited and new_cost < costs.get(neighbor, float('inf')):
+                costs[neighbor] = new_cost
+                previous_edges[neighbor] = (edge, node)
+                heapq.heappush(queue, (new_cost + heuristic(neighbor), new_cost, neighbor))
+
+    return None
+
+
+def is_dominated(costs: tuple, front: list, epsilon: float = 0.0) -> bool:
+    """
+    Check if a cost vector is dominated by any of the cost vectors of a front: there is a vector whose costs are not
+    greater than the given ones (relaxed by 1 + epsilon) on every criterion
+
+    :param costs: cost vector
+    :type costs: tuple
+    :param front: list of cost vectors
+    :type front: list
+    :param epsilon: relative relaxation of the dominance, 0 for the exact dominance
+    :type epsilon: float
+    :return: True if the costs are dominated, False otherwise
+    :rtype: bool
+    """
+    relaxed = tuple(cost * (1 + epsilon) for cost in costs) if epsilon else costs
+
+    return any(all(map(operator.le, front_costs, relaxed)) for front_costs in front)
+
+
+def pareto_search(indptr: list, indices: list, weights: list, source: int, target: int, epsilon: float = 0.0,
+                  heuristics: list = None) -> list:
+    """
+    Search the Pareto front of the paths between two nodes of a CSR graph for several criteria, with a multi-objective
+    label-setting search. The labels are settled in lexicographic order of their costs plus the lower bounds, and
+    those dominated by the settled labels of their node or by the target labels are pruned.
+
+    With epsilon > 0, a label is also pruned if it is not (1 + epsilon) times better than a settled label of its node
+    on some criterion, which bounds the number of labels at every node. The front is then approximated: each pruning
+    keeps a label within a factor of 1 + epsilon, but the factor can compound along the path.
+
+    :param indptr: position of the first edge of each node, and the number of edges at the end
+    :type indptr: list
+    :param indices: target node of each edge
+    :type indices: list
+    :param weights: cost vector of each edge (tuple of non-negative costs, one by criterion)
+    :type weights: list
+    :param source: source node position
+    :type source: int
+    :param target: target node position
+    :type target: int
+    :param epsilon: relative relaxation of the dominance pruning. Default 0 (exact Pareto front).
+    :type epsilon: float
+    :param heuristics: functions returning a lower bound of each criterion cost from a node to the target (admissible
+        and consistent), None for no lower bounds. Default None.
+    :type heuristics: list
+    :return: list of cost vector and edges positions of each path of the front, sorted lexicographically by cost
+    :rtype: list
+    """
+    if epsilon < 0:
+        raise ValueError(f'Epsilon must be non-negative, not {epsilon}')
+
+    num_criteria = len(weights[0]) if weights else 0
+
+    # Lower bounds of each node, calculated once
+    lower_bounds = {}
+
+    def get_lower_bounds(node: int) -> tuple:
+        if node not in lower_bounds:
+            lower_bounds[node] = tuple(heuristic(node) for heuristic in heuristics) if heuristics \
+                else (0.0,) * num_criteria
+        return lower_bounds[node]
+
+    # Labels as (costs, node, parent label, edge) and their settled cost vectors by node
+    labels = [((0.0,) * num_criteria, source, -1, -1)]
+    fronts = {}
+    target_labels = []
+    queue = [(get_lower_bounds(source), 0)]
+
+    while queue:
+        _, label = heapq.heappop(queue)
+        costs, node, _, _ = labels[label]
+
+        # Labels of the node settled after the label was created could dominate it
+        node_front = fronts.setdefault(node, [])
+        if is_dominated(costs, node_front, epsilon):
+            continue
+        node_front.append(costs)
+
+        if node == target:
+            target_labels.append(label)
+            continue
+
+        target_front = fronts.get(target, [])
+        for edge in range(indptr[node], indptr[node + 1]):
+            neighbor = indices[edge]
+            new_costs = tuple(cost + weight for cost, weight in zip(costs, weights[edge]))
+            if is_dominated(new_costs, fronts.get(neighbor, ()), epsilon):
+                continue
+
+            # Prune the labels that can not reach the target with costs not dominated by the target labels
+            estimated_costs = tuple(cost + bound for cost, bound in zip(new_costs, get_lower_bounds(neighbor)))
+            if is_dominated(estimated_costs, target_front, epsilon):
+                continue
+
+            labels.append((new_costs, neighbor, label, edge))
+            heapq.heappush(queue, (estimated_costs, len(labels) - 1))
+
+    # Rebuild the paths of the target labels, keeping the non-dominated ones
+    front = []
+    target_costs = [labels[label][0] for label in target_labels]
+    for label, costs in zip(target_labels, target_costs):
+        if is_dominated(costs, [other for other in target_costs if other != costs]):
+            continue
+        path = []
+        while labels[label][2] >= 0:
+            path.append(labels[label][3])
+            label = labels[label][2]
+        front.append((costs, path[::-1]))
+
+    return sorted(front)
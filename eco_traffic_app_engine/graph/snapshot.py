@@ -0,0 +1,185 @@
+import copy
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from eco_traffic_app_engine.graph.models import Segment
+
+# Relation attributes stored as float32 columns and as codes of a strings table
+FLOAT_ATTRIBUTES = ('distance', 'slope', 'max_speed')
+STRING_ATTRIBUTES = ('highway', 'name', 'surface', 'way_id')
+
+
+class GraphSnapshot:
+    """
+    Immutable compressed sparse row (CSR) snapshot of the memory graph. Nodes are integer positions (their
+    identifiers are kept on "node_ids") and the relations of the node i are the positions indptr[i]..indptr[i + 1],
+    whose targets are on "indices". Relation attributes are stored as columns: float32 for the numeric ones, int8 for
+    the congestion (-1 if unknown), int16 for the lanes and int32 codes of a strings table for the rest.
+
+    :param node_ids: identifiers of the nodes
+    :type node_ids: list
+    :param lats: latitudes of the nodes
+    :type lats: np.ndarray
+    :param lons: longitudes of the nodes
+    :type lons: np.ndarray
+    :param heights: heights of the nodes
+    :type heights: np.ndarray
+    :param indptr: position of the first relation of each node, and the number of relations at the end
+    :type indptr: np.ndarray
+    :param indices: target node of each relation
+    :type indices: np.ndarray
+    :param columns: relation attributes columns
+    :type columns: dict
+    :param strings: strings table of the string attributes, whose last item is None (code -1 of the unknown values)
+    :type strings: list
+    """
+
+    def __init__(self, node_ids: list, lats: np.ndarray, lons: np.ndarray, heights: np.ndarray, indptr: np.ndarray,
+                 indices: np.ndarray, columns: dict, strings: list):
+        self.node_ids = node_ids
+        self.node_index = {node_id: position for position, node_id in enumerate(node_ids)}
+        self.lats, self.lons, self.heights = lats, lons, heights
+        self.indptr, self.indices = indptr, indices
+        self.columns = columns
+        self.strings = strings
+
+        # The snapshot is read-only
+        for array in (self.lats, self.lons, self.heights, self.indptr, self.indices, *self.columns.values()):
+            array.flags.writeable = False
+
+    @classmethod
+    def from_graph(cls, graph: nx.DiGraph):
+        """
+        Create the snapshot of the memory graph
+
+        :param graph: memory graph
+        :type graph: nx.DiGraph
+        :return: graph snapshot
+        :rtype: GraphSnapshot
+        """
+        node_ids = list(graph.nodes)
+        node_index = {node_id: position for position, node_id in enumerate(node_ids)}
+        nodes = [graph.nodes[node_id] for node_id in node_ids]
+
+        # Relations are iterated by source node, in the same order as the nodes
+        out_degrees = np.fromiter((len(graph.succ[node_id]) for node_id in node_ids), dtype=np.int64,
+                                  count=len(node_ids))
+        indptr = np.concatenate([[0], np.cumsum(out_degrees)]).astype(np.int64)
+        relations = [(v, data) for successors in graph.succ.values() for v, data in successors.items()]
+        indices = np.fromiter((node_index[v] for v, _ in relations), dtype=np.int32, count=len(relations))
+
+        columns = {key: np.array([np.nan if data[key] is None else data[key] for _, data in relations],
+                                 dtype=np.float32).reshape(-1) for key in FLOAT_ATTRIBUTES}
+        columns['congestion'] = np.fromiter((-1 if data['congestion'] is None else int(data['congestion'])
+                                             for _, data in relations), dtype=np.int8, count=len(relations))
+        columns['lanes'] = np.fromiter((int(data['lanes'] or 0) for _, data in relations), dtype=np.int16,
+                                       count=len(relations))
+
+        # Encode the string attributes with a shared table, unknown values as -1
+        codes, strings = pd.factorize(np.array([data[key] for key in STRING_ATTRIBUTES for _, data in relations],
+                                               dtype=object))
+        for position, key in enumerate(STRING_ATTRIBUTES):
+            columns[key] = codes[position * len(relations):(position + 1) * len(relations)].astype(np.int32)
+
+        return cls(node_ids,
+                   np.array([node['lat'] for node in nodes], dtype=np.float64).reshape(-1),
+                   np.array([node['lon'] for node in nodes], dtype=np.float64).reshape(-1),
+                   np.array([np.nan if node['height'] is None else node['height'] for node in nodes],
+                            dtype=np.float64).reshape(-1),
+                   indptr, indices, columns, list(strings) + [None])
+
+    def update_relations(self, edges: np.ndarray, relations: list):
+        """
+        Create the snapshot of the graph after modifying the attributes of some relations, sharing the nodes and the
+        CSR arrays and copying only the attributes columns
+
+        :param edges: positions of the modified relations
+        :type edges: np.ndarray
+        :param relations: new information of each modified relation
+        :type relations: list
+        :return: graph snapshot
+        :rtype: GraphSnapshot
+        """
+        snapshot = copy.copy(self)
+        snapshot.columns = {key: column.copy() for key, column in self.columns.items()}
+
+        for key in FLOAT_ATTRIBUTES:
+            snapshot.columns[key][edges] = [np.nan if data[key] is None else data[key] for data in relations]
+        snapshot.columns['congestion'][edges] = [-1 if data['congestion'] is None else int(data['congestion'])
+                                                 for data in relations]
+        snapshot.columns['lanes'][edges] = [int(data['lanes'] or 0) for data in relations]
+
+        # New strings are added to the table before the unknown value (last item)
+        codes = {string: code for code, string in enumerate(self.strings[:-1])}
+        for key in STRING_ATTRIBUTES:
+            values = [data[key] for data in relations]
+            for value in values:
+                if value is not None and value not in codes:
+                    codes[value] = len(codes)
+            snapshot.columns[key][edges] = [-1 if value is None else codes[value] for value in values]
+        snapshot.strings = list(codes) + [None]
+
+        for column in snapshot.columns.values():
+            column.flags.writeable = False
+
+        return snapshot
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.indices)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Getter of the memory of the snapshot arrays
+
+        :return: bytes of the arrays
+        """
+        return sum(array.nbytes for array in (self.lats, self.lons, self.heights, self.indptr, self.indices,
+                                              *self.columns.values()))
+
+    def get_sources(self) -> np.ndarray:
+        """
+        Get the source node of each relation
+
+        :return: source node positions
+        :rtype: np.ndarray
+        """
+        return np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(self.indptr))
+
+    def get_edge(self, source: int, target: int) -> int:
+        """
+        Get the position of the relation between two nodes
+
+        :param source: source node position
+        :type source: int
+        :param target: target node position
+        :type target: int
+        :return: relation position, -1 if the nodes are not connected
+        :rtype: int
+        """
+        start, end = self.indptr[source], self.indptr[source + 1]
+        positions = np.flatnonzero(self.indices[start:end] == target)
+
+        return int(start + positions[0]) if len(positions) else -1
+
+    def get_segment(self, edge: int) -> Segment:
+        """
+        Get the information of a relation
+
+        :param edge: relation position
+        :type edge: int
+        :return: relation information
+        :rtype: Segment
+        """
+        congestion = int(self.columns['congestion'][edge])
+
+        return Segment(**{key: float(self.columns[key][edge]) for key in FLOAT_ATTRIBUTES},
+                       **{key: self.strings[self.columns[key][edge]] for key in STRING_ATTRIBUTES},
+                       lanes=int(self.columns['lanes'][edge]), congestion=congestion if congestion >= 0 else None)
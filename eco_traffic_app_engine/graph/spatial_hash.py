@@ -0,0 +1,110 @@
+import math
+
+from eco_traffic_app_engine.static.constants import NODE_SNAPPING_TOLERANCE, METERS_PER_DEGREE
+
+
+class SpatialHash:
+    """
+    Integer-keyed spatial hash of coordinates. The coordinates are hashed to grid cells of the snapping tolerance
+    size, and those closer than the tolerance to a stored coordinate get its value.
+
+    :param tolerance: snapping tolerance in meters
+    :type tolerance: float
+    """
+
+    def __init__(self, tolerance: float = NODE_SNAPPING_TOLERANCE):
+        if tolerance <= 0:
+            raise ValueError(f'Snapping tolerance must be positive, not {tolerance}')
+
+        self._tolerance = tolerance
+        # Cell size in degrees (the tolerance in latitude)
+        self._cell_size = tolerance / METERS_PER_DEGREE
+        # Number of longitude cells, used to combine both cell indices into one integer key
+        self._lon_cells = math.ceil(360 / self._cell_size) + 3
+
+        # Stored coordinates and values (latitude, longitude, value) by cell key
+        self._cells = {}
+        self._size = 0
+
+    def get_key(self, lat_cell: int, lon_cell: int) -> int:
+        """
+        Get the integer key of a cell
+
+        :param lat_cell: latitude index of the cell
+        :type lat_cell: int
+        :param lon_cell: longitude index of the cell
+        :type lon_cell: int
+        :return: cell key
+        :rtype: int
+        """
+        return lat_cell * self._lon_cells + lon_cell
+
+    def get(self, lat: float, lon: float, default=None):
+        """
+        Get the value of the stored coordinates closest to the given ones within the tolerance
+
+        :param lat: latitude
+        :type lat: float
+        :param lon: longitude
+        :type lon: float
+        :param default: value returned if there are no coordinates within the tolerance. Default None.
+        :return: value of the stored coordinates or default value
+        """
+        lat_cell, lon_cell = math.floor(lat / self._cell_size), math.floor(lon / self._cell_size)
+
+        # Same cell first, as the same coordinates are the most common lookup
+        for item_lat, item_lon, value in self._cells.get(self.get_key(lat_cell, lon_cell), ()):
+            if item_lat == lat and item_lon == lon:
+                return value
+
+        # Longitude cells within the tolerance (narrower in meters than the latitude ones)
+        cos_lat = math.cos(math.radians(lat))
+        lon_range = math.ceil(1 / max(cos_lat, 1e-6))
+        tolerance_sq = (self._tolerance / METERS_PER_DEGREE) ** 2
+
+        best_value, best_distance = default, math.inf
+        for lat_offset in (-1, 0, 1):
+            for lon_offset in range(-lon_range, lon_range + 1):
+                for item_lat, item_lon, value in self._cells.get(self.get_key(lat_cell + lat_offset,
+                                                                              lon_cell + lon_offset), ()):
+                    # Equirectangular distance in degrees of latitude
+                    distance = (item_lat - lat) ** 2 + ((item_lon - lon) * cos_lat) ** 2
+                    if distance <= tolerance_sq and distance < best_distance:
+                        best_value, best_distance = value, distance
+
+        return best_value
+
+    def add(self, lat: float, lon: float, value) -> None:
+        """
+        Store the coordinates along with their value
+
+        :param lat: latitude
+        :type lat: float
+        :param lon: longitude
+        :type lon: float
+        :param value: value of the coordinates
+        :return: None
+        """
+        key = self.get_key(math.floor(lat / self._cell_size), math.floor(lon / self._cell_size))
+        self._cells.setdefault(key, []).append((lat, lon, value))
+        self._size += 1
+
+    def items(self):
+        """
+        Get the stored coordinates and their values
+
+        :return: generator of (latitude, longitude, value)
+        """
+        return (item for items in self._cells.values() for item in items)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def tolerance(self):
+        """
+        Getter of snapping tolerance
+
+        :return: snapping tolerance in meters
+        """
+        return self._tolerance
@@ -0,0 +1,247 @@
+import os
+import shutil
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from eco_traffic_app_engine.graph.snapshot import GraphSnapshot, FLOAT_ATTRIBUTES, STRING_ATTRIBUTES
+from eco_traffic_app_engine.graph.spatial_hash import SpatialHash
+
+# Version of the engine state folders, increased when the stored arrays change
+ENGINE_STATE_VERSION = 2
+
+
+def save_engine_state(directory: str, graph: nx.DiGraph, coordinates_ids: SpatialHash, last_id: int,
+                      osm_node_ids: dict = None, dirty_edges: dict = None) -> None:
+    """
+    Save the engine state into a folder with an uncompressed NumPy file per array, so they can be memory-mapped: the
+    memory graph as CSR node and relation columns (NaN or -1 for the unknown values, string attributes as codes of a
+    strings table), the spatial hash of the coordinates identifiers, the last identifier used, the OSM node
+    identifiers index and the relations pending of the graph info extension. The folder is replaced once it is
+    completely written.
+
+    :param directory: state folder
+    :type directory: str
+    :param graph: memory graph
+    :type graph: nx.DiGraph
+    :param coordinates_ids: spatial hash with the identifier of the coordinates
+    :type coordinates_ids: SpatialHash
+    :param last_id: last identifier used
+    :type last_id: int
+    :param osm_node_ids: graph node identifier by OSM node identifier. Default None (empty).
+    :type osm_node_ids: dict
+    :param dirty_edges: relations (source, target) pending of the graph info extension. Default None (empty).
+    :type dirty_edges: dict
+    :return: None
+    """
+    osm_node_ids = osm_node_ids if osm_node_ids is not None else {}
+    dirty_edges = dirty_edges if dirty_edges is not None else {}
+
+    node_ids = list(graph.nodes)
+    node_index = {node_id: position for position, node_id in enumerate(node_ids)}
+    nodes = [graph.nodes[node_id] for node_id in node_ids]
+    # Relations are iterated by source node, in the same order as the nodes (as the graph snapshot)
+    relations = [(v, data) for successors in graph.succ.values() for v, data in successors.items()]
+    out_degrees = np.fromiter((len(graph.succ[node_id]) for node_id in node_ids), dtype=np.int64,
+                              count=len(node_ids))
+
+    arrays = {'version': np.array(ENGINE_STATE_VERSION), 'last_id': np.array(last_id),
+              'tolerance': np.array(coordinates_ids.tolerance),
+              'node_ids': np.array(node_ids, dtype=str),
+              'lats': np.array([node['lat'] for node in nodes], dtype=np.float64).reshape(-1),
+              'lons': np.array([node['lon'] for node in nodes], dtype=np.float64).reshape(-1),
+              'heights': np.array([np.nan if node['height'] is None else node['height'] for node in nodes],
+                                  dtype=np.float64).reshape(-1),
+              'indptr': np.concatenate([[0], np.cumsum(out_degrees)]).astype(np.int64),
+              'indices': np.array([node_index[v] for v, _ in relations], dtype=np.int32).reshape(-1)}
+
+    arrays.update({f'column_{key}': np.array([np.nan if data[key] is None else data[key] for _, data in relations],
+                                             dtype=np.float64).reshape(-1) for key in FLOAT_ATTRIBUTES})
+    arrays['column_lanes'] = np.array([-1 if data['lanes'] is None else data['lanes'] for _, data in relations],
+                                      dtype=np.int32).reshape(-1)
+    arrays['column_congestion'] = np.array([-1 if data['congestion'] is None else data['congestion']
+                                            for _, data in relations], dtype=np.int8).reshape(-1)
+
+    # Encode the string attributes with a shared table, unknown values as -1
+    codes, strings = pd.factorize(np.array([data[key] for key in STRING_ATTRIBUTES for _, data in relations],
+                                           dtype=object))
+    for position, key in enumerate(STRING_ATTRIBUTES):
+        arrays[f'column_{key}'] = codes[position * len(relations):(position + 1) * len(relations)].astype(np.int32)
+    arrays['strings'] = np.array(list(strings), dtype=str)
+
+    coordinates = list(coordinates_ids.items())
+    arrays.update({'coordinates_lats': np.array([lat for lat, _, _ in coordinates], dtype=np.float64).reshape(-1),
+                   'coordinates_lons': np.array([lon for _, lon, _ in coordinates], dtype=np.float64).reshape(-1),
+                   'coordinates_ids': np.array([value for _, _, value in coordinates], dtype=str),
+                   'osm_ids': np.array(list(osm_node_ids), dtype=str),
+                   'osm_node_ids': np.array(list(osm_node_ids.values()), dtype=str),
+                   'dirty_sources': np.array([node_index[u] for u, _ in dirty_edges], dtype=np.int32).reshape(-1),
+                   'dirty_targets': np.array([node_index[v] for _, v in dirty_edges], dtype=np.int32).reshape(-1)})
+
+    # Write a temporary folder and then replace the previous one
+    directory = os.path.normpath(directory)
+    temporary_directory, previous_directory = f'{directory}.tmp', f'{directory}.old'
+    shutil.rmtree(temporary_directory, ignore_errors=True)
+    os.makedirs(temporary_directory)
+    for name, array in arrays.items():
+        np.save(os.path.join(temporary_directory, f'{name}.npy'), array)
+
+    shutil.rmtree(previous_directory, ignore_errors=True)
+    if os.path.exists(directory):
+        os.replace(directory, previous_directory)
+    os.replace(temporary_directory, directory)
+    shutil.rmtree(previous_directory, ignore_errors=True)
+
+
+def get_values(array: np.ndarray, unknown: np.ndarray = None) -> list:
+    """
+    Get the values of an array as a list of Python objects, with None for the unknown ones
+
+    :param array: array of values
+    :type array: np.ndarray
+    :param unknown: mask of the unknown values. Default None (all of them are known).
+    :type unknown: np.ndarray
+    :return: list of values
+    :rtype: list
+    """
+    values = array.astype(object)
+    if unknown is not None:
+        values[unknown] = None
+
+    return values.tolist()
+
+
+class EngineState:
+    """
+    Engine state saved by a previous run, whose arrays are memory-mapped. The graph snapshot is served from the
+    mapped arrays, while the memory graph and the spatial hash of the coordinates identifiers are only created when
+    they are required (e.g. to modify the graph).
+
+    :param arrays: state arrays by name
+    :type arrays: dict
+    """
+
+    def __init__(self, arrays: dict):
+        if int(arrays['version']) != ENGINE_STATE_VERSION:
+            raise ValueError(f'Engine state version {int(arrays["version"])} is not supported, expected '
+                             f'{ENGINE_STATE_VERSION}')
+
+        self._arrays = arrays
+        self.tolerance = float(arrays['tolerance'])
+        self.last_id = int(arrays['last_id'])
+        self.node_ids = arrays['node_ids'].tolist()
+        # Unknown strings (code -1) are the last item of the table
+        self.strings = arrays['strings'].tolist() + [None]
+
+        self.osm_node_ids = dict(zip(arrays['osm_ids'].tolist(), arrays['osm_node_ids'].tolist()))
+        self.dirty_edges = dict.fromkeys(zip([self.node_ids[u] for u in arrays['dirty_sources'].tolist()],
+                                             [self.node_ids[v] for v in arrays['dirty_targets'].tolist()]))
+
+    def get_snapshot(self) -> GraphSnapshot:
+        """
+        Get the graph snapshot of the state, over the mapped arrays
+
+        :return: graph snapshot
+        :rtype: GraphSnapshot
+        """
+        arrays = self._arrays
+        columns = {key: arrays[f'column_{key}'].astype(np.float32) for key in FLOAT_ATTRIBUTES}
+        columns['congestion'] = arrays['column_congestion']
+        columns['lanes'] = np.maximum(arrays['column_lanes'], 0).astype(np.int16)
+        columns.update({key: arrays[f'column_{key}'] for key in STRING_ATTRIBUTES})
+
+        return GraphSnapshot(self.node_ids, arrays['lats'], arrays['lons'], arrays['heights'], arrays['indptr'],
+                             arrays['indices'], columns, self.strings)
+
+    def get_node(self, node: int) -> dict:
+        """
+        Get the information of a node
+
+        :param node: node position
+        :type node: int
+        :return: node information (lat, lon and height)
+        :rtype: dict
+        """
+        height = float(self._arrays['heights'][node])
+
+        return {'lat': float(self._arrays['lats'][node]), 'lon': float(self._arrays['lons'][node]),
+                'height': None if np.isnan(height) else height}
+
+    def get_relation(self, edge: int) -> dict:
+        """
+        Get the information of a relation
+
+        :param edge: relation position
+        :type edge: int
+        :return: relation information
+        :rtype: dict
+        """
+        relation = {}
+        for key in FLOAT_ATTRIBUTES:
+            value = float(self._arrays[f'column_{key}'][edge])
+            relation[key] = None if np.isnan(value) else value
+        for key in ('lanes', 'congestion'):
+            value = int(self._arrays[f'column_{key}'][edge])
+            relation[key] = None if value < 0 else value
+        relation.update({key: self.strings[self._arrays[f'column_{key}'][edge]] for key in STRING_ATTRIBUTES})
+
+        return relation
+
+    def get_graph(self) -> nx.DiGraph:
+        """
+        Create the memory graph of the state
+
+        :return: memory graph
+        :rtype: nx.DiGraph
+        """
+        arrays = self._arrays
+        node_ids = np.array(self.node_ids, dtype=object)
+        strings = np.array(self.strings, dtype=object)
+
+        # Unknown values are stored as NaN or -1
+        columns = {key: get_values(arrays[f'column_{key}'], np.isnan(arrays[f'column_{key}']))
+                   for key in FLOAT_ATTRIBUTES}
+        columns.update({key: get_values(arrays[f'column_{key}'], arrays[f'column_{key}'] < 0)
+                        for key in ('lanes', 'congestion')})
+        columns.update({key: get_values(strings[arrays[f'column_{key}']]) for key in STRING_ATTRIBUTES})
+
+        graph = nx.DiGraph()
+        heights = get_values(arrays['heights'], np.isnan(arrays['heights']))
+        graph.add_nodes_from((node_id, {'lat': lat, 'lon': lon, 'height': height})
+                             for node_id, lat, lon, height in zip(self.node_ids, arrays['lats'].tolist(),
+                                                                  arrays['lons'].tolist(), heights))
+        sources = np.repeat(np.arange(len(node_ids)), np.diff(arrays['indptr']))
+        keys = list(columns)
+        graph.add_edges_from(zip(node_ids[sources].tolist(), node_ids[arrays['indices']].tolist(),
+                                 (dict(zip(keys, values)) for values in zip(*columns.values()))))
+
+        return graph
+
+    def get_coordinates_ids(self) -> SpatialHash:
+        """
+        Create the spatial hash of the coordinates identifiers of the state
+
+        :return: spatial hash with the identifier of the coordinates
+        :rtype: SpatialHash
+        """
+        coordinates_ids = SpatialHash(self.tolerance)
+        for lat, lon, value in zip(self._arrays['coordinates_lats'].tolist(),
+                                   self._arrays['coordinates_lons'].tolist(),
+                                   self._arrays['coordinates_ids'].tolist()):
+            coordinates_ids.add(lat, lon, value)
+
+        return coordinates_ids
+
+
+def load_engine_state(directory: str) -> EngineState:
+    """
+    Load the engine state from a folder, memory-mapping its arrays
+
+    :param directory: state folder
+    :type directory: str
+    :return: engine state
+    :rtype: EngineState
+    """
+    return EngineState({file_name[:-len('.npy')]: np.load(os.path.join(directory, file_name), mmap_mode='r')
+                        for file_name in os.listdir(directory) if file_name.endswith('.npy')})
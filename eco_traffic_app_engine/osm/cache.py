@@ -0,0 +1,201 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+
+from eco_traffic_app_engine.graph.models import Coords
+from eco_traffic_app_engine.static.constants import REVERSE_GEOCODE_CACHE_FILE, REVERSE_GEOCODE_CACHE_GRID, \
+    REVERSE_GEOCODE_CACHE_MAX_ENTRIES
+
+
+class ReverseGeocodeCache:
+    """
+    Persistent (SQLite) cache of reverse geocode results, keyed by the coordinates quantized to a grid and with LRU
+    eviction once the maximum number of entries is exceeded
+
+    :param file_path: SQLite database file
+    :type file_path: str
+    :param grid_size: size of the quantization grid in degrees
+    :type grid_size: float
+    :param max_entries: maximum number of stored entries
+    :type max_entries: int
+    """
+
+    def __init__(self, file_path: str = REVERSE_GEOCODE_CACHE_FILE, grid_size: float = REVERSE_GEOCODE_CACHE_GRID,
+                 max_entries: int = REVERSE_GEOCODE_CACHE_MAX_ENTRIES):
+        self._grid_size = grid_size
+        self._max_entries = max_entries
+
+        # Create the cache folder if it does not exist
+        if os.path.dirname(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        # The connection is shared by the lookup threads
+        self._connection = sqlite3.connect(file_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS reverse_geocode (lat_key INTEGER, lon_key INTEGER, '
+                                     'result TEXT, last_access INTEGER, PRIMARY KEY (lat_key, lon_key))')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS reverse_geocode_access '
+                                     'ON reverse_geocode (last_access)')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS metadata (grid_size REAL)')
+
+            # Keys of a different grid are not comparable -> Remove the stored entries
+            stored_grid = self._connection.execute('SELECT grid_size FROM metadata').fetchone()
+            if stored_grid is None or stored_grid[0] != grid_size:
+                self._connection.execute('DELETE FROM reverse_geocode')
+                self._connection.execute('DELETE FROM metadata')
+                self._connection.execute('INSERT INTO metadata VALUES (?)', (grid_size,))
+
+        # Access counter used as LRU clock, continuing from the stored entries
+        self._clock = self._connection.execute('SELECT COALESCE(MAX(last_access), 0) FROM reverse_geocode')\
+            .fetchone()[0]
+
+        # Hit and miss counters
+        self._hits = 0
+        self._misses = 0
+
+    def get_key(self, coordinates: Coords) -> tuple:
+        """
+        Get the quantized key of the coordinates
+
+        :param coordinates: coordinates
+        :type coordinates: Coords
+        :return: latitude and longitude grid indices
+        :rtype: tuple
+        """
+        return math.floor(coordinates.lat / self._grid_size + 0.5), math.floor(coordinates.lon / self._grid_size + 0.5)
+
+    def get(self, coordinates: Coords):
+        """
+        Get the cached result of the coordinates
+
+        :param coordinates: coordinates
+        :type coordinates: Coords
+        :return: cached result or None if it is not stored
+        """
+        return self.get_many([coordinates])[0]
+
+    def get_many(self, route_coordinates: list) -> list:
+        """
+        Get the cached results of several coordinates
+
+        :param route_coordinates: list of coordinates
+        :type route_coordinates: list
+        :return: list with the cached results, None for those not stored
+        :rtype: list
+        """
+        results = []
+        keys = [self.get_key(coordinates) for coordinates in route_coordinates]
+
+        with self._lock, self._connection:
+            accessed = []
+            for lat_key, lon_key in keys:
+                row = self._connection.execute('SELECT result FROM reverse_geocode WHERE lat_key = ? AND lon_key = ?',
+                                               (lat_key, lon_key)).fetchone()
+                if row is not None:
+                    self._hits += 1
+                    self._clock += 1
+                    accessed.append((self._clock, lat_key, lon_key))
+                    results.append(json.loads(row[0]))
+                else:
+                    self._misses += 1
+                    results.append(None)
+
+            # Update the access time of the hits
+            self._connection.executemany('UPDATE reverse_geocode SET last_access = ? WHERE lat_key = ? AND lon_key = ?',
+                                         accessed)
+
+        return results
+
+    def put(self, coordinates: Coords, result: dict) -> None:
+        """
+        Store the result of the coordinates
+
+        :param coordinates: coordinates
+        :type coordinates: Coords
+        :param result: reverse geocode result
+        :type result: dict
+        :return: None
+        """
+        self.put_many([coordinates], [result])
+
+    def put_many(self, route_coordinates: list, results: list) -> None:
+        """
+        Store the results of several coordinates. Only the "extratags" of each result are stored, and the results of
+        failed lookups (None or an "error" response) are skipped.
+
+        :param route_coordinates: list of coordinates
+        :type route_coordinates: list
+        :param results: reverse geocode results, None for the failed lookups
+        :type results: list
+        :return: None
+        """
+        rows = []
+        with self._lock, self._connection:
+            for coordinates, result in zip(route_coordinates, results):
+                if result is None or 'error' in result:
+                    continue
+                self._clock += 1
+                # Store only the way tags to keep the entries small
+                value = {'extratags': result['extratags']} if 'extratags' in result else {}
+                rows.append((*self.get_key(coordinates), json.dumps(value), self._clock))
+
+            self._connection.executemany('INSERT OR REPLACE INTO reverse_geocode VALUES (?, ?, ?, ?)', rows)
+
+            # Evict the least recently used entries exceeding the size limit
+            exceeding = self._connection.execute('SELECT COUNT(*) FROM reverse_geocode').fetchone()[0] \
+                - self._max_entries
+            if exceeding > 0:
+                self._connection.execute('DELETE FROM reverse_geocode WHERE rowid IN (SELECT rowid FROM '
+                                         'reverse_geocode ORDER BY last_access LIMIT ?)', (exceeding,))
+
+    def clear(self) -> None:
+        """
+        Remove all the cached results and reset the counters
+
+        :return: None
+        """
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM reverse_geocode')
+        self._hits = self._misses = 0
+
+    def close(self) -> None:
+        """
+        Close the cache database
+
+        :return: None
+        """
+        self._connection.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM reverse_geocode').fetchone()[0]
+
+    @property
+    def hits(self):
+        """
+        Getter of hits counter
+
+        :return: number of hits
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        Getter of misses counter
+
+        :return: number of misses
+        """
+        return self._misses
+
+    @property
+    def max_entries(self):
+        """
+        Getter of maximum number of entries
+
+        :return: maximum number of entries
+        """
+        return self._max_entries
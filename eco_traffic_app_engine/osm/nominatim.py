@@ -0,0 +1,163 @@
+import copy
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from eco_traffic_app_engine.graph.models import Coords
+from eco_traffic_app_engine.osm.cache import ReverseGeocodeCache
+from eco_traffic_app_engine.static.constants import NOMINATIM_API_URL, NOMINATIM_ADD_PARAMS, NOMINATIM_MAX_WORKERS, \
+    NOMINATIM_REQUESTS_PER_SECOND, NOMINATIM_TIMEOUT
+
+
+class NominatimRetriever:
+    """
+    Nominatim reverse lookups performed concurrently over a pooled session
+
+    :param max_workers: maximum number of concurrent requests
+    :type max_workers: int
+    :param requests_per_second: maximum number of requests per second, 0 for no limit
+    :type requests_per_second: float
+    :param timeout: timeout of each request in seconds
+    :type timeout: float
+    :param cache: persistent cache of the lookups. Default None (no cache).
+    :type cache: ReverseGeocodeCache
+    """
+
+    def __init__(self, max_workers: int = NOMINATIM_MAX_WORKERS,
+                 requests_per_second: float = NOMINATIM_REQUESTS_PER_SECOND, timeout: float = NOMINATIM_TIMEOUT,
+                 cache: ReverseGeocodeCache = None):
+        self._max_workers = max_workers
+        self._timeout = timeout
+        self._cache = cache
+
+        # Create a session with a connection pool sized to the number of workers
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+        # Rate limit as a minimum interval between consecutive requests
+        self._min_interval = 1 / requests_per_second if requests_per_second else 0
+        self._next_request_time = 0.0
+        self._lock = threading.Lock()
+
+    def _wait_rate_limit(self) -> None:
+        """
+        Wait until a new request can be performed based on the rate limit
+
+        :return: None
+        """
+        if self._min_interval:
+            # Reserve the next request slot
+            with self._lock:
+                now = time.monotonic()
+                request_time = max(now, self._next_request_time)
+                self._next_request_time = request_time + self._min_interval
+            # Sleep outside the lock until the slot arrives
+            if request_time > now:
+                time.sleep(request_time - now)
+
+    def reverse(self, coordinates: Coords) -> dict:
+        """
+        Perform a reverse lookup of the given coordinates
+
+        :param coordinates: coordinates to lookup
+        :type coordinates: Coords
+        :return: Nominatim response
+        :rtype: dict
+        """
+        # Append the coordinates to the query
+        request_str = NOMINATIM_API_URL + "lat=" + str(coordinates.lat) + "&lon=" + str(
+            coordinates.lon) + NOMINATIM_ADD_PARAMS
+
+        self._wait_rate_limit()
+
+        # Perform request, raising the HTTP errors, and parse to json
+        response = self._session.get(url=request_str, timeout=self._timeout)
+        response.raise_for_status()
+
+        return response.json()
+
+    def try_reverse(self, coordinates: Coords):
+        """
+        Perform a reverse lookup of the given coordinates, without raising the errors of the request
+
+        :param coordinates: coordinates to lookup
+        :type coordinates: Coords
+        :return: Nominatim response, None if the request fails
+        """
+        try:
+            return self.reverse(coordinates)
+        except (requests.RequestException, ValueError):
+            return None
+
+    def reverse_many(self, route_coordinates: list) -> list:
+        """
+        Perform the reverse lookups of all the coordinates concurrently, keeping the input order. If there is a cache,
+        only the coordinates not cached are requested, once per quantized key. Failed lookups get an empty response
+        (without ways information) and they are not cached, so they are requested again on the next lookups.
+
+        :param route_coordinates: coordinates to lookup
+        :type route_coordinates: list
+        :return: list with the Nominatim responses
+        :rtype: list
+        """
+        if self._cache is None:
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                return [response if response is not None else {}
+                        for response in executor.map(self.try_reverse, route_coordinates)]
+
+        # Retrieve the cached results
+        results = self._cache.get_many(route_coordinates)
+
+        # Get the coordinates not cached, grouped by their quantized key
+        missing = {}
+        for idx, (coordinates, result) in enumerate(zip(route_coordinates, results)):
+            if result is None:
+                missing.setdefault(self._cache.get_key(coordinates), []).append(idx)
+
+        if missing:
+            # Request only the first coordinates of each key
+            request_coordinates = [route_coordinates[indices[0]] for indices in missing.values()]
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                responses = list(executor.map(self.try_reverse, request_coordinates))
+
+            # Store the new results, only the successful ones
+            self._cache.put_many(request_coordinates, responses)
+            responses = [response if response is not None else {} for response in responses]
+
+            # Each coordinates gets its own copy as the results are modified afterwards
+            for indices, response in zip(missing.values(), responses):
+                for idx in indices:
+                    results[idx] = copy.deepcopy(response)
+
+        return results
+
+    def close(self) -> None:
+        """
+        Close the pooled session
+
+        :return: None
+        """
+        self._session.close()
+
+    @property
+    def signature(self) -> str:
+        """
+        Getter of the retriever signature: its name and the lookups URL
+
+        :return: retriever signature
+        """
+        return f'{type(self).__name__}:{NOMINATIM_API_URL}{NOMINATIM_ADD_PARAMS}'
+
+    @property
+    def cache(self):
+        """
+        Getter of cache
+
+        :return: reverse geocode cache
+        """
+        return self._cache
@@ -0,0 +1,313 @@
+import hashlib
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import shapely
+from shapely.strtree import STRtree
+
+from eco_traffic_app_engine.graph.models import Segment, get_coordinates_arrays
+from eco_traffic_app_engine.static.constants import WAY_INDEX_MAX_DISTANCE, METERS_PER_DEGREE, DEFAULT_WAYS_VALUES
+
+
+def parse_int_tag(value) -> int:
+    """
+    Parse an integer OSM tag value (e.g. maxspeed or lanes), -1 if it is not defined or not numeric
+
+    :param value: tag value
+    :return: integer value or -1
+    :rtype: int
+    """
+    return int(value) if value is not None and value.isdigit() else -1
+
+
+class OSMWayIndex:
+    """
+    Offline index of the OSM ways (highways) of an extract: the way geometries are stored in a STRtree and their
+    attributes in a compact table of arrays, where strings are codes of a shared strings table
+
+    :param way_ids: OSM identifier of each way
+    :type way_ids: np.ndarray
+    :param coordinates: (lon, lat) coordinates of all the ways, concatenated
+    :type coordinates: np.ndarray
+    :param offsets: position of the first coordinates of each way (plus the total number of coordinates)
+    :type offsets: np.ndarray
+    :param max_speeds: maximum speed of each way, -1 if unknown
+    :type max_speeds: np.ndarray
+    :param lanes: number of lanes of each way, -1 if unknown
+    :type lanes: np.ndarray
+    :param highways: highway type code of each way
+    :type highways: np.ndarray
+    :param names: name code of each way
+    :type names: np.ndarray
+    :param surfaces: surface code of each way
+    :type surfaces: np.ndarray
+    :param strings: strings table of the codes
+    :type strings: list
+    """
+
+    def __init__(self, way_ids: np.ndarray, coordinates: np.ndarray, offsets: np.ndarray, max_speeds: np.ndarray,
+                 lanes: np.ndarray, highways: np.ndarray, names: np.ndarray, surfaces: np.ndarray, strings: list):
+        self._way_ids = np.asarray(way_ids, dtype=np.int64)
+        self._coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        self._offsets = np.asarray(offsets, dtype=np.int64)
+        self._max_speeds = np.asarray(max_speeds, dtype=np.int32)
+        self._lanes = np.asarray(lanes, dtype=np.int16)
+        self._highways = np.asarray(highways, dtype=np.int32)
+        self._names = np.asarray(names, dtype=np.int32)
+        self._surfaces = np.asarray(surfaces, dtype=np.int32)
+        self._strings = list(strings)
+
+        # Build the way geometries and the spatial index
+        geometries = shapely.linestrings(self._coordinates,
+                                         indices=np.repeat(np.arange(len(self._way_ids)), np.diff(self._offsets)))
+        self._tree = STRtree(geometries)
+
+        # Hash of the index content, calculated when it is first required
+        self._signature = None
+
+    @classmethod
+    def from_ways(cls, ways: list):
+        """
+        Create the index from a list of ways
+
+        :param ways: list of (way id, list of (lon, lat) coordinates, tags dict)
+        :type ways: list
+        :return: OSM way index
+        :rtype: OSMWayIndex
+        """
+        # Strings table, empty string is always the code 0
+        strings, codes = [''], {'': 0}
+
+        def get_code(value: str) -> int:
+            if value not in codes:
+                codes[value] = len(strings)
+                strings.append(value)
+            return codes[value]
+
+        columns = {'way_ids': [], 'coordinates': [], 'offsets': [0], 'max_speeds': [], 'lanes': [], 'highways': [],
+                   'names': [], 'surfaces': []}
+        for way_id, coordinates, tags in ways:
+            # Ways without a line geometry are not indexed
+            if len(coordinates) < 2:
+                continue
+            columns['way_ids'].append(way_id)
+            columns['coordinates'] += coordinates
+            columns['offsets'].append(len(columns['coordinates']))
+            columns['max_speeds'].append(parse_int_tag(tags.get('maxspeed')))
+            columns['lanes'].append(parse_int_tag(tags.get('lanes')))
+            columns['highways'].append(get_code(tags.get('highway', '')))
+            columns['names'].append(get_code(tags.get('name', '')))
+            columns['surfaces'].append(get_code(tags.get('surface', '')))
+
+        return cls(strings=strings, **columns)
+
+    @classmethod
+    def from_osm_file(cls, file_path: str):
+        """
+        Create the index from the highways of an OSM extract (XML or PBF, which requires pyosmium)
+
+        :param file_path: OSM extract file
+        :type file_path: str
+        :return: OSM way index
+        :rtype: OSMWayIndex
+        """
+        if file_path.endswith('.pbf'):
+            return cls.from_ways(cls.read_pbf_ways(file_path))
+
+        nodes, ways = {}, []
+        # Stream the XML file, nodes are defined before the ways
+        for _, element in ET.iterparse(file_path, events=('end',)):
+            if element.tag == 'node':
+                nodes[int(element.get('id'))] = (float(element.get('lon')), float(element.get('lat')))
+                element.clear()
+            elif element.tag == 'way':
+                tags = {tag.get('k'): tag.get('v') for tag in element.iter('tag')}
+                if 'highway' in tags:
+                    coordinates = [nodes[int(nd.get('ref'))] for nd in element.iter('nd')
+                                   if int(nd.get('ref')) in nodes]
+                    ways.append((int(element.get('id')), coordinates, tags))
+                element.clear()
+
+        return cls.from_ways(ways)
+
+    @staticmethod
+    def read_pbf_ways(file_path: str) -> list:
+        """
+        Read the highways of an OSM PBF extract
+
+        :param file_path: OSM PBF extract file
+        :type file_path: str
+        :return: list of (way id, list of (lon, lat) coordinates, tags dict)
+        :rtype: list
+        """
+        try:
+            import osmium
+        except ImportError:
+            raise ImportError('pyosmium is required to read OSM PBF extracts')
+
+        ways = []
+
+        class WaysHandler(osmium.SimpleHandler):
+            def way(self, way):
+                if 'highway' in way.tags:
+                    ways.append((way.id, [(node.lon, node.lat) for node in way.nodes if node.location.valid()],
+                                 {tag.k: tag.v for tag in way.tags}))
+
+        WaysHandler().apply_file(file_path, locations=True)
+
+        return ways
+
+    @classmethod
+    def load(cls, file_path: str):
+        """
+        Load the index from a NumPy file
+
+        :param file_path: index file
+        :type file_path: str
+        :return: OSM way index
+        :rtype: OSMWayIndex
+        """
+        with np.load(file_path) as data:
+            return cls(way_ids=data['way_ids'], coordinates=data['coordinates'], offsets=data['offsets'],
+                       max_speeds=data['max_speeds'], lanes=data['lanes'], highways=data['highways'],
+                       names=data['names'], surfaces=data['surfaces'], strings=data['strings'].tolist())
+
+    def save(self, file_path: str) -> None:
+        """
+        Save the index into a NumPy file
+
+        :param file_path: index file
+        :type file_path: str
+        :return: None
+        """
+        np.savez(file_path, way_ids=self._way_ids, coordinates=self._coordinates, offsets=self._offsets,
+                 max_speeds=self._max_speeds, lanes=self._lanes, highways=self._highways, names=self._names,
+                 surfaces=self._surfaces, strings=np.array(self._strings, dtype=str))
+
+    def snap(self, lats: np.ndarray, lons: np.ndarray, max_distance: float = WAY_INDEX_MAX_DISTANCE) -> np.ndarray:
+        """
+        Snap all the coordinates to their nearest way with a single query
+
+        :param lats: latitudes
+        :type lats: np.ndarray
+        :param lons: longitudes
+        :type lons: np.ndarray
+        :param max_distance: maximum snapping distance in meters
+        :type max_distance: float
+        :return: position of the nearest way of each coordinates, -1 if there is no way within the distance
+        :rtype: np.ndarray
+        """
+        positions = np.full(len(lats), -1, dtype=np.int64)
+        if not len(lats) or not len(self._way_ids):
+            return positions
+
+        points = shapely.points(np.asarray(lons, dtype=np.float64), np.asarray(lats, dtype=np.float64))
+        # Distance approximated in degrees
+        input_indices, tree_indices = self._tree.query_nearest(points, max_distance=max_distance / METERS_PER_DEGREE)
+
+        # Keep only the first way for those coordinates equidistant to several ways
+        input_indices, first = np.unique(input_indices, return_index=True)
+        positions[input_indices] = tree_indices[first]
+
+        return positions
+
+    def snap_coordinates(self, route_coordinates: list, max_distance: float = WAY_INDEX_MAX_DISTANCE) -> np.ndarray:
+        """
+        Snap the route coordinates to their nearest way
+
+        :param route_coordinates: route coordinates
+        :type route_coordinates: list
+        :param max_distance: maximum snapping distance in meters
+        :type max_distance: float
+        :return: position of the nearest way of each coordinates, -1 if there is no way within the distance
+        :rtype: np.ndarray
+        """
+        lats, lons = get_coordinates_arrays(route_coordinates)
+
+        return self.snap(lats, lons, max_distance)
+
+    def get_way_extratags(self, position: int) -> dict:
+        """
+        Get the tags of a way with the same format as the Nominatim responses
+
+        :param position: position of the way in the index, -1 if there is no way
+        :type position: int
+        :return: dict with the "extratags" only if there is a way
+        :rtype: dict
+        """
+        if position < 0:
+            return {}
+
+        extratags = {}
+        if self._max_speeds[position] >= 0:
+            extratags['maxspeed'] = str(self._max_speeds[position])
+        if self._lanes[position] >= 0:
+            extratags['lanes'] = str(self._lanes[position])
+        for key, codes in (('highway', self._highways), ('name', self._names), ('surface', self._surfaces)):
+            if codes[position]:
+                extratags[key] = self._strings[codes[position]]
+
+        return {'extratags': extratags}
+
+    def get_extratags(self, route_coordinates: list) -> list:
+        """
+        Get the way tags of the route coordinates with the same format as the Nominatim responses
+
+        :param route_coordinates: route coordinates
+        :type route_coordinates: list
+        :return: list with a dict per coordinates
+        :rtype: list
+        """
+        return [self.get_way_extratags(position) for position in self.snap_coordinates(route_coordinates).tolist()]
+
+    def get_segment(self, position: int) -> Segment:
+        """
+        Get the segment information of a way
+
+        :param position: position of the way in the index, -1 for default values
+        :type position: int
+        :return: segment information
+        :rtype: Segment
+        """
+        if position < 0:
+            return Segment()
+
+        return Segment(way_id=str(self._way_ids[position]),
+                       max_speed=float(self._max_speeds[position]) if self._max_speeds[position] >= 0
+                       else DEFAULT_WAYS_VALUES['max_speed'],
+                       lanes=int(self._lanes[position]) if self._lanes[position] >= 0
+                       else DEFAULT_WAYS_VALUES['lanes'],
+                       highway=self._strings[self._highways[position]], name=self._strings[self._names[position]],
+                       surface=self._strings[self._surfaces[position]])
+
+    def get_segments(self, route_coordinates: list) -> list:
+        """
+        Get the segment information of the nearest way of each route coordinates
+
+        :param route_coordinates: route coordinates
+        :type route_coordinates: list
+        :return: list of Segment
+        :rtype: list
+        """
+        return [self.get_segment(position) for position in self.snap_coordinates(route_coordinates).tolist()]
+
+    def __len__(self):
+        return len(self._way_ids)
+
+    @property
+    def signature(self) -> str:
+        """
+        Getter of the index signature: its name and the hash of its ways, which identifies the extract it was
+        created from
+
+        :return: index signature
+        """
+        if self._signature is None:
+            content = hashlib.sha256()
+            for array in (self._way_ids, self._coordinates, self._offsets, self._max_speeds, self._lanes,
+                          self._highways, self._names, self._surfaces):
+                content.update(np.ascontiguousarray(array).tobytes())
+            content.update('\0'.join(self._strings).encode())
+            self._signature = f'{type(self).__name__}:{content.hexdigest()}'
+
+        return self._signature
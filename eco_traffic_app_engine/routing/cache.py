@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from eco_traffic_app_engine.static.constants import ROUTER_CACHE_FILE, ROUTER_CACHE_TTL, ROUTER_CACHE_MAX_BYTES, \
+    ROUTER_CACHE_PRECISION
+
+# Version of the routes processing, increased when the processed routes of the same query change
+ROUTE_PROCESSING_VERSION = 1
+
+
+def get_process_signature(process_params: dict = None) -> dict:
+    """
+    Get a stable signature of the routes processing configuration: the processing version and the signature of each
+    processing component (e.g. height provider or way index), which includes its data source, or its value if it is
+    a plain value
+
+    :param process_params: additional parameters of the routes processing. Default None (empty).
+    :type process_params: dict
+    :return: processing signature
+    :rtype: dict
+    """
+    signature = {'version': ROUTE_PROCESSING_VERSION}
+    for key, value in (process_params or {}).items():
+        # Unset components are the same as the default ones
+        if value is None:
+            continue
+        if isinstance(value, (bool, int, float, str)):
+            signature[key] = value
+        else:
+            signature[key] = getattr(value, 'signature', type(value).__name__)
+
+    return signature
+
+
+class RouterCache:
+    """
+    Persistent (SQLite) content-addressed cache of the routing services responses. Each entry is keyed by the
+    provider, the rounded coordinates, the query params and the processing signature, and stores both the raw routes
+    of the response and the processed routes. Entries expire after a TTL and the least recently used ones are evicted
+    over the size limit.
+
+    :param file_path: SQLite database file
+    :type file_path: str
+    :param ttl: time to live of the entries in seconds
+    :type ttl: float
+    :param max_bytes: maximum size of the stored entries in bytes
+    :type max_bytes: int
+    :param precision: number of decimals of the rounded coordinates
+    :type precision: int
+    """
+
+    def __init__(self, file_path: str = ROUTER_CACHE_FILE, ttl: float = ROUTER_CACHE_TTL,
+                 max_bytes: int = ROUTER_CACHE_MAX_BYTES, precision: int = ROUTER_CACHE_PRECISION):
+        self._ttl = ttl
+        self._max_bytes = max_bytes
+        self._precision = precision
+
+        # Create the cache folder if it does not exist
+        if os.path.dirname(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        # The connection can be shared by several threads (e.g. routing services fan-out)
+        self._connection = sqlite3.connect(file_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS routes (key TEXT PRIMARY KEY, created REAL, '
+                                     'last_access REAL, size INTEGER, raw TEXT, processed BLOB)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS routes_access ON routes (last_access)')
+
+        # Hit and miss counters
+        self._hits = 0
+        self._misses = 0
+
+    def get_key(self, provider: str, coords: list, params: dict, process_params: dict = None) -> str:
+        """
+        Get the content address of a query
+
+        :param provider: routing service name
+        :type provider: str
+        :param coords: list of Coords of the query
+        :type coords: list
+        :param params: query params
+        :type params: dict
+        :param process_params: additional parameters of the routes processing. Default None (empty).
+        :type process_params: dict
+        :return: SHA-256 of the query
+        :rtype: str
+        """
+        query = {'provider': provider,
+                 'coords': [[round(item.lat, self._precision), round(item.lon, self._precision)]
+                            for item in (coords or [])],
+                 'params': params,
+                 'process': get_process_signature(process_params)}
+
+        return hashlib.sha256(json.dumps(query, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, provider: str, coords: list, params: dict, process_params: dict = None):
+        """
+        Get the cached routes of a query
+
+        :param provider: routing service name
+        :type provider: str
+        :param coords: list of Coords of the query
+        :type coords: list
+        :param params: query params
+        :type params: dict
+        :param process_params: additional parameters of the routes processing. Default None (empty).
+        :type process_params: dict
+        :return: dict with the raw and processed routes, or None if they are not stored or expired
+        """
+        key = self.get_key(provider, coords, params, process_params)
+        now = time.time()
+
+        with self._lock, self._connection:
+            row = self._connection.execute('SELECT created, raw, processed FROM routes WHERE key = ?',
+                                           (key,)).fetchone()
+
+            # Remove the expired entries
+            if row is not None and now - row[0] > self._ttl:
+                self._connection.execute('DELETE FROM routes WHERE key = ?', (key,))
+                row = None
+
+            if row is None:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            self._connection.execute('UPDATE routes SET last_access = ? WHERE key = ?', (now, key))
+
+        return {'raw': json.loads(row[1]), 'processed': pickle.loads(row[2])}
+
+    def put(self, provider: str, coords: list, params: dict, raw_routes: list, processed_routes: list,
+            process_params: dict = None) -> None:
+        """
+        Store the routes of a query
+
+        :param provider: routing service name
+        :type provider: str
+        :param coords: list of Coords of the query
+        :type coords: list
+        :param params: query params
+        :type params: dict
+        :param raw_routes: routes of the routing service response
+        :type raw_routes: list
+        :param processed_routes: processed routes
+        :type processed_routes: list
+        :param process_params: additional parameters of the routes processing. Default None (empty).
+        :type process_params: dict
+        :return: None
+        """
+        key = self.get_key(provider, coords, params, process_params)
+        raw = json.dumps(raw_routes)
+        processed = pickle.dumps(processed_routes, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO routes VALUES (?, ?, ?, ?, ?, ?)',
+                                     (key, now, now, len(raw) + len(processed), raw, processed))
+
+            # Remove the expired entries and evict the least recently used ones exceeding the size limit
+            self._connection.execute('DELETE FROM routes WHERE created < ?', (now - self._ttl,))
+            total_size = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM routes').fetchone()[0]
+            if total_size > self._max_bytes:
+                evicted = []
+                for evicted_key, size in self._connection.execute('SELECT key, size FROM routes '
+                                                                  'ORDER BY last_access'):
+                    if total_size <= self._max_bytes:
+                        break
+                    evicted.append((evicted_key,))
+                    total_size -= size
+                self._connection.executemany('DELETE FROM routes WHERE key = ?', evicted)
+
+    def clear(self) -> None:
+        """
+        Remove all the cached routes and reset the counters
+
+        :return: None
+        """
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM routes')
+        self._hits = self._misses = 0
+
+    def close(self) -> None:
+        """
+        Close the cache database
+
+        :return: None
+        """
+        self._connection.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM routes').fetchone()[0]
+
+    @property
+    def hits(self):
+        """
+        Getter of hits counter
+
+        :return: number of hits
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        Getter of misses counter
+
+        :return: number of misses
+        """
+        return self._misses
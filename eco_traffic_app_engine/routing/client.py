@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from eco_traffic_app_engine.static.constants import ROUTER_POOL_SIZE, ROUTER_TIMEOUT, ROUTER_MAX_RETRIES, \
+    ROUTER_BACKOFF_FACTOR, ROUTER_RETRY_STATUS
+
+
+class RouterClient:
+    """
+    HTTP client shared by the routing services, with keep-alive connection pooling, timeouts and retries with
+    exponential backoff
+
+    :param pool_size: maximum number of pooled connections per host
+    :type pool_size: int
+    :param timeout: timeout of each request in seconds
+    :type timeout: float
+    :param max_retries: maximum number of retries of a request
+    :type max_retries: int
+    :param backoff_factor: backoff factor between retries
+    :type backoff_factor: float
+    """
+
+    def __init__(self, pool_size: int = ROUTER_POOL_SIZE, timeout: float = ROUTER_TIMEOUT,
+                 max_retries: int = ROUTER_MAX_RETRIES, backoff_factor: float = ROUTER_BACKOFF_FACTOR):
+        self._timeout = timeout
+
+        # Retry connection errors and the given status codes, returning the last response once they are exhausted
+        retry = Retry(total=max_retries, backoff_factor=backoff_factor, status_forcelist=ROUTER_RETRY_STATUS,
+                      allowed_methods=['GET', 'POST'], raise_on_status=False)
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    def get(self, url: str, params: dict = None) -> requests.Response:
+        """
+        Perform a GET request
+
+        :param url: request URL
+        :type url: str
+        :param params: query params
+        :type params: dict
+        :return: response
+        :rtype: requests.Response
+        """
+        return self._session.get(url, params=params, timeout=self._timeout)
+
+    def post(self, url: str, json: dict = None, headers: dict = None) -> requests.Response:
+        """
+        Perform a POST request with a JSON body
+
+        :param url: request URL
+        :type url: str
+        :param json: JSON body
+        :type json: dict
+        :param headers: additional headers
+        :type headers: dict
+        :return: response
+        :rtype: requests.Response
+        """
+        return self._session.post(url, json=json, headers=headers, timeout=self._timeout)
+
+    def close(self) -> None:
+        """
+        Close the pooled session
+
+        :return: None
+        """
+        self._session.close()
+
+
+def get_routes_fan_out(routers: dict, coords: list):
+    """
+    Get the processed routes of several routing services concurrently for the same coordinates
+
+    :param routers: routing services by name (e.g. {'osrm': OSRM(...), 'ors': OpenRouteService(...)})
+    :type routers: dict
+    :param coords: list of Coords info
+    :type coords: list
+    :return: processed routes by routing service name, and error message of the failed routing services
+    :rtype: tuple
+    """
+    routes, failures = {}, {}
+
+    with ThreadPoolExecutor(max_workers=max(len(routers), 1)) as executor:
+        futures = {name: executor.submit(router.get_routes, coords) for name, router in routers.items()}
+
+        for name, future in futures.items():
+            try:
+                routes[name] = future.result()
+            except Exception as e:
+                failures[name] = f'{type(e).__name__}: {e}'
+
+    return routes, failures
@@ -1,8 +1,11 @@
-import requests
+import copy
 
-from eco_traffic_app_engine.graph.models import Coords
+from eco_traffic_app_engine.graph.models import RouteArrays
 from eco_traffic_app_engine.osm.info import OSMRetriever
-from eco_traffic_app_engine.routing.utils import process_route
+from eco_traffic_app_engine.routing.cache import RouterCache
+from eco_traffic_app_engine.routing.client import RouterClient
+from eco_traffic_app_engine.routing.utils import process_routes
+from eco_traffic_app_engine.static.constants import GRAPHHOPPER_API_URL
 
 
 class GraphHopper:
@@ -10,42 +13,67 @@ class GraphHopper:
     GraphHopper service requestor
     """
 
-    def __init__(self, params: dict):
+    def __init__(self, params: dict, process_params: dict = None, client: RouterClient = None,
+                 cache: RouterCache = None):
         self._routes = []
         self._params = params
-
-    def get_routes(self) -> list:
+        # HTTP client, it can be shared with other routing services
+        self._client = client if client is not None else RouterClient()
+        # Additional parameters of the routes processing (e.g. nominatim_retriever)
+        self._process_params = process_params if process_params is not None else {}
+        # Cache of the raw and processed routes by query, None to always perform the query
+        self._cache = cache
+
+    def get_routes(self, coords: list = None) -> list:
         """
         Get routes from GraphHopper service with the given params
 
+        :param coords: list of Coords info. Default None (the "point" param is used).
+        :type coords: list
         :return: routes
         :rtype: list
         """
+        # Query params with the query points if there are coordinates, on a copy as the params can be shared
+        params = {**self._params, 'point': [f"{coord.lat},{coord.lon}" for coord in coords]} \
+            if coords is not None else self._params
+
+        # Query params of the cache key, the query points are rounded if there are coordinates
+        cache_params = {key: value for key, value in params.items() if key != 'point'} if coords is not None \
+            else params
+
+        # Return the cached routes of the query, skipping the query and the processing
+        if self._cache is not None:
+            cached = self._cache.get('graphhopper', coords, cache_params, self._process_params)
+            if cached is not None:
+                self._routes = cached['processed']
+                return self._routes
+
         # Perform query
-        response = requests.get("https://graphhopper.com/api/1/route",
-                                params=self._params)
+        response = self._client.get(GRAPHHOPPER_API_URL, params=params)
 
-        # Create a list for the processed routes
-        processed_routes = []
+        # Raise the HTTP errors, so they are reported as failures of this routing service
+        response.raise_for_status()
 
-        # Check if there exists the response
-        if response.status_code == 200:
-            # Store the routes from response
-            routes = response.json()['paths']
+        # Store the routes from response
+        routes = response.json()['paths']
+        # Raw routes to be cached, before parsing the geometries
+        raw_routes = copy.deepcopy(routes)
 
-            for route in routes:
-                # Parse coordinates to Coords class
-                route['points']['coordinates'] = [Coords(lat=item[1], lon=item[0]) for item in
-                                                  route['points']['coordinates']]
+        for route in routes:
+            # Parse coordinates to a compact route
+            route['points']['coordinates'] = RouteArrays.from_lon_lat(route['points']['coordinates'])
 
-                # Create the processed route
-                processed_route = process_route(route_coordinates=route['points']['coordinates'])
-                # Get router service estimated distance and duration
-                processed_route['router_distance'] = route['distance']
-                processed_route['router_duration'] = route['time']/1000.0
+        # Create processed routes, all the alternatives at once
+        processed_routes = process_routes([route['points']['coordinates'] for route in routes],
+                                          **self._process_params)
 
-                # Append the processed route
-                processed_routes.append(processed_route)
+        for route, processed_route in zip(routes, processed_routes):
+            # Get router service estimated distance and duration
+            processed_route['router_distance'] = route['distance']
+            processed_route['router_duration'] = route['time']/1000.0
+
+        if self._cache is not None:
+            self._cache.put('graphhopper', coords, cache_params, raw_routes, processed_routes, self._process_params)
 
         # Update the routes with the parsed geometries
         self._routes = processed_routes
@@ -89,3 +117,22 @@ class GraphHopper:
         :return:
         """
         self._params = params
+
+    @property
+    def process_params(self):
+        """
+        Getter of process params
+
+        :return: process params
+        """
+        return self._process_params
+
+    @process_params.setter
+    def process_params(self, process_params: dict):
+        """
+        Setter of process params
+
+        :param process_params: process params
+        :return:
+        """
+        self._process_params = process_params
@@ -1,8 +1,12 @@
-from openrouteservice import Client, convert
-from openrouteservice.directions import directions
+import copy
 
-from eco_traffic_app_engine.graph.models import Coords
-from eco_traffic_app_engine.routing.utils import process_route
+from openrouteservice import convert
+
+from eco_traffic_app_engine.graph.models import RouteArrays
+from eco_traffic_app_engine.routing.cache import RouterCache
+from eco_traffic_app_engine.routing.client import RouterClient
+from eco_traffic_app_engine.routing.utils import process_routes
+from eco_traffic_app_engine.static.constants import ORS_API_URL, ORS_PROFILE
 
 
 class OpenRouteService:
@@ -10,10 +14,16 @@ class OpenRouteService:
     Open Route Service requestor
     """
 
-    def __init__(self, params: dict):
+    def __init__(self, params: dict, process_params: dict = None, client: RouterClient = None,
+                 cache: RouterCache = None):
         self._routes = []
         self._params = params
-        self._client = Client(base_url='http://localhost:8081/ors')
+        # Additional parameters of the routes processing (e.g. nominatim_retriever)
+        self._process_params = process_params if process_params is not None else {}
+        # Cache of the raw and processed routes by query, None to always perform the query
+        self._cache = cache
+        # HTTP client, it can be shared with other routing services
+        self._client = client if client is not None else RouterClient()
 
     def get_routes(self, coords: list) -> list:
         """
@@ -25,37 +35,52 @@ class OpenRouteService:
         :rtype: list
         """
 
+        # Return the cached routes of the query, skipping the query and the processing
+        if self._cache is not None:
+            cached = self._cache.get('ors', coords, self._params, self._process_params)
+            if cached is not None:
+                self._routes = cached['processed']
+                return self._routes
+
         # Swap order of the coordinates (longitude, latitude)
-        coords = [[item.lon, item.lat] for item in coords]
+        body = {'coordinates': [[item.lon, item.lat] for item in coords]}
 
         # Perform query using params if they exists
         if self._params:
-            routes = directions(self._client, coords, alternative_routes=self._params)['routes']
-        else:
-            routes = directions(self._client, coords)['routes']
+            body['alternative_routes'] = self._params
+        response = self._client.post(f'{ORS_API_URL}/v2/directions/{ORS_PROFILE}/json', json=body)
+        # Raise the HTTP errors, so they are reported as failures of this routing service
+        response.raise_for_status()
+
+        # Store the routes from response
+        routes = response.json()['routes']
 
         # Create a list for the processed routes
         processed_routes = []
 
         # Check if there exists the routes
         if routes:
+            # Raw routes to be cached, before decoding the geometries
+            raw_routes = copy.deepcopy(routes)
 
             for route in routes:
                 # Decode each route polyline
                 route['geometry'] = convert.decode_polyline(route['geometry'])
 
-                # Parse coordinates to Coords class
-                route['geometry']['coordinates'] = [Coords(lat=item[1], lon=item[0]) for item in
-                                                    route['geometry']['coordinates']]
+                # Parse coordinates to a compact route
+                route['geometry']['coordinates'] = RouteArrays.from_lon_lat(route['geometry']['coordinates'])
+
+            # Create processed routes, all the alternatives at once
+            processed_routes = process_routes([route['geometry']['coordinates'] for route in routes],
+                                              **self._process_params)
 
-                # Create processed route
-                processed_route = process_route(route_coordinates=route['geometry']['coordinates'])
+            for route, processed_route in zip(routes, processed_routes):
                 # Get router service estimated distance and duration
                 processed_route['router_distance'] = route['summary']['distance']
                 processed_route['router_duration'] = route['summary']['duration']
 
-                # Append the processed route
-                processed_routes.append(processed_route)
+            if self._cache is not None:
+                self._cache.put('ors', coords, self._params, raw_routes, processed_routes, self._process_params)
 
         # Update the routes with the parsed geometries
         self._routes = processed_routes
@@ -99,3 +124,22 @@ class OpenRouteService:
         :return:
         """
         self._params = params
+
+    @property
+    def process_params(self):
+        """
+        Getter of process params
+
+        :return: process params
+        """
+        return self._process_params
+
+    @process_params.setter
+    def process_params(self, process_params: dict):
+        """
+        Setter of process params
+
+        :param process_params: process params
+        :return:
+        """
+        self._process_params = process_params
@@ -1,7 +1,10 @@
-import requests
+import copy
 
-from eco_traffic_app_engine.graph.models import Coords
-from eco_traffic_app_engine.routing.utils import process_route
+from eco_traffic_app_engine.graph.models import RouteArrays
+from eco_traffic_app_engine.routing.cache import RouterCache
+from eco_traffic_app_engine.routing.client import RouterClient
+from eco_traffic_app_engine.routing.utils import process_routes
+from eco_traffic_app_engine.static.constants import OSRM_API_URL
 
 
 class OSRM:
@@ -9,9 +12,16 @@ class OSRM:
     Open Source Routing Machine service requestor
     """
 
-    def __init__(self, params: dict):
+    def __init__(self, params: dict, process_params: dict = None, client: RouterClient = None,
+                 cache: RouterCache = None):
         self._routes = []
         self._params = params
+        # HTTP client, it can be shared with other routing services
+        self._client = client if client is not None else RouterClient()
+        # Additional parameters of the routes processing (e.g. nominatim_retriever)
+        self._process_params = process_params if process_params is not None else {}
+        # Cache of the raw and processed routes by query, None to always perform the query
+        self._cache = cache
 
     def get_routes(self, coords: list) -> list:
         """
@@ -22,32 +32,40 @@ class OSRM:
         :return: routes
         :rtype: list
         """
+        # Return the cached routes of the query, skipping the query and the processing
+        if self._cache is not None:
+            cached = self._cache.get('osrm', coords, self._params, self._process_params)
+            if cached is not None:
+                self._routes = cached['processed']
+                return self._routes
+
         # Perform query
-        response = requests.get("https://router.project-osrm.org/route/v1/driving/" +
-                                ";".join(f"{coord.lon},{coord.lat}" for coord in coords),
-                                params=self._params)
+        response = self._client.get(OSRM_API_URL + ";".join(f"{coord.lon},{coord.lat}" for coord in coords),
+                                    params=self._params)
+
+        # Raise the HTTP errors, so they are reported as failures of this routing service
+        response.raise_for_status()
 
-        # Create a list for the processed routes
-        processed_routes = []
+        # Store the routes from response
+        routes = response.json()['routes']
+        # Raw routes to be cached, before parsing the geometries
+        raw_routes = copy.deepcopy(routes)
 
-        # Check if there exists the response
-        if response:
-            # Store the routes from response
-            routes = response.json()['routes']
+        for route in routes:
+            # Parse coordinates to a compact route
+            route['geometry']['coordinates'] = RouteArrays.from_lon_lat(route['geometry']['coordinates'])
 
-            for route in routes:
-                # Parse coordinates to Coords class
-                route['geometry']['coordinates'] = [Coords(lat=item[1], lon=item[0]) for item in
-                                                    route['geometry']['coordinates']]
+        # Create processed routes, all the alternatives at once
+        processed_routes = process_routes([route['geometry']['coordinates'] for route in routes],
+                                          **self._process_params)
 
-                # Create processed route
-                processed_route = process_route(route_coordinates=route['geometry']['coordinates'])
-                # Get router service estimated distance and duration
-                processed_route['router_distance'] = route['distance']
-                processed_route['router_duration'] = route['duration']
+        for route, processed_route in zip(routes, processed_routes):
+            # Get router service estimated distance and duration
+            processed_route['router_distance'] = route['distance']
+            processed_route['router_duration'] = route['duration']
 
-                # Append the processed route
-                processed_routes.append(processed_route)
+        if self._cache is not None:
+            self._cache.put('osrm', coords, self._params, raw_routes, processed_routes, self._process_params)
 
         # Update the routes with the parsed geometries
         self._routes = processed_routes
@@ -91,3 +109,22 @@ class OSRM:
         :return:
         """
         self._params = params
+
+    @property
+    def process_params(self):
+        """
+        Getter of process params
+
+        :return: process params
+        """
+        return self._process_params
+
+    @process_params.setter
+    def process_params(self, process_params: dict):
+        """
+        Setter of process params
+
+        :param process_params: process params
+        :return:
+        """
+        self._process_params = process_params
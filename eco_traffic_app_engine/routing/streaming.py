@@ -0,0 +1,188 @@
+from fractions import Fraction
+from itertools import islice
+
+from eco_traffic_app_engine.elevation.provider import ElevationProvider
+from eco_traffic_app_engine.graph.models import Coords
+from eco_traffic_app_engine.osm.nominatim import NominatimRetriever
+from eco_traffic_app_engine.osm.ways import OSMWayIndex
+from eco_traffic_app_engine.routing.utils import calculate_extended_arrays, retrieve_heights, retrieve_ways_info, \
+    calculate_slopes_batch
+from eco_traffic_app_engine.static.constants import STREAMING_WINDOW_SIZE, BATCHING_WINDOW_SIZE, \
+    SLOPE_VARIANCE_DIFFERENCE
+
+
+def stream_extended_route(route_coordinates, window_size: int = STREAMING_WINDOW_SIZE):
+    """
+    Calculate the extended route (with additional coordinates) along with its distances by windows of the input
+    route coordinates. Consecutive windows overlap in one coordinate.
+
+    :param route_coordinates: iterable with the input route coordinates
+    :param window_size: number of input coordinates pairs per window
+    :type window_size: int
+    :return: generator of (extended coordinates, distances, last window flag). The distance of each extended
+        coordinate is the one to the next coordinate, so only the last window has a coordinate without distance.
+    """
+    route_coordinates = iter(route_coordinates)
+    window = list(islice(route_coordinates, window_size + 1))
+
+    while len(window) >= 2:
+        # Retrieve the next window to know if the current one is the last one
+        next_window = [window[-1]] + list(islice(route_coordinates, window_size))
+        last = len(next_window) < 2
+
+        extended_lats, extended_lons, distances = calculate_extended_arrays([item.lat for item in window],
+                                                                            [item.lon for item in window])
+        extended_coordinates = [Coords(lat=lat, lon=lon) for lat, lon in zip(extended_lats.tolist(),
+                                                                            extended_lons.tolist())]
+        # The last coordinate is the first one of the next window
+        yield (extended_coordinates, distances.tolist(), True) if last else \
+            (extended_coordinates[:-1], distances.tolist(), False)
+
+        window = next_window
+
+
+def stream_route_info(extended_windows, nominatim_retriever: NominatimRetriever = None,
+                      height_provider: ElevationProvider = None, way_index: OSMWayIndex = None):
+    """
+    Retrieve the heights, maximum speeds and ways information of the extended route windows
+
+    :param extended_windows: generator of (extended coordinates, distances, last window flag)
+    :param nominatim_retriever: retriever used to perform concurrent maximum speed lookups. Default None.
+    :type nominatim_retriever: NominatimRetriever
+    :param height_provider: provider of the heights. Default None (sequential Open Topo Data requests).
+    :type height_provider: ElevationProvider
+    :param way_index: offline index of the OSM ways, used instead of Nominatim. Default None.
+    :type way_index: OSMWayIndex
+    :return: generator of (extended coordinates, distances, heights, maximum speeds, ways, last window flag). Maximum
+        speeds are not extended from previous values (-1 if unknown) and ways are None without way index.
+    """
+    for extended_coordinates, distances, last in extended_windows:
+        # Retrieve heights from the provider or the Open Topo Data service
+        heights = height_provider.get_heights(extended_coordinates) if height_provider is not None \
+            else retrieve_heights(extended_coordinates)
+
+        ways = None
+        if way_index is not None:
+            # Snap all the coordinates to the ways once
+            positions = way_index.snap_coordinates(extended_coordinates).tolist()
+            results = [way_index.get_way_extratags(position) for position in positions]
+            ways = [way_index.get_segment(position) for position in positions]
+        else:
+            results = retrieve_ways_info(extended_coordinates, nominatim_retriever)
+
+        # Maximum speed value or -1 by default. The additional info is not kept.
+        max_speeds = [int(result['extratags']['maxspeed'])
+                      if 'extratags' in result and 'maxspeed' in result['extratags'] else -1 for result in results]
+
+        yield extended_coordinates, distances, heights, max_speeds, ways, last
+
+
+def stream_slopes(info_windows):
+    """
+    Calculate the slopes of the route windows. The items are kept until the rolling window of heights
+    (BATCHING_WINDOW_SIZE) is complete, so the slopes are the same as calculating them on the whole route.
+
+    :param info_windows: generator of (extended coordinates, distances, heights, maximum speeds, ways, last flag)
+    :return: generator of (extended coordinates, distances, heights, maximum speeds, ways, slopes) of those items
+        whose slope is calculated. The last coordinate of the route is not returned as it has no slope.
+    """
+    # Items kept from previous windows and the route position of the first one
+    buffers = {'coordinates': [], 'distances': [], 'heights': [], 'max_speeds': [], 'ways': []}
+    start = 0
+    # Route position of the next item to return
+    next_position = 0
+
+    for coordinates, distances, heights, max_speeds, ways, last in info_windows:
+        for key, values in zip(buffers, (coordinates, distances, heights, max_speeds, ways)):
+            buffers[key] += values if values is not None else [None] * len(coordinates)
+
+        # Items with slope on the buffer (the last coordinate of the route has no distance)
+        num_items = len(buffers['distances'])
+        if last:
+            end = start + num_items
+        else:
+            # Only those items whose height window is complete
+            end = start + num_items - BATCHING_WINDOW_SIZE + BATCHING_WINDOW_SIZE // 2 + 1
+
+        if end > next_position:
+            # The slopes of the first buffer item are not valid, unless it is the first item of the route
+            slopes = calculate_slopes_batch([buffers['distances']], [buffers['heights'][:num_items]])[0].tolist()
+            first, stop = next_position - start, end - start
+            yield (buffers['coordinates'][first:stop], buffers['distances'][first:stop],
+                   buffers['heights'][first:stop], buffers['max_speeds'][first:stop], buffers['ways'][first:stop],
+                   slopes[first:stop])
+            next_position = end
+
+        # Keep only the items required to calculate the next slopes
+        discarded = max(next_position - BATCHING_WINDOW_SIZE // 2 - 1 - start, 0)
+        for values in buffers.values():
+            del values[:discarded]
+        start += discarded
+
+
+def process_route_streaming(route_coordinates, window_size: int = STREAMING_WINDOW_SIZE,
+                            nominatim_retriever: NominatimRetriever = None, height_provider: ElevationProvider = None,
+                            way_index: OSMWayIndex = None) -> dict:
+    """
+    Process and segment the input route coordinates by windows, with the same output as "process_route" but a peak
+    memory bounded by the window size instead of the route length
+
+    :param route_coordinates: iterable with the input route coordinates
+    :param window_size: number of input coordinates pairs per window
+    :type window_size: int
+    :param nominatim_retriever: retriever used to perform concurrent maximum speed lookups. Default None.
+    :type nominatim_retriever: NominatimRetriever
+    :param height_provider: provider of the heights. Default None (sequential Open Topo Data requests).
+    :type height_provider: ElevationProvider
+    :param way_index: offline index of the OSM ways, used instead of Nominatim. Default None.
+    :type way_index: OSMWayIndex
+    :return: dictionary with the processed route (segments, heights, max_speed, distances and slopes, and ways if
+        there is a way index)
+    :rtype: dict
+    """
+    # Pipeline: densify -> heights and maximum speeds -> slopes
+    windows = stream_slopes(stream_route_info(stream_extended_route(route_coordinates, window_size),
+                                              nominatim_retriever, height_provider, way_index))
+
+    processed_route = {'segments': [], 'heights': [], 'max_speed': [], 'distances': [], 'slopes': []}
+    ways_segment = []
+
+    # Values of the previous item and the current segment
+    position = 0
+    previous_max_speed = previous_slope = None
+    segment_max_speed = segment_way = None
+    segment_distance, segment_slope, segment_items = 0, Fraction(0), 0
+
+    for window in windows:
+        for coordinates, distance, height, max_speed, way, slope in zip(*window):
+            # Extend maximum speed from previous info
+            if position > 0 and max_speed == -1:
+                max_speed = previous_max_speed
+
+            # Segment the route where there is a difference of maximum speeds or slopes on adjacent nodes
+            if position == 0 or max_speed != previous_max_speed or \
+                    abs(slope - previous_slope) > SLOPE_VARIANCE_DIFFERENCE:
+                if position > 0:
+                    # Store the values of the previous segment (exact mean as statistics.mean)
+                    processed_route['max_speed'].append(segment_max_speed)
+                    processed_route['distances'].append(segment_distance)
+                    processed_route['slopes'].append(float(segment_slope / segment_items))
+                    ways_segment.append(segment_way)
+
+                # Start a new segment
+                processed_route['segments'].append(coordinates)
+                processed_route['heights'].append(height)
+                segment_max_speed, segment_way = max_speed, way
+                segment_distance, segment_slope, segment_items = 0, Fraction(0), 0
+
+            segment_distance += distance
+            segment_slope += Fraction(slope)
+            segment_items += 1
+
+            previous_max_speed, previous_slope = max_speed, slope
+            position += 1
+
+    if way_index is not None:
+        processed_route['ways'] = ways_segment
+
+    return processed_route
@@ -1,50 +1,201 @@
 import math
 from statistics import mean
 
+import numpy as np
 import pandas as pd
 import requests
 from geopy.distance import geodesic as gd
 
-from eco_traffic_app_engine.graph.models import Coords
+from eco_traffic_app_engine.elevation.provider import ElevationProvider
+from eco_traffic_app_engine.graph.models import Coords, RouteArrays, get_coordinates_arrays
+from eco_traffic_app_engine.osm.nominatim import NominatimRetriever
+from eco_traffic_app_engine.osm.ways import OSMWayIndex
+from eco_traffic_app_engine.others.utils import split_list
 from eco_traffic_app_engine.static.constants import HEIGHT_API_URL, MAX_DISTANCE_BETWEEN_NODES, \
     DISTANCE_BETWEEN_NEW_NODES, NOMINATIM_API_URL, NOMINATIM_ADD_PARAMS, SLOPE_THRESHOLD, BATCHING_WINDOW_SIZE, \
-    SLOPE_VARIANCE_DIFFERENCE
+    SLOPE_VARIANCE_DIFFERENCE, WGS84_SEMI_MAJOR_AXIS, WGS84_FLATTENING, GEODESIC_MAX_ITERATIONS, \
+    GEODESIC_CONVERGENCE_THRESHOLD
 
 
-def split_list(list_data: list, n: int):
+def process_route(route_coordinates: list, nominatim_retriever: NominatimRetriever = None,
+                  height_provider: ElevationProvider = None, way_index: OSMWayIndex = None) -> dict:
     """
-    Split a list into list of n size
+    Process and segment the input route coordinates and return its related values (segments, heights, max_speed,
+    distances and slopes)
 
-    :param list_data: list with the data
-    :type list_data: list
-    :param n: number of items per sublist
-    :type n: int
-    :return:
+    :param route_coordinates: coordinates of the input route (RouteArrays or list of Coords)
+    :param nominatim_retriever: retriever used to perform concurrent maximum speed lookups. Default None.
+    :type nominatim_retriever: NominatimRetriever
+    :param height_provider: provider of the heights (e.g. local SRTM tiles or cached service). Default None
+        (sequential Open Topo Data requests).
+    :type height_provider: ElevationProvider
+    :param way_index: offline index of the OSM ways, used instead of Nominatim. Default None.
+    :type way_index: OSMWayIndex
+    :return: dictionary with the processed route (segments, heights, max_speed, distances and slopes)
     """
-    # Iterate over the list and retrieve the requested sublist
-    for i in range(0, len(list_data), n):
-        yield list_data[i:i + n]
+    return process_routes([route_coordinates], nominatim_retriever=nominatim_retriever,
+                          height_provider=height_provider, way_index=way_index)[0]
 
 
-def process_route(route_coordinates: list) -> dict:
+def process_routes(routes_coordinates: list, nominatim_retriever: NominatimRetriever = None,
+                   height_provider: ElevationProvider = None, way_index: OSMWayIndex = None) -> list:
     """
-    Process and segment the input route coordinates and return its related values (segments, heights, max_speed,
-    distances and slopes)
-
-    :param route_coordinates: coordinates of the input route
-    :type route_coordinates: list
-    :return: dictionary with the processed route (segments, heights, max_speed, distances and slopes)
+    Process and segment several routes at once (e.g. the alternatives of a routing service), calculating the slopes
+    of all of them in a single batch. The common parts of the routes are processed only once.
+
+    :param routes_coordinates: list with the coordinates of each input route (RouteArrays or list of Coords)
+    :type routes_coordinates: list
+    :param nominatim_retriever: retriever used to perform concurrent maximum speed lookups. Default None.
+    :type nominatim_retriever: NominatimRetriever
+    :param height_provider: provider of the heights (e.g. local SRTM tiles or cached service). Default None
+        (sequential Open Topo Data requests).
+    :type height_provider: ElevationProvider
+    :param way_index: offline index of the OSM ways, used instead of Nominatim. Default None.
+    :type way_index: OSMWayIndex
+    :return: list of dictionaries with the processed routes (segments, heights, max_speed, distances and slopes)
+    :rtype: list
     """
+    return process_shared_routes(routes_coordinates, nominatim_retriever=nominatim_retriever,
+                                 height_provider=height_provider, way_index=way_index)[0]
 
-    # Calculate the extended coordinates along with distances
-    route_extended_coordinates, distances = calculate_extended_coords_and_distances(route_coordinates)
-    # Retrieve heights
-    heights = retrieve_heights(route_extended_coordinates)
-    # Calculate the slopes  with the distances and heights
-    slopes = calculate_slopes(distances, heights)
-    # Retrieve maximum speed and additional information
-    max_speeds, add_info = retrieve_max_speeds(route_extended_coordinates)
 
+def process_shared_routes(routes_coordinates: list, nominatim_retriever: NominatimRetriever = None,
+                          height_provider: ElevationProvider = None, way_index: OSMWayIndex = None):
+    """
+    Process and segment several routes at once, sharing the work of their common parts (e.g. the prefixes and
+    suffixes of the alternatives of a routing service). Each pair of consecutive nodes is extended once and each
+    extended coordinate is enriched (heights and ways information) once, then the outputs of each route are
+    assembled from the shared values. The heights of all the routes are retrieved with a single call to the provider
+    (get_routes_heights). The processed routes are the same as processing each route on its own.
+
+    :param routes_coordinates: list with the coordinates of each input route (RouteArrays or list of Coords)
+    :type routes_coordinates: list
+    :param nominatim_retriever: retriever used to perform concurrent maximum speed lookups. Default None.
+    :type nominatim_retriever: NominatimRetriever
+    :param height_provider: provider of the heights (e.g. local SRTM tiles or cached service). Default None
+        (sequential Open Topo Data requests).
+    :type height_provider: ElevationProvider
+    :param way_index: offline index of the OSM ways, used instead of Nominatim. Default None.
+    :type way_index: OSMWayIndex
+    :return: list of dictionaries with the processed routes (segments, heights, max_speed, distances and slopes),
+        and dictionary with the work saved by the deduplication (number of routes, pairs of nodes and unique pairs,
+        shared parts reused from previous routes, and extended coordinates and unique ones)
+    :rtype: tuple
+    """
+    routes_arrays = [tuple(np.asarray(values, dtype=np.float64) for values in get_coordinates_arrays(route_coordinates))
+                     for route_coordinates in routes_coordinates]
+
+    # Index of each unique pair of nodes (by its coordinates) and the pairs of each route
+    pairs_index, routes_pairs = {}, []
+    shared_parts = 0
+    for lats, lons in routes_arrays:
+        route_pairs, previous_shared = [], False
+        for pair in zip(lats[:-1].tolist(), lons[:-1].tolist(), lats[1:].tolist(), lons[1:].tolist()):
+            # Count the runs of pairs already found on previous routes (shared sub-polylines)
+            shared = pair in pairs_index
+            shared_parts += shared and not previous_shared
+            previous_shared = shared
+            route_pairs.append(pairs_index.setdefault(pair, len(pairs_index)))
+        routes_pairs.append(np.array(route_pairs, dtype=np.int64))
+
+    # Extend all the unique pairs at once
+    pairs = np.array(list(pairs_index), dtype=np.float64).reshape(-1, 4)
+    extended_lats, extended_lons, extended_distances, num_segments = calculate_extended_pairs(*pairs.T)
+    pairs_offsets = np.cumsum(num_segments) - num_segments
+
+    # Assemble the extended routes from their pairs, adding the destination node as it is the last element
+    extended_routes = []
+    for (lats, lons), route_pairs in zip(routes_arrays, routes_pairs):
+        positions = np.repeat(pairs_offsets[route_pairs] - np.cumsum(num_segments[route_pairs]) +
+                              num_segments[route_pairs], num_segments[route_pairs]) + \
+            np.arange(num_segments[route_pairs].sum())
+        extended_routes.append((np.append(extended_lats[positions], lats[-1:]),
+                                np.append(extended_lons[positions], lons[-1:]), extended_distances[positions]))
+
+    # Extended coordinates of all the routes
+    routes_lengths = [len(route_lats) for route_lats, _, _ in extended_routes]
+    points_lats = np.concatenate([route_lats for route_lats, _, _ in extended_routes] + [np.empty(0)])
+    points_lons = np.concatenate([route_lons for _, route_lons, _ in extended_routes] + [np.empty(0)])
+    if len(pairs_index) < sum(len(route_pairs) for route_pairs in routes_pairs):
+        # Unique extended coordinates (in the order they are first found, as the routes) and the position of each
+        # route coordinate on them. Only required when the routes have pairs of nodes in common.
+        points_index = {}
+        points_inverse = [points_index.setdefault(point, len(points_index))
+                          for point in zip(points_lats.tolist(), points_lons.tolist())]
+        points = np.array(list(points_index), dtype=np.float64).reshape(-1, 2)
+        points_lats, points_lons = points[:, 0].copy(), points[:, 1].copy()
+    else:
+        points_inverse = range(len(points_lats))
+    routes_offsets = np.cumsum([0] + routes_lengths).tolist()
+    routes_points = [points_inverse[start:end] for start, end in zip(routes_offsets, routes_offsets[1:])]
+    unique_coordinates = RouteArrays(points_lats, points_lons)
+
+    if height_provider is not None:
+        # Retrieve the heights of all the routes from the provider, which requests the shared coordinates once
+        routes_heights = height_provider.get_routes_heights([RouteArrays(route_lats, route_lons)
+                                                             for route_lats, route_lons, _ in extended_routes])
+    else:
+        # Retrieve heights of the unique coordinates from the Open Topo Data service
+        heights = retrieve_heights(unique_coordinates)
+        routes_heights = [[heights[point] for point in route_points] for route_points in routes_points]
+
+    ways = None
+    if way_index is not None:
+        # Snap all the unique coordinates to the ways once, retrieving their ways information
+        positions = way_index.snap_coordinates(unique_coordinates).tolist()
+        results = [way_index.get_way_extratags(position) for position in positions]
+        ways = [way_index.get_segment(position) for position in positions]
+    else:
+        results = retrieve_ways_info(unique_coordinates, nominatim_retriever)
+
+    # Maximum speed of each unique coordinate or -1 by default. The results are shared, so they are not modified.
+    points_max_speeds = [int(result['extratags']['maxspeed'])
+                         if 'maxspeed' in result.get('extratags', {}) else -1 for result in results]
+
+    # Calculate the slopes of all the routes
+    routes_slopes = calculate_slopes_batch([distances for _, _, distances in extended_routes], routes_heights)
+
+    processed_routes = []
+    for (route_lats, route_lons, distances), route_points, route_heights, slopes in zip(extended_routes,
+                                                                                         routes_points,
+                                                                                         routes_heights,
+                                                                                         routes_slopes):
+        # Retrieve maximum speed, extended from the previous coordinates of the route
+        max_speeds = extend_max_speeds([points_max_speeds[point] for point in route_points])
+
+        # Segment the route
+        processed_routes.append(segment_processed_route(RouteArrays(route_lats, route_lons), distances.tolist(),
+                                                        route_heights, slopes.tolist(), max_speeds,
+                                                        [ways[point] for point in route_points]
+                                                        if ways is not None else None))
+
+    report = {'routes': len(routes_coordinates), 'pairs': sum(len(route_pairs) for route_pairs in routes_pairs),
+              'unique_pairs': len(pairs_index), 'shared_parts': shared_parts,
+              'points': sum(routes_lengths), 'unique_points': len(unique_coordinates)}
+
+    return processed_routes, report
+
+
+def segment_processed_route(route_extended_coordinates: list, distances: list, heights: list, slopes: list,
+                            max_speeds: list, ways: list = None) -> dict:
+    """
+    Segment the extended route based on its maximum speeds and slopes, and aggregate the values per segment
+
+    :param route_extended_coordinates: coordinates of the extended route (RouteArrays or list of Coords)
+    :param distances: distances between the extended route coordinates
+    :type distances: list
+    :param heights: heights of the extended route coordinates
+    :type heights: list
+    :param slopes: slopes of the extended route coordinates
+    :type slopes: list
+    :param max_speeds: maximum speeds of the extended route coordinates
+    :type max_speeds: list
+    :param ways: ways information (Segment) of the extended route coordinates. Default None.
+    :type ways: list
+    :return: dictionary with the processed route (segments, heights, max_speed, distances and slopes, and ways if
+        they are given)
+    :rtype: dict
+    """
     # Retrieve indices for segmented route
     indices = segment_route(max_speeds, slopes)
 
@@ -57,12 +208,19 @@ def process_route(route_coordinates: list) -> dict:
                                                             indices[1:])]
 
     # return the segments, heights, maximum speeds, distances and slopes
-    return {'segments': [route_extended_coordinates[i] for i in indices],
-            'heights': [heights[i] for i in indices],
-            'max_speed': [max_speeds[i] for i in indices][:-1],
-            # Last item of max speed removed as it is not used
-            'distances': sum_distances_segment,
-            'slopes': mean_slope_segment}
+    processed_route = {'segments': [Coords(lat=route_extended_coordinates[i].lat, lon=route_extended_coordinates[i].lon)
+                                    for i in indices],
+                       'heights': [heights[i] for i in indices],
+                       'max_speed': [max_speeds[i] for i in indices][:-1],
+                       # Last item of max speed removed as it is not used
+                       'distances': sum_distances_segment,
+                       'slopes': mean_slope_segment}
+
+    if ways is not None:
+        # Ways information of each segment (from its first coordinates)
+        processed_route['ways'] = [ways[i] for i in indices][:-1]
+
+    return processed_route
 
 
 def calculate_extended_coords_and_distances(route_coordinates: list):
@@ -109,6 +267,182 @@ def calculate_extended_coords_and_distances(route_coordinates: list):
     return route_extended_coordinates, distances
 
 
+def calculate_geodesic_distances(lat_1: np.ndarray, lon_1: np.ndarray, lat_2: np.ndarray,
+                                 lon_2: np.ndarray) -> np.ndarray:
+    """
+    Calculate the geodesic distances (meters) over the WGS-84 ellipsoid between two arrays of points, using the
+    Vincenty inverse formula for all the pairs at once. The results are within 1 mm of geopy's geodesic for
+    non-antipodal points.
+
+    :param lat_1: latitudes of the first points (degrees)
+    :type lat_1: np.ndarray
+    :param lon_1: longitudes of the first points (degrees)
+    :type lon_1: np.ndarray
+    :param lat_2: latitudes of the second points (degrees)
+    :type lat_2: np.ndarray
+    :param lon_2: longitudes of the second points (degrees)
+    :type lon_2: np.ndarray
+    :return: distances in meters between each pair of points
+    :rtype: np.ndarray
+    """
+    # Define the ellipsoid semi-minor axis
+    a, f = WGS84_SEMI_MAJOR_AXIS, WGS84_FLATTENING
+    b = (1 - f) * a
+
+    # Calculate the difference of longitudes and the reduced latitudes
+    diff_lon = np.radians(np.asarray(lon_2, dtype=np.float64) - np.asarray(lon_1, dtype=np.float64))
+    u_1 = np.arctan((1 - f) * np.tan(np.radians(np.asarray(lat_1, dtype=np.float64))))
+    u_2 = np.arctan((1 - f) * np.tan(np.radians(np.asarray(lat_2, dtype=np.float64))))
+    sin_u_1, cos_u_1 = np.sin(u_1), np.cos(u_1)
+    sin_u_2, cos_u_2 = np.sin(u_2), np.cos(u_2)
+
+    # Iterate the longitude on the auxiliary sphere until convergence. Each pair stops iterating once it converges,
+    # so its distance does not depend on the rest of the pairs
+    lam = diff_lon
+    active = np.ones(diff_lon.shape, dtype=bool)
+    sin_sigma = cos_sigma = sigma = cos_sq_alpha = cos_2_sigma_m = np.zeros(diff_lon.shape)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for _ in range(GEODESIC_MAX_ITERATIONS):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            new_sin_sigma = np.sqrt((cos_u_2 * sin_lam) ** 2 + (cos_u_1 * sin_u_2 - sin_u_1 * cos_u_2 * cos_lam) ** 2)
+            new_cos_sigma = sin_u_1 * sin_u_2 + cos_u_1 * cos_u_2 * cos_lam
+            new_sigma = np.arctan2(new_sin_sigma, new_cos_sigma)
+            # Coincident points have no azimuth -> set 0 to avoid NaN values
+            sin_alpha = np.where(new_sin_sigma == 0, 0.0, cos_u_1 * cos_u_2 * sin_lam / new_sin_sigma)
+            new_cos_sq_alpha = 1 - sin_alpha ** 2
+            # Equatorial lines have cos_sq_alpha = 0
+            new_cos_2_sigma_m = np.where(new_cos_sq_alpha == 0, 0.0,
+                                         new_cos_sigma - 2 * sin_u_1 * sin_u_2 / new_cos_sq_alpha)
+            c = f / 16 * new_cos_sq_alpha * (4 + f * (4 - 3 * new_cos_sq_alpha))
+            new_lam = diff_lon + (1 - c) * f * sin_alpha * (
+                    new_sigma + c * new_sin_sigma * (new_cos_2_sigma_m + c * new_cos_sigma *
+                                                     (-1 + 2 * new_cos_2_sigma_m ** 2)))
+
+            # Update only the pairs that have not converged yet
+            sin_sigma = np.where(active, new_sin_sigma, sin_sigma)
+            cos_sigma = np.where(active, new_cos_sigma, cos_sigma)
+            sigma = np.where(active, new_sigma, sigma)
+            cos_sq_alpha = np.where(active, new_cos_sq_alpha, cos_sq_alpha)
+            cos_2_sigma_m = np.where(active, new_cos_2_sigma_m, cos_2_sigma_m)
+            active &= ~(np.abs(new_lam - lam) < GEODESIC_CONVERGENCE_THRESHOLD)
+            lam = np.where(active, new_lam, lam)
+
+            # Stop when all the pairs have converged
+            if not active.any():
+                break
+
+    # Calculate the distance over the ellipsoid
+    u_sq = cos_sq_alpha * (a ** 2 - b ** 2) / b ** 2
+    big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    delta_sigma = big_b * sin_sigma * (cos_2_sigma_m + big_b / 4 * (
+            cos_sigma * (-1 + 2 * cos_2_sigma_m ** 2) - big_b / 6 * cos_2_sigma_m * (-3 + 4 * sin_sigma ** 2) *
+            (-3 + 4 * cos_2_sigma_m ** 2)))
+
+    return b * big_a * (sigma - delta_sigma)
+
+
+def calculate_extended_pairs(source_lats: np.ndarray, source_lons: np.ndarray, destination_lats: np.ndarray,
+                             destination_lons: np.ndarray):
+    """
+    Calculate the extended coordinates (source node and additional coordinates) of several pairs of nodes along with
+    their distances. Each pair is extended on its own, so its values do not depend on the rest of the pairs.
+
+    :param source_lats: latitudes of the source nodes
+    :type source_lats: np.ndarray
+    :param source_lons: longitudes of the source nodes
+    :type source_lons: np.ndarray
+    :param destination_lats: latitudes of the destination nodes
+    :type destination_lats: np.ndarray
+    :param destination_lons: longitudes of the destination nodes
+    :type destination_lons: np.ndarray
+    :return: latitudes and longitudes of the extended pairs (without the destination nodes), its distances and the
+        number of extended coordinates of each pair
+    :rtype: tuple
+    """
+    # Calculate distances between the nodes of each pair. Latitude and longitude are given in the same order as
+    # "calculate_extended_coords_and_distances" in order to keep the same values
+    pair_distances = calculate_geodesic_distances(source_lons, source_lats, destination_lons, destination_lats)
+
+    # Calculate the number of segments of each pair (1 if it is not required to extend the pair)
+    num_segments = np.where(pair_distances > MAX_DISTANCE_BETWEEN_NODES,
+                            np.ceil(pair_distances / DISTANCE_BETWEEN_NEW_NODES), 1).astype(np.int64)
+
+    # Get the pair related to each new point and its position inside the pair
+    pair_indices = np.repeat(np.arange(len(pair_distances)), num_segments)
+    positions = np.arange(len(pair_indices)) - np.repeat(np.cumsum(num_segments) - num_segments, num_segments)
+    segments = num_segments[pair_indices]
+
+    # Interpolate the coordinates as a proportion of each pair (source node is position 0)
+    extended_lats = source_lats[pair_indices] + positions * ((destination_lats - source_lats)[pair_indices] *
+                                                             (1 / segments))
+    extended_lons = source_lons[pair_indices] + positions * ((destination_lons - source_lons)[pair_indices] *
+                                                             (1 / segments))
+
+    # Intermediate distances are equal for each segment, and the last one of each pair is the whole distance
+    distances = pair_distances[pair_indices]
+    distances = np.where(positions == segments - 1, distances, distances / np.maximum(segments - 1, 1))
+
+    return extended_lats, extended_lons, distances, num_segments
+
+
+def calculate_extended_arrays(lats: np.ndarray, lons: np.ndarray):
+    """
+    Calculate the extended route (with additional coordinates) along with its distances between nodes, operating
+    over coordinates arrays. It follows the same rules as "calculate_extended_coords_and_distances".
+
+    :param lats: latitudes of the input route
+    :type lats: np.ndarray
+    :param lons: longitudes of the input route
+    :type lons: np.ndarray
+    :return: latitudes and longitudes of the extended route and its distances
+    :rtype: tuple
+    """
+    lats, lons = np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)
+
+    # Extend each pair of consecutive nodes
+    extended_lats, extended_lons, distances, _ = calculate_extended_pairs(lats[:-1], lons[:-1], lats[1:], lons[1:])
+
+    # Add destination node as it is the last element
+    extended_lats = np.append(extended_lats, lats[-1])
+    extended_lons = np.append(extended_lons, lons[-1])
+
+    return extended_lats, extended_lons, distances
+
+
+def calculate_extended_coords_and_distances_vectorized(route_coordinates: list):
+    """
+    Calculate the extended route (with additional coordinates) along with its distances between nodes, computing all
+    the distances and intermediate coordinates at once. Same output as "calculate_extended_coords_and_distances"
+    within 1 mm for the distances and 1e-9 degrees for the coordinates.
+
+    :param route_coordinates: input route coordinates
+    :type route_coordinates: list
+    :return: list of coordinates of extended route and its distances
+    """
+    # Routes without pairs of nodes are processed by the original implementation
+    if len(route_coordinates) < 2:
+        return calculate_extended_coords_and_distances(route_coordinates)
+
+    route_extended_coordinates, distances = calculate_extended_route(route_coordinates)
+
+    return route_extended_coordinates.to_coords(), distances.tolist()
+
+
+def calculate_extended_route(route_coordinates):
+    """
+    Calculate the extended route (with additional coordinates) as a RouteArrays, along with its distances between
+    nodes
+
+    :param route_coordinates: input route coordinates (RouteArrays or list of Coords), with at least two nodes
+    :return: extended route and its distances
+    :rtype: tuple
+    """
+    extended_lats, extended_lons, distances = calculate_extended_arrays(*get_coordinates_arrays(route_coordinates))
+
+    return RouteArrays(extended_lats, extended_lons), distances
+
+
 def retrieve_heights(route_coordinates: list[Coords]) -> list:
     """
     Retrieve heights values of the input route coordinates
@@ -185,37 +519,167 @@ def calculate_slopes(distances: list, heights: list) -> list:
     return list(df['slope'])
 
 
-def retrieve_max_speeds(route_coordinates: list[Coords]):
+def calculate_slopes_batch(routes_distances: list, routes_heights: list) -> list:
+    """
+    Calculate the slopes of several routes at once (ragged batch), with the same values as "calculate_slopes" for
+    each route. All the routes are concatenated and processed with array operations, and the height rolling mean
+    never crosses the boundaries of a route.
+
+    :param routes_distances: distances of the segments of each route
+    :type routes_distances: list
+    :param routes_heights: heights of the segments of each route
+    :type routes_heights: list
+    :return: list with an array of slopes per route
+    :rtype: list
+    """
+    # Only the pairs of distance and height are processed (as the zip on "calculate_slopes")
+    lengths = np.array([min(len(distances), len(heights)) for distances, heights in zip(routes_distances,
+                                                                                         routes_heights)],
+                       dtype=np.int64)
+    offsets = np.cumsum(lengths) - lengths
+
+    # Concatenate all the routes. Unknown heights (None) are parsed to NaN
+    distances = np.concatenate([np.asarray(distances[:length], dtype=np.float64)
+                                for distances, length in zip(routes_distances, lengths)] + [np.empty(0)])
+    heights = np.concatenate([np.asarray(heights[:length], dtype=np.float64)
+                              for heights, length in zip(routes_heights, lengths)] + [np.empty(0)])
+
+    # Get the route of each item and its position inside the route
+    route_indices = np.repeat(np.arange(len(lengths)), lengths)
+    positions = np.arange(len(distances)) - offsets[route_indices]
+
+    # Calculate the centered rolling mean of heights. Each window is summed on its own, so the values do not depend
+    # on the rest of the batch, and windows with NaN values are not valid
+    window_start = positions - BATCHING_WINDOW_SIZE // 2
+    window_end = window_start + BATCHING_WINDOW_SIZE
+    # Windows exceeding the route bounds are not valid (as pandas rolling "min_periods")
+    valid = (window_start >= 0) & (window_end <= lengths[route_indices])
+    mean_heights = np.full(len(heights), np.nan)
+    if valid.any():
+        window_sums = np.lib.stride_tricks.sliding_window_view(heights, BATCHING_WINDOW_SIZE).sum(axis=1)
+        mean_heights[valid] = window_sums[(offsets[route_indices] + window_start)[valid]] / BATCHING_WINDOW_SIZE
+
+    # Calculate the difference of mean heights and distance traveled with the previous item
+    height_difference = np.empty_like(mean_heights)
+    height_difference[1:] = mean_heights[1:] - mean_heights[:-1]
+    distance_traveled_difference = np.zeros_like(distances)
+    distance_traveled_difference[1:] = 0.5 * (distances[1:] + distances[:-1])
+    # First item of each route has no previous item
+    distance_traveled_difference[positions == 0] = 0
+
+    # Calculate the slope where the difference of distance traveled is valid, otherwise set 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slopes = np.where(distance_traveled_difference != 0,
+                          height_difference / distance_traveled_difference * 100, 0.0)
+    # Replace slope NaN values with 0 and limit the values based on a realistic range
+    slopes = np.clip(np.nan_to_num(slopes, nan=0.0), -SLOPE_THRESHOLD, SLOPE_THRESHOLD)
+
+    # Split the slopes per route
+    return np.split(slopes, np.cumsum(lengths)[:-1]) if len(lengths) else []
+
+
+def calculate_slopes_vectorized(distances: list, heights: list) -> list:
+    """
+    Calculate the slopes of the segments based on the distance and heights of the coordinates, using array
+    operations instead of iterating over the rows
+
+    :param distances: distances of the route segments
+    :type distances: list
+    :param heights: heights of the route segments
+    :type heights: list
+    :return: list with the slope segments
+    :rtype: list
+    """
+    return calculate_slopes_batch([distances], [heights])[0].tolist()
+
+
+def retrieve_max_speeds(route_coordinates: list[Coords], nominatim_retriever: NominatimRetriever = None,
+                        way_index: OSMWayIndex = None):
     """
     Retrieve maximum speeds related to the route coordinates
 
     :param route_coordinates: all the route coordinates
     :type route_coordinates: list of Coords
+    :param nominatim_retriever: retriever used to perform concurrent lookups. Default None (sequential lookups).
+    :type nominatim_retriever: NominatimRetriever
+    :param way_index: offline index of the OSM ways, used instead of Nominatim. Default None.
+    :type way_index: OSMWayIndex
 
     :return: maximum speed list along with additional information for each coordinate
     """
-    max_speeds, add_info = [], []
+    return process_max_speeds(retrieve_ways_info(route_coordinates, nominatim_retriever, way_index))
+
 
+def retrieve_ways_info(route_coordinates: list[Coords], nominatim_retriever: NominatimRetriever = None,
+                       way_index: OSMWayIndex = None) -> list:
+    """
+    Retrieve the ways information (Nominatim responses) related to the route coordinates
+
+    :param route_coordinates: all the route coordinates
+    :type route_coordinates: list of Coords
+    :param nominatim_retriever: retriever used to perform concurrent lookups. Default None (sequential lookups).
+    :type nominatim_retriever: NominatimRetriever
+    :param way_index: offline index of the OSM ways, used instead of Nominatim. Default None.
+    :type way_index: OSMWayIndex
+
+    :return: list with a Nominatim response for each coordinate
+    :rtype: list
+    """
+    # Retrieve the ways information from the offline index
+    if way_index is not None:
+        return way_index.get_extratags(route_coordinates)
+    # Perform the lookups concurrently if there is a retriever
+    if nominatim_retriever is not None:
+        return nominatim_retriever.reverse_many(route_coordinates)
+
+    results = []
     for coordinates in route_coordinates:
         # Append the coordinates to the query
         request_str = NOMINATIM_API_URL + "lat=" + str(coordinates.lat) + "&lon=" + str(
             coordinates.lon) + NOMINATIM_ADD_PARAMS
 
         # Perform request and parse to json
-        results = requests.get(url=request_str).json()
+        results.append(requests.get(url=request_str).json())
+
+    return results
+
 
-        if 'extratags' in results:
-            extratags = results['extratags']
+def process_max_speeds(results: list):
+    """
+    Process the Nominatim responses of the route coordinates, retrieving the maximum speeds
+
+    :param results: Nominatim responses, one per coordinate
+    :type results: list
+
+    :return: maximum speed list along with additional information for each coordinate
+    """
+    max_speeds, add_info = [], []
+
+    for result in results:
+        if 'extratags' in result:
+            extratags = result['extratags']
 
             # Append maximum speed value or -1 by default
             max_speeds.append(int(extratags.pop('maxspeed')) if 'maxspeed' in extratags else -1)
 
             # Append additional info
-            add_info.append(results['extratags'])
+            add_info.append(result['extratags'])
         else:
             # Append -1 as there is no information
             max_speeds.append(-1)
 
+    return extend_max_speeds(max_speeds), add_info
+
+
+def extend_max_speeds(max_speeds: list) -> list:
+    """
+    Extend the maximum speeds of the route coordinates, replacing the unknown ones (-1) by the previous value
+
+    :param max_speeds: maximum speeds of the route coordinates, -1 if unknown
+    :type max_speeds: list
+
+    :return: list with the extended maximum speeds (same list, modified in place)
+    """
     # Process and extend maximum speed info -> Extend from previous info
     for i in range(len(max_speeds) - 2):
         # Get current and next speed
@@ -225,7 +689,7 @@ def retrieve_max_speeds(route_coordinates: list[Coords]):
         if next_max_speed == -1:
             max_speeds[i + 1] = cur_max_speed
 
-    return max_speeds, add_info
+    return max_speeds
 
 
 def segment_route(max_speeds: list, slopes: list) -> list:
@@ -1,14 +1,66 @@
 # Open Topo Data service
-HEIGHT_API_URL = 'http://localhost:5000/v1/srtm30mspain?locations='
+HEIGHT_API_DATASET_URL = 'http://localhost:5000/v1/srtm30mspain'
+HEIGHT_API_URL = HEIGHT_API_DATASET_URL + '?locations='
+# Open Topo Data service layer (locations per request, concurrent requests and cached heights)
+HEIGHT_API_MAX_LOCATIONS = 1001
+HEIGHT_API_MAX_WORKERS = 4
+HEIGHT_API_TIMEOUT = 30
+HEIGHT_CACHE_MAX_ENTRIES = 1000000
+
+# Local SRTM (.hgt) elevation tiles
+SRTM_DIRECTORY = '../srtm/'
+SRTM_VOID_VALUE = -32768
 
 # Nominatim API URL
 NOMINATIM_API_URL = 'http://localhost:8082/reverse?'
 NOMINATIM_ADD_PARAMS = '&format=json&extratags=1&zoom=16'  # 16 to avoid buildings and POIs
+# Concurrent Nominatim lookups (0 requests per second means no rate limit)
+NOMINATIM_MAX_WORKERS = 8
+NOMINATIM_REQUESTS_PER_SECOND = 0
+NOMINATIM_TIMEOUT = 10
+
+# Offline OSM way index (maximum snapping distance in meters and approximated meters per degree)
+WAY_INDEX_MAX_DISTANCE = 25
+METERS_PER_DEGREE = 111320
+
+# Persistent reverse geocode cache (grid size in degrees, ~11 meters in latitude)
+REVERSE_GEOCODE_CACHE_FILE = '../cache/reverse_geocode.sqlite'
+REVERSE_GEOCODE_CACHE_GRID = 1e-4
+REVERSE_GEOCODE_CACHE_MAX_ENTRIES = 1000000
+
+# Routing services
+OSRM_API_URL = 'https://router.project-osrm.org/route/v1/driving/'
+GRAPHHOPPER_API_URL = 'https://graphhopper.com/api/1/route'
+ORS_API_URL = 'http://localhost:8081/ors'
+ORS_PROFILE = 'driving-car'
+# Routing services HTTP client (pooled connections, timeout in seconds and retries with backoff)
+ROUTER_POOL_SIZE = 10
+ROUTER_TIMEOUT = 30
+ROUTER_MAX_RETRIES = 3
+ROUTER_BACKOFF_FACTOR = 0.5
+ROUTER_RETRY_STATUS = [429, 500, 502, 503, 504]
+# Routing services cache (TTL in seconds, maximum size in bytes and decimals of the rounded coordinates)
+ROUTER_CACHE_FILE = '../cache/routes.sqlite'
+ROUTER_CACHE_TTL = 7 * 24 * 3600
+ROUTER_CACHE_MAX_BYTES = 1024 ** 3
+ROUTER_CACHE_PRECISION = 6
 
 # Graph database
 GRAPH_DB_URL = 'localhost:7687'
 GRAPH_DB_USER = 'neo4j'
 GRAPH_DB_PASSWORD = 'admin'
+# Nodes and relations written per transaction on the bulk ingestion
+GRAPH_DB_BATCH_SIZE = 1000
+# Write-behind mode (maximum queued mutations and seconds without mutations before writing the pending ones)
+GRAPH_DB_QUEUE_SIZE = 10000
+GRAPH_DB_FLUSH_INTERVAL = 1.0
+# Nodes read per query when loading the memory graph from the graph db
+GRAPH_DB_PAGE_SIZE = 10000
+# Engine state folder (memory graph, coordinates identifiers and last identifier) used on warm starts
+ENGINE_STATE_DIR = '../cache/engine_state/'
+
+# Snapping tolerance (meters) of the graph nodes, coordinates closer than it are the same node
+NODE_SNAPPING_TOLERANCE = 0.5
 
 # Congestion distance
 CONGESTION_DISTANCE = 500
@@ -26,6 +78,18 @@ CONGESTION_DICT = {
 
 CONGESTION_DATA_DIR = '../congestion_data/'
 
+# Eco-route costs: speed factor and fuel consumption factor per congestion level (unknown congestion as "low")
+CONGESTION_SPEED_FACTORS = [1.0, 0.75, 0.5, 0.25]
+CONGESTION_FUEL_FACTORS = [1.0, 1.15, 1.35, 1.6]
+# Fuel consumption (liters per 100 km) on flat roads, its variation per slope percentage and its minimum factor
+FUEL_BASE_CONSUMPTION = 6.0
+FUEL_SLOPE_FACTOR = 0.08
+FUEL_MIN_FACTOR = 0.2
+# Factor of the A* heuristic, below 1 to remain admissible with the great-circle distance approximation
+ROUTE_HEURISTIC_FACTOR = 0.99
+# Maximum number of nodes of the cells ordered without splitting them on the contraction hierarchies
+HIERARCHY_LEAF_SIZE = 16
+
 # Default values for ways info and maximum speeds
 DEFAULT_WAYS_VALUES = {
     'distance': 0.0,
@@ -46,11 +110,25 @@ DEFAULT_MAX_SPEED_VALUES = {
     'motorway_link': 70.0
 }
 
+# Origin-destination batch processing (worker processes and maximum pairs in flight)
+BATCH_MAX_WORKERS = 4
+BATCH_MAX_IN_FLIGHT = 16
+
 # Variables for calculating extended route (new nodes)
 MAX_DISTANCE_BETWEEN_NODES = 150
 DISTANCE_BETWEEN_NEW_NODES = 50
 
+# WGS-84 ellipsoid used by the vectorized geodesic distances (same as geopy default)
+WGS84_SEMI_MAJOR_AXIS = 6378137.0
+WGS84_FLATTENING = 1 / 298.257223563
+# Vincenty inverse formula convergence parameters
+GEODESIC_MAX_ITERATIONS = 200
+GEODESIC_CONVERGENCE_THRESHOLD = 1e-12
+
 # Variables for calculating the slope
 SLOPE_THRESHOLD = 12
 SLOPE_VARIANCE_DIFFERENCE = 1
 BATCHING_WINDOW_SIZE = 20
+
+# Number of input route coordinates processed per window on the streaming mode
+STREAMING_WINDOW_SIZE = 500
@@ -4,6 +4,7 @@ import pandas as pd
 from OSMPythonTools.nominatim import Nominatim
 from OSMPythonTools.overpass import Overpass
 
+from eco_traffic_app_engine.graph.models import Coords
 from eco_traffic_app_engine.others.utils import concat, load_dataframe
 from eco_traffic_app_engine.static.constants import CONGESTION_DATA_DIR, R_SCRIPT_DIRECTORY
 
@@ -40,6 +41,7 @@ class TrafficCongestionRetriever:
 
     def __init__(self):
         self._congestion_data = None
+        self._osm_nodes = {}
         self._nominatim = Nominatim()
         self._overpass = Overpass()
 
@@ -80,14 +82,15 @@ class TrafficCongestionRetriever:
         :return: None
         """
         # Get those nodes that are in the graph
-        self._congestion_data = self._congestion_data[self._congestion_data['osm_nodes'].isin(nodes)]
+        self._congestion_data = self._congestion_data[self._congestion_data['osm_nodes'].astype(str).isin(nodes)]
 
         # Remove duplicated elements
         self._congestion_data = self._congestion_data.drop_duplicates()
 
     def get_osm_nodes(self, road_coords: list) -> list:
         """
-        Get the OSM nodes related to a list of pair of coordinates
+        Get the OSM nodes related to a list of pair of coordinates, storing the coordinates of each OSM node.
+        The OSM node identifiers are returned as str, as the graph node identifiers.
 
         :param road_coords: roads pair coordinates list
         :type road_coords: list
@@ -105,7 +108,13 @@ class TrafficCongestionRetriever:
         # Execute query
         results = self._overpass.query(query)
 
-        return [item._json['id'] for item in results.elements()]
+        osm_nodes = []
+        for item in results.elements():
+            osm_node_id = str(item._json['id'])
+            self._osm_nodes[osm_node_id] = Coords(lat=item._json['lat'], lon=item._json['lon'])
+            osm_nodes.append(osm_node_id)
+
+        return osm_nodes
 
     def process_congestion_geometries(self, congestion_df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -175,3 +184,12 @@ class TrafficCongestionRetriever:
         :return:
         """
         self._congestion_data = congestion_data
+
+    @property
+    def osm_nodes(self):
+        """
+        Getter of the coordinates of each OSM node retrieved
+
+        :return: coordinates (Coords) by OSM node identifier (str)
+        """
+        return self._osm_nodes